@@ -1 +1,15 @@
-import bt4vt.core
+import importlib
+
+# submodules are imported on first attribute access, so that `import bt4vt` does not load pandas, scipy or sklearn
+_submodules = ["batch", "cache", "cli", "core", "dataio", "dataset_evaluate", "discovery", "distributed", "evaluate", "groups", "influence", "kernels",
+               "metrics", "normalization", "parked_functions", "planner", "service", "validation", "voxceleb"]
+
+
+def __getattr__(name):
+    if name in _submodules:
+        return importlib.import_module("." + name, __name__)
+    raise AttributeError("module 'bt4vt' has no attribute '" + name + "'")
+
+
+def __dir__():
+    return sorted(list(globals().keys()) + _submodules)
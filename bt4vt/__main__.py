@@ -0,0 +1,4 @@
+import sys
+from bt4vt.cli import main
+
+sys.exit(main())
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Created on 19-10-2026
+# @author: wiebket, AnnaLesch
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+
+def load_manifest(manifest_file):
+    """Read a batch manifest into a list of jobs. The manifest is either a yaml file with a list of jobs under the
+    ``jobs`` key, or a csv file with the columns ``scores`` and ``config``. Each job consists of the path to a scores
+    file and the path to a config file.
+
+    .. code-block:: yaml
+
+        jobs:
+          - scores: "~/bias_tests_4_voice_tech/example/resnetse34v2_H-eval_scores.csv"
+            config: "~/bias_tests_4_voice_tech/example/config.yaml"
+
+    :param manifest_file: path to the yaml or csv manifest file
+    :type manifest_file: str
+
+    :returns: jobs
+    :rtype: list
+
+    """
+
+    if manifest_file.lower().endswith((".yaml", ".yml")):
+        import yaml
+
+        with open(os.path.expanduser(manifest_file), 'r') as file:
+            manifest = yaml.safe_load(file)
+        jobs = [(job["scores"], job["config"]) for job in manifest["jobs"]]
+    else:
+        from .dataio import load_data
+
+        manifest = load_data(os.path.expanduser(manifest_file))
+        jobs = list(zip(manifest["scores"], manifest["config"]))
+
+    return jobs
+
+
+def _partition_key(config):
+    """Key of the config attributes that determine how scores are split into speaker groups, including the trial weights
+    that are kept in the split records. Bias tests of the same scores file with the same key share the split.
+
+    :param config: config as returned by :py:func:`dataio.load_config`
+    :type config: dict
+
+    :returns: partition_key
+    :rtype: tuple
+
+    """
+
+    partition_key = (os.path.abspath(os.path.expanduser(config["speaker_metadata_file"])),
+                     config["id_column"],
+                     tuple(config["select_columns"]),
+                     tuple(tuple(group) for group in config["speaker_groups"]),
+                     config.get("id_delimiter", "/"),
+                     config.get("id_pattern"),
+                     config.get("id_field", 0),
+                     config["reference_filepath_column"],
+                     config["test_filepath_column"],
+                     config["label_column"],
+                     config["scores_column"],
+                     json.dumps(config.get("attribute_bins"), sort_keys=True),
+                     config.get("weights_column"),
+                     config.get("trial_weights"),
+                     json.dumps(config.get("weights_speaker_group")))
+
+    return partition_key
+
+
+def run_scores_jobs(scores, config_files):
+    """Run the bias tests of all config files on a single scores file. The scores file and every speaker metadata file
+    are read once, and configs with the same speaker groups share the split of scores into speaker groups. Results
+    files are written in the background while the next job runs.
+
+    :param scores: path to the scores file
+    :type scores: str
+    :param config_files: paths to the yaml config files
+    :type config_files: list
+
+    :returns: biastest_results_files
+    :rtype: list
+
+    """
+
+    from .core import SpeakerBiasTest
+
+    data_cache = dict()
+    partitions = dict()
+    biastest_results_files = []
+
+    tests = []
+    for config_file in config_files:
+        test = SpeakerBiasTest(scores, config_file, data_cache=data_cache)
+        # results are written in the background while the next job runs
+        test.background_writes = True
+        partition_key = _partition_key(test.config)
+        test.scores_by_speaker_groups, test.subgroup_trial_counts = partitions.get(partition_key, (None, None))
+        test.run_tests(wait=False)
+        partitions[partition_key] = (test.scores_by_speaker_groups, test.subgroup_trial_counts)
+        biastest_results_files.append(os.path.join(test.config["results_dir"], test._biastest_results_file))
+        tests.append(test)
+
+    for test in tests:
+        test.wait_for_results()
+
+    return biastest_results_files
+
+
+def run_batch(jobs, workers=1):
+    """Run a batch of bias tests. Jobs are grouped by scores file so that each scores file is read once, and the groups
+    are scheduled over a pool of worker processes.
+
+    :param jobs: list of (scores, config) tuples, as returned by :py:func:`load_manifest`
+    :type jobs: list
+    :param workers: number of worker processes. Default is 1, which runs all jobs in the current process.
+    :type workers: int
+
+    :returns: biastest_results_files in the order of the jobs
+    :rtype: list
+
+    """
+
+    config_files_by_scores = dict()
+    for scores, config_file in jobs:
+        config_files_by_scores.setdefault(scores, []).append(config_file)
+
+    if workers > 1 and len(config_files_by_scores) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(config_files_by_scores))) as executor:
+            results = list(executor.map(run_scores_jobs, config_files_by_scores.keys(), config_files_by_scores.values()))
+    else:
+        results = [run_scores_jobs(scores, config_files) for scores, config_files in config_files_by_scores.items()]
+
+    # restore the order of the jobs
+    results_by_scores = {scores: iter(files) for scores, files in zip(config_files_by_scores.keys(), results)}
+    biastest_results_files = [next(results_by_scores[scores]) for scores, _ in jobs]
+
+    return biastest_results_files
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Created on 19-10-2026
+# @author: wiebket, AnnaLesch
+
+import hashlib
+import json
+import os
+import numpy as np
+
+#########################################
+# The result cache stores the DET curve and the trial counts of every evaluated subgroup in a cache directory. Entries
+# are content-addressed: the cache key is a hash of the scores, the speaker metadata and the config attributes that
+# determine the trials of the subgroup, so that bias tests that only differ in dcf_costs reuse all DET curves. The
+# least recently used entries are evicted when the cache directory exceeds its disk budget.
+#########################################
+
+
+def get_cache_key(*key_parts):
+    """Computation of a cache key from json serializable key parts, e.g. content hashes, config attributes and subgroup names.
+
+    :param key_parts: parts of the cache key
+    :type key_parts: str, list or dict
+
+    :returns: cache_key
+    :rtype: str
+
+    """
+
+    return hashlib.sha256(json.dumps(key_parts, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _get_cache_file(cache_dir, cache_key):
+    """Path of the cache entry of a cache key.
+
+    """
+
+    return os.path.join(os.path.expanduser(cache_dir), cache_key + ".npz")
+
+
+def load_cached_det_curve(cache_dir, cache_key):
+    """Load a DET curve from the cache. A cache hit marks the entry as recently used.
+
+    :param cache_dir: path to the cache directory
+    :type cache_dir: str
+    :param cache_key: cache key as returned by :py:func:`get_cache_key`
+    :type cache_key: str
+
+    :returns: fprs, fnrs, thresholds, or None if the cache key is not in the cache
+    :rtype: ndarray, ndarray, ndarray
+
+    """
+
+    cache_file = _get_cache_file(cache_dir, cache_key)
+    try:
+        with np.load(cache_file, allow_pickle=False) as cache_entry:
+            det_curve = (cache_entry["fprs"], cache_entry["fnrs"], cache_entry["thresholds"])
+        os.utime(cache_file)
+    except (FileNotFoundError, KeyError, ValueError, OSError):
+        # missing, evicted in the meantime or partially written entries are recomputed
+        return None
+
+    return det_curve
+
+
+def save_cached_det_curve(cache_dir, cache_key, fprs, fnrs, thresholds, targets, nontargets):
+    """Save a DET curve and the sufficient statistics of its trials, i.e. the number of target and non-target trials, to the cache.
+
+    :param cache_dir: path to the cache directory
+    :type cache_dir: str
+    :param cache_key: cache key as returned by :py:func:`get_cache_key`
+    :type cache_key: str
+    :param fprs: Array of False Positive Rates
+    :type fprs: ndarray
+    :param fnrs: Array of False Negative Rates
+    :type fnrs: ndarray
+    :param thresholds: Array of Threshold values corresponding to fprs and fnrs
+    :type thresholds: ndarray
+    :param targets: number of target trials
+    :type targets: int
+    :param nontargets: number of non-target trials
+    :type nontargets: int
+
+    """
+
+    cache_file = _get_cache_file(cache_dir, cache_key)
+    os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+    # write to a temporary file first, so that concurrent runs never read a partially written entry
+    temporary_file = cache_file + "." + str(os.getpid()) + ".tmp.npz"
+    np.savez(temporary_file, fprs=fprs, fnrs=fnrs, thresholds=thresholds, targets=targets, nontargets=nontargets)
+    os.replace(temporary_file, cache_file)
+
+    return
+
+
+def evict_cache(cache_dir, max_bytes):
+    """Eviction of the least recently used cache entries until the cache directory uses at most max_bytes of disk space.
+
+    :param cache_dir: path to the cache directory
+    :type cache_dir: str
+    :param max_bytes: disk budget of the cache directory in bytes
+    :type max_bytes: int
+
+    :returns: evicted_entries
+    :rtype: int
+
+    """
+
+    cache_dir = os.path.expanduser(cache_dir)
+    if not os.path.isdir(cache_dir):
+        return 0
+
+    cache_entries = []
+    for entry in os.scandir(cache_dir):
+        if entry.is_file() and entry.name.endswith(".npz") and not entry.name.endswith(".tmp.npz"):
+            stat = entry.stat()
+            cache_entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+    cache_bytes = sum(size for _, size, _ in cache_entries)
+    evicted_entries = 0
+    # oldest entries first
+    for _, size, path in sorted(cache_entries):
+        if cache_bytes <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        cache_bytes -= size
+        evicted_entries += 1
+
+    return evicted_entries
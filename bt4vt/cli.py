@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Created on 19-10-2026
+# @author: wiebket, AnnaLesch
+
+import argparse
+
+
+def _build_parser():
+    """Construction of the argument parser of the bt4vt command line interface.
+
+    :returns: parser
+    :rtype: argparse.ArgumentParser
+
+    """
+
+    parser = argparse.ArgumentParser(prog="bt4vt", description="Bias Tests for Voice Technologies")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="run bias tests on a scores file")
+    run_parser.add_argument("scores", help="path to csv or txt scores file")
+    run_parser.add_argument("config", help="path to yaml config file")
+
+    batch_parser = subparsers.add_parser("batch", help="run bias tests for all (scores, config) jobs in a manifest")
+    batch_parser.add_argument("manifest", help="path to yaml or csv manifest file")
+    batch_parser.add_argument("-w", "--workers", type=int, default=1, help="number of worker processes (default is 1)")
+
+    serve_parser = subparsers.add_parser("serve", help="keep a scores file in memory and answer bias test queries over HTTP")
+    serve_parser.add_argument("scores", help="path to csv or txt scores file")
+    serve_parser.add_argument("config", help="path to yaml config file")
+    serve_parser.add_argument("--host", default="127.0.0.1", help="host name (default is 127.0.0.1)")
+    serve_parser.add_argument("-p", "--port", type=int, default=8765, help="port (default is 8765)")
+
+    return parser
+
+
+def main(argv=None):
+    """Entry point of the ``bt4vt`` command.
+
+    .. code-block:: bash
+
+        $ bt4vt run scores.csv config.yaml
+        $ bt4vt batch manifest.yaml --workers 4
+        $ bt4vt serve scores.csv config.yaml --port 8765
+
+    :param argv: command line arguments, default is sys.argv
+    :type argv: list
+
+    """
+
+    args = _build_parser().parse_args(argv)
+
+    if args.command == "run":
+        from .core import SpeakerBiasTest
+
+        SpeakerBiasTest(args.scores, args.config).run_tests()
+
+    elif args.command == "batch":
+        from .batch import load_manifest, run_batch
+
+        jobs = load_manifest(args.manifest)
+        biastest_results_files = run_batch(jobs, workers=args.workers)
+        print("Batch finished. " + str(len(biastest_results_files)) + " results files written.")
+
+    elif args.command == "serve":
+        from .service import make_server
+
+        server = make_server(args.scores, args.config, host=args.host, port=args.port)
+        print("Serving bias tests on http://" + args.host + ":" + str(server.server_address[1]))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.shutdown()
+
+    return 0
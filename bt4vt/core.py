@@ -6,15 +6,34 @@
 
 import pandas as pd
 import numpy as np
+import copy
+import hashlib
+import itertools
+import json
 import os
-import sys
+import re
+import shutil
+import tempfile
+import weakref
+from collections.abc import Mapping
 from datetime import datetime
 from pathlib import Path
-from .dataio import load_config, load_data, write_data
-from .evaluate import evaluate_scores
-from .groups import split_scores_by_speaker_groups
-from .metrics import compute_metrics_ratios
+from concurrent.futures import ThreadPoolExecutor, wait as wait_for_futures
+from .dataio import load_config, load_data, load_data_chunks, write_data, hash_file, load_metadata_index, \
+    save_metadata_index, spill_records, load_cohort_scores, is_array_input
+from .evaluate import evaluate_scores, compute_det_curve_histogram
+from .validation import InputValidationError, validate_config, validate_columns, validate_scores, validate_attribute_bins
+from .normalization import NORMALIZATIONS, normalize_scores
+from .planner import plan_execution, parse_memory_limit
+from .cache import get_cache_key, load_cached_det_curve, save_cached_det_curve, evict_cache
+from .groups import split_scores_by_speaker_groups, get_speaker_ids, build_metadata_index, get_speaker_codes, \
+    get_subgroup_diagnostics, get_inverse_frequency_weights, get_subgroup_codes, bin_speaker_metadata, count_trials_by_speaker_groups, count_subgroup_trials, \
+    sort_trials_by_subgroups
+from .metrics import compute_metrics_ratios, compute_operating_points, compute_fpfn_ratio, get_thresholds_at_fprs, \
+    compute_speaker_error_rates, get_worst_speakers, compute_calibration_metrics, get_bayes_thresholds
 from .dataset_evaluate import evaluate_scores_by_speaker_groups
+from .discovery import discover_worst_subgroups, compute_cell_metrics
+from .influence import compute_speaker_influence, rank_speaker_influence
 
 
 class BiasTest:
@@ -46,6 +65,41 @@ class BiasTest:
 
         return
 
+    def _write(self, data, file_name, row_groups_by=None, float32_columns=None, append=False):
+        """ Writes data to a file in the results directory. If ``background_writes: True`` is set in the config file, the file is written in a background thread and the method returns immediately.
+
+            :param data: data to write
+            :type data: DataFrame
+            :param file_name: name of the file in the results directory
+            :type file_name: str
+            :param row_groups_by: columns that define the row groups of Parquet files
+            :type row_groups_by: list
+            :param float32_columns: float columns that are stored as float32 in Parquet files
+            :type float32_columns: list
+            :param append: append the rows to an existing csv file
+            :type append: bool
+
+        """
+
+        future = write_data(data, os.path.join(os.path.expanduser(self.config["results_dir"]), file_name), background=self.background_writes,
+                            row_groups_by=row_groups_by, float32_columns=float32_columns, append=append)
+        if future is not None:
+            self._pending_writes.append(future)
+
+        return
+
+    def wait_for_results(self):
+        """ Waits until all results files that are written in the background have been written. The first error of a background write is raised.
+
+        """
+
+        pending_writes, self._pending_writes = self._pending_writes, []
+        wait_for_futures(pending_writes)
+        for future in pending_writes:
+            future.result()
+
+        return
+
     def evaluate_dataset(self):
 
         """
@@ -60,19 +114,33 @@ class SpeakerBiasTest(BiasTest):
      the bias tests.
 
         :param scores: Either path to csv or txt file or a Pandas DataFrame that includes information on the reference
-        and test utterances as well as corresponding labels and scores; labels have to be either {-1,1} or {0,1}
-        :type scores: str or DataFrame
+        and test utterances as well as corresponding labels and scores; labels have to be either {-1,1} or {0,1}. Scores can also be given as a dictionary of NumPy arrays
+        or a pyarrow Table with the columns label, score and optionally ref and test, which are used without copying; the column names of the config file are only
+        needed for file and DataFrame inputs
+        :type scores: str or DataFrame or dict or pyarrow.Table
         :param config_file: path to yaml config file
         :type config_file: str
+        :param data_cache: optional dictionary of files that have already been read, used to share the scores and speaker metadata files between several bias tests (see :py:func:`dataio.load_data`)
+        :type data_cache: dict
+        :param speaker_ids: optional array with the speaker id of the reference utterance of every trial, used instead of extracting speaker ids from the reference filepaths
+        :type speaker_ids: ndarray
+
+    Trials can be weighted to rebalance the speaker composition of the scores without resampling them. Per-trial weights are read from the ``weights_column`` of the
+    scores (the column weight of array inputs), and ``trial_weights: inverse_subgroup_frequency`` or ``trial_weights: inverse_speaker_frequency`` in the config file
+    computes weights that give every subgroup of ``weights_speaker_group`` or every speaker an equal share of the target and of the non-target trials (see
+    :py:func:`groups.get_inverse_frequency_weights`). Both kinds of weights are multiplied. The DET curves, the EER, the minimum DCF and their ratios are computed on
+    weighted trial counts, the calibration metrics, speaker tests and subgroup discovery are not weighted.
 
     """
 
     def __init__(self, scores,
-                 config_file):
+                 config_file, data_cache=None, speaker_ids=None):
         """Constructor method
         """
         self.error_rates_by_speaker_group = dict()
         self.metrics = pd.DataFrame()
+        self.scores_by_speaker_groups = None
+        self.subgroup_trial_counts = None
 
         self.config = load_config(config_file)
         try:
@@ -81,22 +149,67 @@ class SpeakerBiasTest(BiasTest):
             self.id_delimiter = "/"
         else:
             self.id_delimiter = self.config["id_delimiter"]
-
-        scores_input = load_data(scores)
-        speaker_metadata_input = load_data(self.config['speaker_metadata_file'])
+        # speaker ids are extracted with a regular expression or from a fixed field of the filepath split by id_delimiter
+        self.id_pattern = self.config.get("id_pattern")
+        self.id_field = self.config.get("id_field", 0)
+        if self.id_pattern is not None:
+            try:
+                re.compile(self.id_pattern)
+            except re.error:
+                raise ValueError("id_pattern in config file must be a valid regular expression")
+        if not isinstance(self.id_field, int):
+            raise ValueError("id_field in config file must be an integer")
+
+        self.background_writes = self.config.get("background_writes", False)
+        self._pending_writes = []
+        self._ref_ids = None
+        self.metadata_index = None
+        self._metadata_index_file = None
+        self._metadata_hash = None
+        self.execution_plan = None
+
+        # arrays and Arrow tables are addressed by the column names label, score, ref and test
+        self._array_input = is_array_input(scores)
+        if self._array_input:
+            self.config.update({"label_column": "label", "scores_column": "score", "reference_filepath_column": "ref", "test_filepath_column": "test"})
+            if self.config.get("weights_column") is not None:
+                self.config["weights_column"] = "weight"
+            if speaker_ids is not None and isinstance(scores, Mapping):
+                scores = dict(scores, ref_id=speaker_ids)
+                speaker_ids = None
+        if speaker_ids is not None:
+            self._ref_ids = np.asarray(speaker_ids)
+
+        # the speaker metadata file is parsed in parallel to the scores
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            speaker_metadata_future = executor.submit(self._load_speaker_metadata, data_cache)
+            scores_input = self._load_scores(scores, data_cache)
+            speaker_metadata_input = speaker_metadata_future.result()
 
         self._check_input(scores_input, speaker_metadata_input)
 
-        # scores_input columns selection, reordering and renaming
-        scores_input = scores_input[[self.config["label_column"],
-                                     self.config["reference_filepath_column"],
-                                     self.config["test_filepath_column"],
-                                     self.config["scores_column"]]]
-        self.scores = scores_input.rename(columns={self.config["label_column"]: "label",
-                                                   self.config["reference_filepath_column"]: "ref",
-                                                   self.config["test_filepath_column"]: "test",
-                                                   self.config["scores_column"]: "score"})
-        self.scores = self.scores.astype({"ref": "str", "test": "str"})
+        if self._array_input:
+            # array inputs already have the canonical column names and are used without selecting or renaming columns, which would copy them
+            self.scores = scores_input
+        else:
+            # scores_input columns selection, reordering and renaming
+            weights_columns = [self.config["weights_column"]] if self.config.get("weights_column") is not None else []
+            scores_input = scores_input[[self.config["label_column"],
+                                         self.config["reference_filepath_column"],
+                                         self.config["test_filepath_column"],
+                                         self.config["scores_column"]] + weights_columns]
+            self.scores = scores_input.rename(columns={self.config["label_column"]: "label",
+                                                       self.config["reference_filepath_column"]: "ref",
+                                                       self.config["test_filepath_column"]: "test",
+                                                       self.config["scores_column"]: "score",
+                                                       **{column: "weight" for column in weights_columns}})
+            self.scores = self.scores.astype({"ref": "str", "test": "str"})
+        if self._ref_ids is not None:
+            self.scores["ref_id"] = self._ref_ids
+        if "ref_id" in self.scores.columns and self.scores["ref_id"].dtype != object:
+            # speaker ids of the metadata are strings, numeric speaker ids are converted once per speaker
+            id_codes, unique_ids = pd.factorize(self.scores["ref_id"])
+            self.scores["ref_id"] = np.append(unique_ids.astype(str), np.nan).astype(object)[id_codes]
         # speaker_metadata_input column selection, reordering, renaming id
         metadata_selection_list = self.config["select_columns"]
         metadata_selection_list.insert(0, self.config["id_column"])
@@ -109,16 +222,40 @@ class SpeakerBiasTest(BiasTest):
 
         self.speaker_metadata = speaker_metadata_input.rename(columns={self.config["id_column"]: "id"})
         self.speaker_metadata = self.speaker_metadata.astype({"id": "str"})
+        # numeric attributes are binned before they are indexed, unless the speaker metadata is reconstructed from a metadata index
+        if self.config.get("attribute_bins") is not None and self.metadata_index is None:
+            self.speaker_metadata = bin_speaker_metadata(self.speaker_metadata, self.config["attribute_bins"])
+        self._validate_scores()
+
+        # index of speaker codes per attribute and speaker group, saved for later runs if metadata_index_dir is set
+        if self.metadata_index is None:
+            attributes = [column for column in self.speaker_metadata.columns if column != "id"]
+            self.metadata_index = build_metadata_index(self.speaker_metadata, attributes, self.config["speaker_groups"])
+            if self._metadata_index_file is not None:
+                save_metadata_index(self.metadata_index, self._metadata_index_file, self._metadata_hash)
+        self._compute_trial_weights()
+
+        # DET curves are cached by the content of the scores and speaker metadata and the config attributes that determine the trials of each subgroup
+        self._cache_dir = self.config.get("cache_dir")
+        if self._cache_dir is not None:
+            scores_columns = [self.config[column] for column in ["label_column", "reference_filepath_column", "test_filepath_column", "scores_column"]]
+            self._scores_cache_key = get_cache_key(self._hash_scores(scores, scores_input), scores_columns)
+            metadata_hash = self._metadata_hash or hash_file(self.config["speaker_metadata_file"])
+            if "weight" in self.scores.columns:
+                # weighted DET curves are cached separately, weights computed from the speaker metadata also depend on its content
+                self._scores_cache_key = get_cache_key(self._scores_cache_key, self.config.get("weights_column"), self.config.get("trial_weights"),
+                                                       self.config.get("weights_speaker_group"),
+                                                       metadata_hash if self.config.get("trial_weights") is not None else None)
+            self._groups_cache_key = get_cache_key(self._scores_cache_key, metadata_hash, self.config["id_column"], self.config["select_columns"],
+                                                   self.id_delimiter, self.id_pattern, self.id_field)
+            if self.config.get("attribute_bins") is not None:
+                self._groups_cache_key = get_cache_key(self._groups_cache_key, self.config["attribute_bins"])
+            if self._ref_ids is not None:
+                # speaker ids that are passed with the scores or extracted while parsing determine the subgroups instead of the hashed scores content
+                self._groups_cache_key = get_cache_key(self._groups_cache_key, hashlib.sha256(self._ref_ids.astype(str).tobytes()).hexdigest())
 
         config_file_name = Path(config_file).stem
-        if isinstance(scores, str):
-            scores_file_name = Path(scores).stem
-        elif isinstance(scores, pd.DataFrame):
-            date = datetime.now()
-            scores_file_name = date.strftime("%d_%m_%Y_%H_%M_%S")
-        else:
-            # TODO: error handling
-            scores_file_name = None
+        scores_file_name = self._get_scores_file_name(scores)
 
         # check if results directory exists
         results_dir = self.config["results_dir"]
@@ -131,114 +268,410 @@ class SpeakerBiasTest(BiasTest):
         else:
             self._dataset_eval_log_file = None
 
-        self._biastest_results_file = "biastest_results_" + config_file_name + "_" + scores_file_name + ".csv"
+        # results are written as csv files, or as Parquet files if output_format is parquet
+        self.output_format = self.config.get("output_format", "csv")
+        if self.output_format not in ["csv", "parquet"]:
+            raise ValueError("Output format in config file must be csv or parquet")
+        results_extension = "." + self.output_format
 
-    def _check_input(self, scores_input, speaker_metadata_input):
-        """ Check that requirements for performing evaluation are fulfilled e.g. parameters of scores, speaker metadata and config are specified correctly
+        self._biastest_results_file = "biastest_results_" + config_file_name + "_" + scores_file_name + results_extension
+        self._det_curves_file = "det_curves_" + config_file_name + "_" + scores_file_name + results_extension
+        self._operating_points_file = "operating_points_" + config_file_name + "_" + scores_file_name + results_extension
+        self._speaker_results_file = "speaker_results_" + config_file_name + "_" + scores_file_name + results_extension
+        self._worst_speakers_file = "worst_speakers_" + config_file_name + "_" + scores_file_name + results_extension
+        self._subgroup_diagnostics_file = "subgroup_diagnostics_" + config_file_name + "_" + scores_file_name + results_extension
+        self._run_profile_file = "run_profile_" + config_file_name + "_" + scores_file_name + results_extension
+        self._normalized_results_file = "normalized_results_" + config_file_name + "_" + scores_file_name + results_extension
+        self._worst_subgroups_file = "worst_subgroups_" + config_file_name + "_" + scores_file_name + results_extension
+        self._speaker_influence_file = "speaker_influence_" + config_file_name + "_" + scores_file_name + results_extension
 
-            :param scores_input: DataFrame that contains reference and test utterances and corresponding labels and scores
+    def _load_scores(self, scores, data_cache):
+        """ Load the scores input with :py:func:`dataio.load_data`
+
+            :param scores: Either path to csv or txt file or a Pandas DataFrame
+            :type scores: str or DataFrame
+            :param data_cache: optional dictionary of files that have already been read
+            :type data_cache: dict
+
+            If ``scores_chunksize`` is set in the config file, the scores file is parsed in chunks in a background thread while speaker ids are extracted from the chunks that have already been parsed.
+
+            :returns: scores_input
+            :rtype: DataFrame
+
+        """
+
+        chunksize = self.config.get("scores_chunksize")
+        if not isinstance(scores, str) or chunksize is None:
+            return load_data(scores, data_cache)
+
+        # speaker ids of each chunk are extracted while the next chunk is parsed
+        scores_chunks = []
+        ref_ids_chunks = []
+        for chunk in load_data_chunks(scores, chunksize):
+            scores_chunks.append(chunk)
+            if self.config.get("reference_filepath_column") in chunk.columns:
+                ref_ids_chunks.append(get_speaker_ids(chunk[self.config["reference_filepath_column"]].astype(str),
+                                                      self.id_delimiter, id_pattern=self.id_pattern, id_field=self.id_field))
+        scores_input = pd.concat(scores_chunks, ignore_index=True)
+        if len(ref_ids_chunks) > 0:
+            self._ref_ids = pd.concat(ref_ids_chunks, ignore_index=True).values
+
+        return scores_input
+
+    def _load_speaker_metadata(self, data_cache):
+        """ Load the speaker metadata file with :py:func:`dataio.load_data`. If ``metadata_index_dir`` is set in the config file and contains a metadata index that was built
+        from the same speaker metadata file content and config, the cleaned speaker metadata is reconstructed from the index instead of parsing the file.
+
+            :param data_cache: optional dictionary of files that have already been read
+            :type data_cache: dict
+
+            :returns: speaker_metadata_input
+            :rtype: DataFrame
+
+        """
+
+        metadata_file = self.config['speaker_metadata_file']
+        index_dir = self.config.get("metadata_index_dir")
+        if index_dir is None:
+            return load_data(metadata_file, data_cache)
+
+        # the index file name depends on the config attributes the index is built from, its content is validated with the metadata content hash
+        config_key = json.dumps([self.config.get("id_column"), self.config.get("select_columns"), self.config.get("speaker_groups")] +
+                                ([self.config["attribute_bins"]] if self.config.get("attribute_bins") is not None else []), sort_keys=True)
+        self._metadata_index_file = os.path.join(os.path.expanduser(index_dir), "metadata_index_" + Path(metadata_file).stem + "_" +
+                                                 hashlib.sha256(config_key.encode()).hexdigest()[:16] + ".npz")
+        self._metadata_hash = hash_file(metadata_file)
+        self.metadata_index = load_metadata_index(self._metadata_index_file, self._metadata_hash)
+        if self.metadata_index is None:
+            return load_data(metadata_file, data_cache)
+
+        speaker_metadata_input = pd.DataFrame({self.config["id_column"]: self.metadata_index["ids"]})
+        for attribute, attribute_index in self.metadata_index["attributes"].items():
+            speaker_metadata_input[attribute] = attribute_index["values"][attribute_index["codes"]]
+
+        return speaker_metadata_input
+
+    def _hash_scores(self, scores, scores_input):
+        """ Content hash of the scores input, used in the keys of the result cache.
+
+            :param scores: Either path to csv or txt file or a Pandas DataFrame
+            :type scores: str or DataFrame
+            :param scores_input: scores as loaded by :py:meth:`_load_scores`
             :type scores_input: DataFrame
-            :param speaker_metadata_input: DataFrame that contains speaker metadata with speaker ids and speaker groups attributes as specified in config file
-            :type speaker_metadata_input: DataFrame
+
+            :returns: scores_hash
+            :rtype: str
 
         """
 
-        # check config file
-        try:
-            self.config["id_column"]
-        except KeyError:
-            print("Error: id_column not specified in config file")
-            sys.exit(1)
+        if isinstance(scores, str):
+            return hash_file(scores)
 
-        try:
-            self.config["select_columns"]
-        except KeyError:
-            print("Error: select_columns not specified in config file")
-            sys.exit(1)
+        return hashlib.sha256(pd.util.hash_pandas_object(scores_input).values.tobytes() + str(list(scores_input.columns)).encode()).hexdigest()
 
-        try:
-            self.config["speaker_groups"]
-        except KeyError:
-            print("Error: speaker_groups not specified in config file")
-            sys.exit(1)
+    def _compute_trial_weights(self):
+        """ Computes the trial weights of ``trial_weights`` as set in the config file with :py:func:`groups.get_inverse_frequency_weights` and multiplies them with the
+        weights of the ``weights_column``. The subgroups of ``weights_speaker_group`` (default is the first speaker group) or the speakers are rebalanced by the speaker
+        of the reference utterance. The weights are stored in the weight column of self.scores.
 
-        if not isinstance(self.config["select_columns"], list):
-            raise ValueError("Select Columns in config file must be a list")
+        """
 
-        if not all(isinstance(el, list) for el in self.config["speaker_groups"]):
-            raise ValueError("Speaker Groups in config file must be a list of lists")
+        method = self.config.get("trial_weights")
+        if method is None:
+            return
 
-        speaker_group_list = [speaker_group for group_sublist in self.config["speaker_groups"] for speaker_group in group_sublist]
-        speaker_group_list = np.unique(speaker_group_list)
-        for speaker_group in speaker_group_list:
-            try:
-                self.config["select_columns"].index(speaker_group)
-            except ValueError:
-                print("Error: " + speaker_group + " not found in select_columns as specified in config file")
-                sys.exit(1)
+        if "ref_id" not in self.scores.columns:
+            self.scores["ref_id"] = get_speaker_ids(self.scores["ref"], self.id_delimiter, id_pattern=self.id_pattern, id_field=self.id_field)
+        speaker_codes = get_speaker_codes(self.scores["ref_id"], self.metadata_index)
+        if method == "inverse_speaker_frequency":
+            trial_codes = speaker_codes
+        else:
+            attributes = list(dict.fromkeys(self.config.get("weights_speaker_group", self.config["speaker_groups"][0])))
+            # subgroup code of every speaker from the codes of its attribute values
+            _, speaker_subgroup_codes = np.unique(np.stack([self.metadata_index["attributes"][attribute]["codes"] for attribute in attributes], axis=1), axis=0,
+                                                  return_inverse=True)
+            # append -1 so that the code -1 of unknown speakers gathers -1
+            trial_codes = np.append(speaker_subgroup_codes.reshape(-1), -1)[speaker_codes]
+
+        weights = get_inverse_frequency_weights(self.scores["label"].values, trial_codes)
+        if "weight" in self.scores.columns:
+            weights *= self.scores["weight"].values
+        self.scores["weight"] = weights
+
+        return
 
-        # check if dcf costs PTarget is between 0 and 1
-        for dcf_costs in self.config["dcf_costs"]:
-            if (dcf_costs[0] <= 0.0) | (dcf_costs[0] >= 1.0):
-                raise Exception("PTarget in DCF Costs needs to be between 0 and 1")
+    def _evaluate_scores(self, scores, labels, cache_key, threshold_values=None, weights=None):
+        """ Evaluates scores with :py:func:`evaluate.evaluate_scores`. The DET curve is loaded from the result cache if ``cache_dir`` is set in the config file and the
+        cache key is in the cache, computed DET curves are saved to the cache. With the histogram execution strategy the DET curve is approximated with
+        :py:func:`evaluate.compute_det_curve_histogram`.
+
+            :param scores: Array of scores
+            :type scores: ndarray
+            :param labels: Array of labels
+            :type labels: ndarray
+            :param cache_key: cache key as returned by :py:func:`cache.get_cache_key`, None if the result cache is not used
+            :type cache_key: str
+            :param threshold_values: Series of average metric thresholds for the evaluation of a subgroup, None for the average evaluation
+            :type threshold_values: pandas.Series
+            :param weights: Optional array of trial weights
+            :type weights: ndarray
+
+            :returns: fprs, fnrs, thresholds, metric_scores, (metric_thresholds)
+            :rtype: ndarray, ndarray, ndarray, list, (list)
 
-        # check scores_input
-        try:
-            list(scores_input.columns).index(self.config["reference_filepath_column"])
-        except ValueError:
-            print("Error: reference filepath column '" + self.config["reference_filepath_column"] + "' as specified in config file not found in scores file")
-            sys.exit(1)
+        """
 
-        try:
-            list(scores_input.columns).index(self.config["test_filepath_column"])
-        except ValueError:
-            print("Error: test filepath column '" + self.config["test_filepath_column"] + "' as specified in config file not found in scores file")
-            sys.exit(1)
+        det_curve = None
+        if self.execution_plan is not None and self.execution_plan["strategy"] == "histogram":
+            # approximate DET curves are not cached
+            det_curve = compute_det_curve_histogram(scores, labels, self.execution_plan["histogram_bins"], weights=weights)
+            cache_key = None
+        elif cache_key is not None:
+            det_curve = load_cached_det_curve(self._cache_dir, cache_key)
 
-        try:
-            list(scores_input.columns).index(self.config["label_column"])
-        except ValueError:
-            print("Error: label column '" + self.config["label_column"] + "' as specified in config file not found in scores file")
-            sys.exit(1)
+        evaluation = evaluate_scores(scores, labels, self.config['dcf_costs'], threshold_values=threshold_values, det_curve=det_curve, weights=weights)
+        if det_curve is None and cache_key is not None:
+            targets = int(np.count_nonzero(np.asarray(labels) == 1))
+            save_cached_det_curve(self._cache_dir, cache_key, evaluation[0], evaluation[1], evaluation[2], targets, len(labels) - targets)
 
-        try:
-            list(scores_input.columns).index(self.config["scores_column"])
-        except ValueError:
-            print("Error: scores column '" + self.config["scores_column"] + "' as specified in config file not found in scores file")
-            sys.exit(1)
+        return evaluation
 
-        # check metadata_input
-        try:
-            list(speaker_metadata_input.columns).index(self.config["id_column"])
-        except ValueError:
-            print("Error: id column '" + self.config["id_column"] + "' as specified in config file not found in metadata file")
-            sys.exit(1)
+    def _evict_cache(self):
+        """ Evicts the least recently used entries of the result cache if it exceeds ``cache_max_bytes`` as set in the config file, default is 1 GB.
+
+        """
+
+        if self._cache_dir is not None:
+            evict_cache(self._cache_dir, self.config.get("cache_max_bytes", 10 ** 9))
+
+        return
+
+    def _get_scores_file_name(self, scores):
+        """ Name of the scores input used in results file names. If a scores dataframe was provided instead of a scores filename the name is the date and time of the evaluation.
+
+            :param scores: Either path to csv or txt file or a Pandas DataFrame
+            :type scores: str or DataFrame
+
+            :returns: scores_file_name
+            :rtype: str
+
+        """
+
+        if isinstance(scores, str):
+            scores_file_name = Path(scores).stem
+        elif isinstance(scores, pd.DataFrame) or is_array_input(scores):
+            date = datetime.now()
+            scores_file_name = date.strftime("%d_%m_%Y_%H_%M_%S")
+        else:
+            # TODO: error handling
+            scores_file_name = None
+
+        return scores_file_name
+
+    def _check_input(self, scores_input, speaker_metadata_input):
+        """ Check that requirements for performing evaluation are fulfilled e.g. parameters of scores, speaker metadata and config are specified correctly
+
+            :param scores_input: DataFrame that contains reference and test utterances and corresponding labels and scores
+            :type scores_input: DataFrame
+            :param speaker_metadata_input: DataFrame that contains speaker metadata with speaker ids and speaker groups attributes as specified in config file
+            :type speaker_metadata_input: DataFrame
+
+            All problems are collected and raised together as :py:class:`validation.InputValidationError`.
+
+        """
 
-        for select_column in self.config["select_columns"]:
+        problems = validate_config(self.config)
+        if len(problems) == 0:
+            # filepath columns are not needed if speaker ids are given
+            scores_attributes = None
+            if self._ref_ids is not None or "ref_id" in scores_input.columns:
+                scores_attributes = ["label_column", "scores_column"]
+                if self.config.get("score_normalization") is not None:
+                    scores_attributes += ["reference_filepath_column", "test_filepath_column"]
+            problems += validate_columns(scores_input, speaker_metadata_input, self.config, scores_attributes)
+            if self.config.get("attribute_bins") is not None and isinstance(self.config["select_columns"], list):
+                # the speaker metadata reconstructed from a metadata index is already binned
+                problems += validate_attribute_bins(self.config["attribute_bins"], self.config["select_columns"],
+                                                    speaker_metadata_input if self.metadata_index is None else None)
+
+        if self.config.get("memory_limit") is not None:
             try:
-                list(speaker_metadata_input.columns).index(select_column)
-            except ValueError:
-                print("Error: '" + select_column + "' in select_columns as specified in config file not found in metadata file")
-                sys.exit(1)
+                parse_memory_limit(self.config["memory_limit"])
+            except ValueError as error:
+                problems.append({"source": "config", "check": "memory_limit", "count": 1, "message": str(error)})
+
+        if not isinstance(self.config.get("min_trials", 0), int) or self.config.get("min_trials", 0) < 0:
+            problems.append({"source": "config", "check": "min_trials", "count": 1, "message": "min_trials in config file must be a non-negative integer"})
+
+        if self.config.get("score_normalization") is not None:
+            if self.config["score_normalization"] not in NORMALIZATIONS:
+                problems.append({"source": "config", "check": "score_normalization", "count": 1,
+                                 "message": "score_normalization in config file must be one of " + ", ".join(NORMALIZATIONS)})
+            if "cohort_scores_file" not in self.config:
+                problems.append({"source": "config", "check": "score_normalization", "count": 1, "message": "cohort_scores_file not specified in config file"})
+            elif str(self.config["cohort_scores_file"]).lower().endswith(".npy") and "cohort_utterances_file" not in self.config:
+                problems.append({"source": "config", "check": "score_normalization", "count": 1,
+                                 "message": "cohort_utterances_file not specified in config file for a npy cohort_scores_file"})
+
+        if self.config.get("trial_weights") is not None:
+            if self.config["trial_weights"] not in ["inverse_subgroup_frequency", "inverse_speaker_frequency"]:
+                problems.append({"source": "config", "check": "trial_weights", "count": 1,
+                                 "message": "trial_weights in config file must be inverse_subgroup_frequency or inverse_speaker_frequency"})
+            weights_speaker_group = self.config.get("weights_speaker_group", [])
+            if not isinstance(weights_speaker_group, list):
+                problems.append({"source": "config", "check": "trial_weights", "count": 1, "message": "weights_speaker_group in config file must be a list"})
+            elif isinstance(self.config.get("select_columns"), list):
+                for attribute in sorted(set(weights_speaker_group) - set(self.config["select_columns"])):
+                    problems.append({"source": "config", "check": "trial_weights", "count": 1,
+                                     "message": str(attribute) + " in weights_speaker_group not found in select_columns as specified in config file"})
+
+        sample_size = self.config.get("validation_sample_size")
+        if sample_size is not None and (not isinstance(sample_size, int) or sample_size <= 0):
+            problems.append({"source": "config", "check": "validation_sample_size", "count": 1,
+                             "message": "validation_sample_size in config file must be a positive integer"})
+
+        if len(problems) > 0:
+            raise InputValidationError(problems)
 
         return
 
-    def run_tests(self):
+    def _validate_scores(self):
+        """ Check the values of the trials with :py:func:`validation.validate_scores`. If ``validation_sample_size`` is set in the config file, only a random sample of
+        the trials is checked. Otherwise the speaker ids of the reference utterances are kept in the scores, so that they are not extracted again when scores are
+        split into speaker groups.
+
+        """
+
+        sample_size = self.config.get("validation_sample_size")
+        if sample_size is not None and sample_size < len(self.scores):
+            speaker_ids = None
+        elif "ref_id" in self.scores.columns:
+            speaker_ids = self.scores["ref_id"].values
+        else:
+            self.scores["ref_id"] = get_speaker_ids(self.scores["ref"], self.id_delimiter, id_pattern=self.id_pattern, id_field=self.id_field)
+            speaker_ids = self.scores["ref_id"].values
+
+        problems, warnings = validate_scores(self.scores["label"].values, self.scores["score"].values, speaker_ids, self.speaker_metadata["id"].values,
+                                             sample_size=sample_size, weights=self.scores["weight"].values if "weight" in self.scores.columns else None)
+        for warning in warnings:
+            print("Warning: " + warning["message"])
+        if len(problems) > 0:
+            raise InputValidationError(problems)
+
+    def run_tests(self, wait=True):
         """ Main method of the SpeakerBiasTest class which performs bias evaluation and tests.
         This function calls :py:func:`evaluate.evaluate_scores` from :py:mod:`evaluate.py` for the overall dataset.
         Later subgroups are constructed using :py:func:`groups.split_scores_by_speaker_groups` from :py:mod:`groups.py`.
         These subgroup scores are again evaluated using :py:func:`evaluate.evaluate_scores`.
         Lastly metric ratios are computed calling :py:func:`metrics.compute_metrics_ratios` from :py:mod:`metrics.py`.
 
+        :param wait: Wait until the results files that are written in the background have been written, errors of the writes are raised. If set to False, e.g. by
+            :py:func:`batch.run_scores_jobs`, :py:meth:`wait_for_results` has to be called. Default is set to True.
+        :type wait: bool
+
         :returns: biastest_results_file to the results directory as specified in config.yaml, the name of the file contains the config filename and the scores filename. If a scores dataframe was provided instead of a scores filename the results file contains the date and time of the evaluation
-        :rtype: csv_file
+        :rtype: csv_file or parquet_file
 
         """
 
         print("Running bias test on scores")
 
+        # the execution strategy applies to the average metrics and to the metrics of each group
+        if self.scores_by_speaker_groups is None and self.config.get("memory_limit") is not None:
+            self._plan_execution()
+
         # Calculate average metrics
-        fprs, fnrs, thresholds, metric_scores, metric_thresholds = evaluate_scores(self.scores['score'], self.scores['label'], self.config['dcf_costs'])
+        self._evaluate_average(self.scores['score'], self.scores['label'], self.scores.get('weight'))
+
+        # Calculate metrics for each group, the split can be shared between bias tests with the same speaker groups
+        if self.scores_by_speaker_groups is None:
+            self.scores_by_speaker_groups, self.subgroup_trial_counts = split_scores_by_speaker_groups(self.scores, self.speaker_metadata, self.config['speaker_groups'],
+                                                                                                       id_delimiter=self.id_delimiter, metadata_index=self.metadata_index,
+                                                                                                       id_pattern=self.id_pattern, id_field=self.id_field, return_counts=True)
+        self._evaluate_speaker_groups(calibration=self.config.get("calibration_metrics", False))
+        if self.config.get("calibration_metrics", False):
+            self._evaluate_calibration(self.scores['score'], self.scores['label'])
+
+        self._write_results()
+        if self.config.get("score_normalization") is not None:
+            self._evaluate_normalized_scores()
+
+        self._evict_cache()
+
+        if self.config.get("export_det_curves", False):
+            self.export_det_curves()
+
+        # calculate a bias test score: function in metrics which takes output of compute_metrics_ratios
+
+        print("Bias test finished. Results saved to " + self.config["results_dir"]+self._biastest_results_file)
+
+        if self.config.get("speaker_metrics", False):
+            self.run_speaker_tests()
+        if self.config.get("subgroup_discovery", False):
+            self.run_subgroup_discovery()
+        if self.config.get("speaker_influence", False):
+            self.run_influence_analysis()
+
+        if wait:
+            self.wait_for_results()
+
+        return
+
+    def _plan_execution(self):
+        """ Selects the execution strategy with :py:func:`planner.plan_execution` so that the estimated peak memory of the bias test stays under ``memory_limit`` as set in
+        the config file. With the streaming, memmap and histogram strategies the scores are split one speaker group at a time, with the memmap strategy the split records
+        are spilled to memory-mapped files in ``spill_dir`` (default is results_dir). The histogram strategy approximates the metrics and is only selected if
+        ``histogram_fallback: True`` is set in the config file. The plan is stored in self.execution_plan and written to the run profile file.
+
+        """
+
+        num_trials = len(self.scores)
+        # the memory of the string columns is estimated from a sample of the trials
+        sample = self.scores.head(1000)
+        trials_bytes = self.scores.memory_usage(index=True, deep=False).sum()
+        if len(sample) > 0:
+            trials_bytes += (sample.memory_usage(index=False, deep=True).sum() - sample.memory_usage(index=False, deep=False).sum()) * num_trials / len(sample)
+        if "ref_id" not in self.scores.columns:
+            # speaker ids are extracted before the split
+            trials_bytes += trials_bytes / len(self.scores.columns)
+        num_subgroups = sum(len(group_index["subgroups"]) for group_index in self.metadata_index["speaker_groups"].values())
+
+        self.execution_plan = plan_execution(num_trials, trials_bytes, len(self.config["speaker_groups"]), num_subgroups, self.config["memory_limit"],
+                                             histogram_bins=self.config.get("histogram_bins", 1000), allow_histogram=self.config.get("histogram_fallback", False))
+        if self.execution_plan["strategy"] != "in_memory":
+            spill_dir = self.config.get("spill_dir", self.config["results_dir"]) if self.execution_plan["strategy"] == "memmap" else None
+            self.scores_by_speaker_groups = _SpeakerGroupSplits(self, spill_dir=spill_dir)
+            # the subgroups are classified from their trial counts before any speaker group is split
+            self.subgroup_trial_counts = count_trials_by_speaker_groups(self.scores, self.speaker_metadata, self.config['speaker_groups'], id_delimiter=self.id_delimiter,
+                                                                        metadata_index=self.metadata_index, id_pattern=self.id_pattern, id_field=self.id_field)
+
+        self.run_profile = pd.DataFrame({"stage": list(self.execution_plan["stages"].keys()) + ["peak"],
+                                         "estimated_bytes": list(self.execution_plan["stages"].values()) + [self.execution_plan["estimated_peak"]]})
+        self.run_profile.insert(0, "strategy", self.execution_plan["strategy"])
+        self.run_profile["memory_limit"] = self.execution_plan["memory_limit"]
+        self._write(self.run_profile, self._run_profile_file)
+
+        print("Execution plan: " + self.execution_plan["strategy"] + " with an estimated peak of " + str(self.execution_plan["estimated_peak"] // 10 ** 6) +
+              " MB (memory_limit " + str(self.execution_plan["memory_limit"] // 10 ** 6) + " MB)")
+        if not self.execution_plan["fits"]:
+            print("Warning: no execution strategy fits into memory_limit, the strategy with the lowest estimated peak is used")
+
+        return
+
+    def _evaluate_average(self, scores, labels, weights=None):
+        """ Evaluates the scores of the overall dataset and stores the average metrics and metric thresholds.
+
+            :param scores: Series of scores
+            :type scores: pandas.Series
+            :param labels: Series of labels
+            :type labels: pandas.Series
+            :param weights: Optional Series of trial weights
+            :type weights: pandas.Series
+
+        """
+
+        cache_key = get_cache_key(self._scores_cache_key, "average") if self._cache_dir is not None else None
+        fprs, fnrs, thresholds, metric_scores, metric_thresholds = self._evaluate_scores(scores, labels, cache_key, weights=weights)
         self.error_rates_by_speaker_group.update({"average": pd.DataFrame({'FPRS': fprs, 'FNRS': fnrs, 'Thresholds': thresholds})})
         # add string to prepare for SpeakerGroup row
         self.metrics['thresholds'] = ["thresholds"] + metric_thresholds
@@ -246,21 +679,40 @@ class SpeakerBiasTest(BiasTest):
 
         # for metrics first row is EER, after that follow order of self.config.dcf_costs
 
-        # Calculate metrics for each group
-        self.scores_by_speaker_groups = split_scores_by_speaker_groups(self.scores, self.speaker_metadata, self.config['speaker_groups'], id_delimiter=self.id_delimiter)
+        return
+
+    def _evaluate_speaker_groups(self, calibration=False):
+        """ Evaluates the scores of every subgroup in self.scores_by_speaker_groups at the average metric thresholds. Subgroups without trials, with only one class of
+        trials or with fewer than ``min_trials`` trials are not evaluated and obtain NaN metrics, the reason is recorded in self.subgroup_diagnostics. Every speaker group
+        is accessed once, so that speaker groups that are split when they are accessed are only split once.
+
+            :param calibration: Set to True to also evaluate the calibration metrics of the subgroups with :py:meth:`_evaluate_group_calibration`, which are completed
+                with the metrics of the overall dataset by :py:meth:`_evaluate_calibration`. Default is set to False.
+            :type calibration: bool
+
+        """
+
+        # degenerate subgroups are classified from their trial counts and skipped without evaluating their scores
+        if self.subgroup_trial_counts is None:
+            self.subgroup_trial_counts = count_subgroup_trials(self.scores_by_speaker_groups)
+        self.subgroup_diagnostics = get_subgroup_diagnostics(self.subgroup_trial_counts, self.config.get("min_trials", 0))
+        subgroup_status = dict(zip(zip(self.subgroup_diagnostics["speaker_groups"], self.subgroup_diagnostics["group_name"]), self.subgroup_diagnostics["status"]))
+
+        calibration_columns = []
         for group in self.scores_by_speaker_groups:
-            for subgroup in self.scores_by_speaker_groups[group]:
-                label_score_list = self.scores_by_speaker_groups[group][subgroup]
-                labels, scores = zip(*label_score_list)
-                if all(np.isnan(labels)) or all(np.isnan(scores)):
+            scores_by_subgroups = self.scores_by_speaker_groups[group]
+            for subgroup in scores_by_subgroups:
+                if subgroup_status[(group, subgroup)] != "ok":
                     fprs = []
                     fnrs = []
                     thresholds = []
-                    metric_scores = np.empty((len(self.config["dcf_costs"]) + 1))
-                    metric_scores[:] = np.nan
-                    metric_scores = metric_scores.tolist()
+                    metric_scores = [np.nan] * (len(self.config["dcf_costs"]) + 1)
                 else:
-                    fprs, fnrs, thresholds, metric_scores = evaluate_scores(scores, labels, self.config['dcf_costs'], threshold_values=self.metrics['thresholds'])
+                    label_score_list = scores_by_subgroups[subgroup]
+                    cache_key = get_cache_key(self._groups_cache_key, group, subgroup) if self._cache_dir is not None else None
+                    weights = label_score_list["weight"] if "weight" in label_score_list.dtype.names else None
+                    fprs, fnrs, thresholds, metric_scores = self._evaluate_scores(label_score_list["score"], label_score_list["label"], cache_key,
+                                                                                  threshold_values=self.metrics['thresholds'], weights=weights)
 
                 # if group in keys add to existing DataFrame otherwise create new key
                 if group in self.error_rates_by_speaker_group.keys():
@@ -272,21 +724,444 @@ class SpeakerBiasTest(BiasTest):
                 #self.metrics[subgroup] = [group] + metric_scores -> use concat to avoid performance issues
                 self.metrics = pd.concat([self.metrics, pd.Series([group] + metric_scores).rename(subgroup)], axis=1)
 
+            if calibration:
+                calibration_columns += self._evaluate_group_calibration(group, scores_by_subgroups, subgroup_status)
 
-        # format metrics and metrics ratios
-        metrics_ratios = compute_metrics_ratios(self.metrics).T
+        if calibration:
+            self.calibration_metrics = pd.concat(calibration_columns, axis=1) if len(calibration_columns) > 0 else pd.DataFrame()
+
+        return
+
+    def _evaluate_group_calibration(self, group, scores_by_subgroups, subgroup_status):
+        """ Evaluates the log-likelihood ratio cost (Cllr) and the actual detection cost function (actDCF) of every subgroup of a speaker group in one batch with
+        :py:func:`metrics.compute_calibration_metrics`. Scores are interpreted as calibrated log-likelihood ratios and the actDCF is computed at the Bayes threshold of
+        each dcf cost. Subgroups that are not evaluated according to subgroup_status obtain NaN.
+
+            :param group: name of the speaker group
+            :type group: str
+            :param scores_by_subgroups: records of every subgroup of the speaker group, score counts have a trials field
+            :type scores_by_subgroups: dict
+            :param subgroup_status: status of every (speaker group, subgroup) as in self.subgroup_diagnostics
+            :type subgroup_status: dict
+
+            :returns: calibration_columns with one Series per subgroup in the layout of self.calibration_metrics
+            :rtype: list
+
+        """
+
+        # the scores of all subgroups are stored in one contiguous array with one segment each
+        segments = [scores_by_subgroups[subgroup] if subgroup_status[(group, subgroup)] == "ok" else None for subgroup in scores_by_subgroups]
+        evaluated_segments = [segment for segment in segments if segment is not None]
+        if len(evaluated_segments) == 0:
+            cllrs = np.full(len(segments), np.nan)
+            act_dcfs = np.full((len(segments), len(self.config["dcf_costs"])), np.nan)
+        else:
+            record_columns = ["label", "score", "trials"] if "trials" in evaluated_segments[0].dtype.names else ["label", "score"]
+            segment_bounds = np.cumsum([0] + [0 if segment is None else len(segment) for segment in segments])
+            labels = np.concatenate([segment["label"] for segment in evaluated_segments])
+            scores = np.concatenate([segment["score"] for segment in evaluated_segments])
+            trials = np.concatenate([segment["trials"] for segment in evaluated_segments]) if "trials" in record_columns else None
+            cllrs, act_dcfs = compute_calibration_metrics(labels, scores, segment_bounds, self.config["dcf_costs"], trials=trials)
+
+        # first row is the speaker group, then Cllr, after that follow actDCF in order of self.config.dcf_costs
+        calibration_columns = [pd.Series([group, cllrs[index]] + list(act_dcfs[index])).rename(subgroup) for index, subgroup in enumerate(scores_by_subgroups)]
+
+        return calibration_columns
+
+    def _evaluate_calibration(self, scores, labels, trials=None):
+        """ Evaluates the log-likelihood ratio cost (Cllr) and the actual detection cost function (actDCF) of the overall dataset and adds them in front of the
+        calibration metrics of the subgroups, which are evaluated by :py:meth:`_evaluate_speaker_groups` with calibration set. This method is called by
+        :py:meth:`run_tests` if ``calibration_metrics: True`` is set in the config file.
+
+            :param scores: Series of scores of the overall dataset
+            :type scores: pandas.Series
+            :param labels: Series of labels of the overall dataset
+            :type labels: pandas.Series
+            :param trials: Optional array with the number of trials of every score if the overall dataset and the subgroups are given as score counts
+            :type trials: ndarray
+
+        """
+
+        cllrs, act_dcfs = compute_calibration_metrics(np.asarray(labels), np.asarray(scores), [0, len(scores)], self.config["dcf_costs"], trials=trials)
+
+        # same layout as self.metrics: first row is the speaker group, then Cllr, after that follow actDCF in order of self.config.dcf_costs
+        average_metrics = pd.DataFrame({"thresholds": ["thresholds", np.nan] + list(get_bayes_thresholds(self.config["dcf_costs"])),
+                                        "average": ["average", cllrs[0]] + list(act_dcfs[0])})
+        self.calibration_metrics = pd.concat([average_metrics, self.calibration_metrics], axis=1)
+
+        return
+
+    def _format_metrics(self, metrics):
+        """ Formats metrics and metrics ratios with one row per group name.
+
+            :param metrics: metrics in the layout of self.metrics
+            :type metrics: DataFrame
+
+            :returns: output
+            :rtype: DataFrame
+
+        """
+
+        metrics_ratios = compute_metrics_ratios(metrics).T
         metrics_ratios.columns = ["speaker_groups", "EER ratio"] + ["DCF ratio " + str(cost) for cost in self.config["dcf_costs"]]
 
-        metrics_out = self.metrics.T
+        metrics_out = metrics.T
         metrics_out.columns = ["speaker_groups", "EER"] + ["DCF " + str(cost) for cost in self.config["dcf_costs"]]
         output = metrics_out.rename_axis('group_name').reset_index().merge(metrics_ratios.rename_axis('group_name').reset_index())
+        # the metric columns are transposed from columns that start with the speaker group
+        metric_columns = output.columns.drop(["group_name", "speaker_groups"])
+        output[metric_columns] = output[metric_columns].astype(np.float64)
+
+        return output
+
+    def _evaluate_normalized_scores(self):
+        """ Evaluates the overall dataset and every subgroup on scores normalised with :py:func:`normalization.normalize_scores`, using the method set as
+        ``score_normalization`` in the config file and the cohort score matrix in ``cohort_scores_file``. The metrics are stored in self.normalized_metrics and written next
+        to the metrics of the raw scores to the normalized results file. This method is called by :py:meth:`run_tests` if ``score_normalization`` is set in the config file.
+
+        """
+
+        method = self.config["score_normalization"]
+        utterances, cohort_scores = load_cohort_scores(self.config["cohort_scores_file"], self.config.get("cohort_utterances_file"))
+        normalized_scores = normalize_scores(self.scores["ref"].values, self.scores["test"].values, self.scores["score"].values, utterances, cohort_scores, method,
+                                             top_k=self.config.get("cohort_top_k", 300), block_size=self.config.get("cohort_block_size", 4096))
+        del cohort_scores
+
+        # the normalised scores are evaluated by a shallow copy of the bias test that shares the speaker metadata, metadata index and execution plan
+        normalized_test = copy.copy(self)
+        normalized_test.scores = self.scores.assign(score=normalized_scores)
+        normalized_test.metrics = pd.DataFrame()
+        normalized_test.error_rates_by_speaker_group = dict()
+        # normalisation only changes the scores, the trial counts of the subgroups are shared
+        normalized_test.scores_by_speaker_groups = None
+        normalized_test.subgroup_trial_counts = self.subgroup_trial_counts
+        if self._cache_dir is not None:
+            normalization_key = get_cache_key(method, hash_file(self.config["cohort_scores_file"]), self.config.get("cohort_top_k", 300) if method == "as-norm" else None)
+            if "cohort_utterances_file" in self.config:
+                normalization_key = get_cache_key(normalization_key, hash_file(self.config["cohort_utterances_file"]))
+            normalized_test._scores_cache_key = get_cache_key(self._scores_cache_key, normalization_key)
+            normalized_test._groups_cache_key = get_cache_key(self._groups_cache_key, normalization_key)
+
+        normalized_test._evaluate_average(normalized_test.scores['score'], normalized_test.scores['label'], normalized_test.scores.get('weight'))
+        if self.execution_plan is not None and self.execution_plan["strategy"] != "in_memory":
+            spill_dir = self.config.get("spill_dir", self.config["results_dir"]) if self.execution_plan["strategy"] == "memmap" else None
+            normalized_test.scores_by_speaker_groups = _SpeakerGroupSplits(normalized_test, spill_dir=spill_dir)
+        else:
+            normalized_test.scores_by_speaker_groups = split_scores_by_speaker_groups(normalized_test.scores, self.speaker_metadata, self.config['speaker_groups'],
+                                                                                      id_delimiter=self.id_delimiter, metadata_index=self.metadata_index,
+                                                                                      id_pattern=self.id_pattern, id_field=self.id_field)
+        normalized_test._evaluate_speaker_groups()
+
+        self.normalized_metrics = normalized_test.metrics
+        self.normalized_error_rates_by_speaker_group = normalized_test.error_rates_by_speaker_group
+
+        # metrics of raw and normalised scores side by side, the columns of normalised scores are suffixed with the normalization method
+        raw_output = self._format_metrics(self.metrics)
+        normalized_output = self._format_metrics(self.normalized_metrics)
+        metric_columns = [column for column in raw_output.columns if column not in ["group_name", "speaker_groups"]]
+        output = raw_output.merge(normalized_output, on=["group_name", "speaker_groups"], how="left", suffixes=("", " " + method))
+        output = output[["group_name", "speaker_groups"] + [column for metric_column in metric_columns for column in [metric_column, metric_column + " " + method]]]
+        self._write(output, self._normalized_results_file)
+
+        return
+
+    def _write_results(self):
+        """ Formats metrics and metrics ratios and writes them to the biastest results file.
+
+        """
+
+        output = self._format_metrics(self.metrics)
+
+        # append calibration metrics and calibration metrics ratios if calibration_metrics is set in config file
+        if self.config.get("calibration_metrics", False):
+            calibration_ratios = compute_metrics_ratios(self.calibration_metrics).T
+            calibration_ratios.columns = ["speaker_groups", "Cllr ratio"] + ["actDCF ratio " + str(cost) for cost in self.config["dcf_costs"]]
+            calibration_out = self.calibration_metrics.T
+            calibration_out.columns = ["speaker_groups", "Cllr"] + ["actDCF " + str(cost) for cost in self.config["dcf_costs"]]
+            calibration_out = calibration_out.rename_axis('group_name').reset_index().merge(calibration_ratios.rename_axis('group_name').reset_index())
+            calibration_columns = calibration_out.columns.drop(["group_name", "speaker_groups"])
+            calibration_out[calibration_columns] = calibration_out[calibration_columns].astype(np.float64)
+            output = output.merge(calibration_out, on=["group_name", "speaker_groups"], how="left")
 
         # write metrics and metrics ratios to biastest results file
-        write_data(output, os.path.join(self.config["results_dir"], self._biastest_results_file))
+        self._write(output, self._biastest_results_file)
+        self._write(self.subgroup_diagnostics, self._subgroup_diagnostics_file)
 
-        # calculate a bias test score: function in metrics which takes output of compute_metrics_ratios
+        return
 
-        print("Bias test finished. Results saved to " + self.config["results_dir"]+self._biastest_results_file)
+    def export_det_curves(self):
+        """ Writes the DET curves of the average and of all subgroups in self.error_rates_by_speaker_group to the det curves file, with one block of rows per subgroup.
+        This method is called by :py:meth:`run_tests` if ``export_det_curves: True`` is set in the config file.
+        With ``output_format: parquet`` every subgroup is stored in its own row group, so that a single curve can be read with :py:func:`dataio.load_det_curve` without scanning the file.
+
+        :returns: det_curves_file to the results directory as specified in config.yaml
+        :rtype: csv_file or parquet_file
+
+        """
+
+        det_curves = []
+        for group, error_rates in self.error_rates_by_speaker_group.items():
+            error_rates = error_rates.rename(columns={"Subgroup": "group_name"})
+            if group == "average":
+                error_rates.insert(0, "group_name", "average")
+            error_rates.insert(0, "speaker_groups", group)
+            det_curves.append(error_rates[["speaker_groups", "group_name", "FPRS", "FNRS", "Thresholds"]])
+        self.det_curves = pd.concat(det_curves, ignore_index=True)
+
+        # the error rates of long DET curves are stored as float32, thresholds keep the precision of the scores
+        self._write(self.det_curves, self._det_curves_file, row_groups_by=["speaker_groups", "group_name"], float32_columns=["FPRS", "FNRS"])
+
+        return
+
+    def run_speaker_tests(self, top_k=None):
+        """ Evaluates the False Positive Rate and False Negative Rate of every speaker in the speaker metadata at the
+        average EER and minimum DCF thresholds computed by :py:meth:`run_tests`, and ranks the worst performing speakers
+        within every subgroup by their detection cost at the threshold of the first dcf_costs entry. Trials are attributed
+        to the speaker of the reference utterance. Speaker error rates are computed with
+        :py:func:`metrics.compute_speaker_error_rates` and the ranking uses :py:func:`metrics.get_worst_speakers`.
+
+        This method is called by :py:meth:`run_tests` if ``speaker_metrics: True`` is set in the config file.
+
+        :param top_k: Number of worst speakers to keep per subgroup. If not specified, ``speaker_top_k`` from the config file is used (default is 10)
+        :type top_k: int
+
+        :returns: speaker_results_file and worst_speakers_file to the results directory as specified in config.yaml
+        :rtype: csv_file or parquet_file
+
+        """
+
+        if "average" not in self.error_rates_by_speaker_group:
+            self.run_tests()
+
+        if top_k is None:
+            top_k = self.config.get("speaker_top_k", 10)
+
+        print("Running speaker tests on scores")
+
+        if "ref_id" not in self.scores.columns:
+            self.scores["ref_id"] = get_speaker_ids(self.scores["ref"], self.id_delimiter, id_pattern=self.id_pattern, id_field=self.id_field)
+
+        speaker_metadata = self.speaker_metadata.drop_duplicates("id").reset_index(drop=True)
+        speaker_codes = get_speaker_codes(self.scores["ref_id"], self.metadata_index)
+        # trials of speakers that are not in the speaker metadata are ignored
+        in_metadata = speaker_codes >= 0
+
+        threshold_names = ["EER"] + ["DCF " + str(cost) for cost in self.config["dcf_costs"]]
+        threshold_values = list(self.metrics["thresholds"][1:])
+        target_counts, nontarget_counts, fprs, fnrs = compute_speaker_error_rates(speaker_codes[in_metadata],
+                                                                                  self.scores["label"].values[in_metadata],
+                                                                                  self.scores["score"].values[in_metadata],
+                                                                                  threshold_values, len(speaker_metadata))
+
+        speaker_results = speaker_metadata.copy()
+        speaker_results["targets"] = target_counts.astype(int)
+        speaker_results["nontargets"] = nontarget_counts.astype(int)
+        for index, threshold_name in enumerate(threshold_names):
+            speaker_results["FPR at " + threshold_name + " threshold"] = fprs[:, index]
+            speaker_results["FNR at " + threshold_name + " threshold"] = fnrs[:, index]
+        for index, cost in enumerate(self.config["dcf_costs"]):
+            speaker_results["DCF " + str(cost)] = fprs[:, index + 1] * cost[1] * (1 - cost[0]) + \
+                                                  fnrs[:, index + 1] * cost[2] * cost[0]
+        self.speaker_results = speaker_results
+
+        # rank the worst speakers per subgroup
+        speaker_costs = speaker_results["DCF " + str(self.config["dcf_costs"][0])].values
+        worst_speakers = []
+        for group_name, group_index in self.metadata_index["speaker_groups"].items():
+            for subgroup_code, speaker_index in pd.Series(group_index["codes"]).groupby(group_index["codes"]).indices.items():
+                subgroup = group_index["subgroups"][subgroup_code]
+                worst_speaker_index = get_worst_speakers(speaker_costs, speaker_index, top_k)
+                subgroup_worst_speakers = speaker_results.iloc[worst_speaker_index]
+                subgroup_worst_speakers.insert(0, "rank", np.arange(1, len(worst_speaker_index) + 1))
+                subgroup_worst_speakers.insert(0, "group_name", subgroup)
+                subgroup_worst_speakers.insert(0, "speaker_groups", group_name)
+                worst_speakers.append(subgroup_worst_speakers)
+        self.worst_speakers = pd.concat(worst_speakers, ignore_index=True)
+
+        self._write(self.speaker_results, self._speaker_results_file)
+        self._write(self.worst_speakers, self._worst_speakers_file)
+
+        print("Speaker tests finished. Results saved to " + self.config["results_dir"] + self._speaker_results_file)
+
+        return
+
+    def run_subgroup_discovery(self, top_k=None):
+        """ Searches the combinations of all select_columns attributes for the subgroups with the highest EER or minimum DCF ratio with
+        :py:func:`discovery.discover_worst_subgroups`, so that intersectional subgroups do not need to be listed in speaker_groups. Subgroups with fewer than
+        ``min_trials`` trials and their subgroups are pruned, and only the subgroups of the ``discovery_beam_width`` (default is 10) worst subgroups of a depth are
+        evaluated. The subgroups are ranked by the ratio of ``discovery_rank_by`` (EER or minDCF, default is EER) as set in the config file, up to a depth of
+        ``discovery_max_depth`` attributes (default is all select_columns). Metrics are approximated on ``histogram_bins`` score thresholds (default is 1000).
+
+        This method is called by :py:meth:`run_tests` if ``subgroup_discovery: True`` is set in the config file.
+
+        :param top_k: Number of subgroups to keep. If not specified, ``discovery_top_k`` from the config file is used (default is 10)
+        :type top_k: int
+
+        :returns: worst_subgroups_file to the results directory as specified in config.yaml
+        :rtype: csv_file or parquet_file
+
+        """
+
+        if top_k is None:
+            top_k = self.config.get("discovery_top_k", 10)
+
+        print("Running subgroup discovery on scores")
+
+        if "ref_id" not in self.scores.columns:
+            self.scores["ref_id"] = get_speaker_ids(self.scores["ref"], self.id_delimiter, id_pattern=self.id_pattern, id_field=self.id_field)
+        speaker_codes = get_speaker_codes(self.scores["ref_id"], self.metadata_index)
+
+        self.worst_subgroups = discover_worst_subgroups(self.scores["score"].values, self.scores["label"].values, speaker_codes, self.metadata_index,
+                                                        self.config["dcf_costs"], min_trials=self.config.get("min_trials", 0),
+                                                        max_depth=self.config.get("discovery_max_depth"), beam_width=self.config.get("discovery_beam_width", 10),
+                                                        top_k=top_k, rank_by=self.config.get("discovery_rank_by", "EER"),
+                                                        bins=self.config.get("histogram_bins", 1000))
+        self._write(self.worst_subgroups, self._worst_subgroups_file)
+
+        print("Subgroup discovery finished. Results saved to " + self.config["results_dir"] + self._worst_subgroups_file)
+
+        return
+
+    def run_influence_analysis(self, top_k=None):
+        """ Computes the leave-one-speaker-out influence of every speaker on the EER and minimum DCF of each evaluated subgroup with
+        :py:func:`influence.compute_speaker_influence`, i.e. how much the metric of the subgroup changes if the trials of the speaker are removed. The trials are sorted
+        once and the counts of every speaker are subtracted from the counts of its subgroup, so that no subgroup is evaluated again per speaker. Trials are attributed to
+        the speaker of the reference utterance and trial weights are applied. Within every subgroup the speakers are ranked by their influence on ``influence_rank_by``
+        (EER or minDCF, default is EER) as set in the config file. DET curves are exact, or approximated on ``influence_bins`` score thresholds if it is set.
+
+        This method is called by :py:meth:`run_tests` if ``speaker_influence: True`` is set in the config file.
+
+        :param top_k: Number of speakers to keep per subgroup. If not specified, ``influence_top_k`` from the config file is used (default is 10)
+        :type top_k: int
+
+        :returns: speaker_influence_file to the results directory as specified in config.yaml
+        :rtype: csv_file or parquet_file
+
+        """
+
+        if "average" not in self.error_rates_by_speaker_group:
+            self.run_tests()
+
+        if top_k is None:
+            top_k = self.config.get("influence_top_k", 10)
+
+        print("Running speaker influence analysis on scores")
+
+        if "ref_id" not in self.scores.columns:
+            self.scores["ref_id"] = get_speaker_ids(self.scores["ref"], self.id_delimiter, id_pattern=self.id_pattern, id_field=self.id_field)
+
+        # one descending sort of all trials by score is shared by all subgroups, as in groups.split_scores_by_speaker_groups
+        score_order = np.argsort(self.scores["score"].values, kind="stable")[::-1]
+        speaker_codes = get_speaker_codes(self.scores["ref_id"], self.metadata_index)[score_order]
+        scores = self.scores["score"].values[score_order]
+        labels = self.scores["label"].values[score_order]
+        weights = self.scores["weight"].values[score_order] if "weight" in self.scores.columns else None
+        del score_order
+
+        subgroup_status = dict(zip(zip(self.subgroup_diagnostics["speaker_groups"], self.subgroup_diagnostics["group_name"]), self.subgroup_diagnostics["status"]))
+        speaker_influence = []
+        for group_name, group_index in self.metadata_index["speaker_groups"].items():
+            subgroup_codes = get_subgroup_codes(speaker_codes, self.metadata_index, group_name)
+            order = np.argsort(subgroup_codes, kind="stable")
+            subgroup_bounds = np.searchsorted(subgroup_codes[order], np.arange(len(group_index["subgroups"]) + 1))
+            for subgroup_code, subgroup in enumerate(group_index["subgroups"]):
+                if subgroup_status.get((group_name, subgroup)) != "ok":
+                    continue
+                # trials of a subgroup keep their descending order of scores
+                trials = order[subgroup_bounds[subgroup_code]:subgroup_bounds[subgroup_code + 1]]
+                speakers, speaker_trials, metrics, metrics_without = compute_speaker_influence(scores[trials], labels[trials], speaker_codes[trials],
+                                                                                               self.config["dcf_costs"],
+                                                                                               weights=None if weights is None else weights[trials],
+                                                                                               bins=self.config.get("influence_bins"))
+                subgroup_influence = rank_speaker_influence(speakers, speaker_trials, metrics, metrics_without, self.config["dcf_costs"], top_k=top_k,
+                                                            rank_by=self.config.get("influence_rank_by", "EER"))
+                subgroup_influence.insert(1, "id", self.metadata_index["ids"][subgroup_influence.pop("speaker_code").values])
+                subgroup_influence.insert(0, "group_name", subgroup)
+                subgroup_influence.insert(0, "speaker_groups", group_name)
+                speaker_influence.append(subgroup_influence)
+        self.speaker_influence = pd.concat(speaker_influence, ignore_index=True) if len(speaker_influence) > 0 else pd.DataFrame()
+
+        self._write(self.speaker_influence, self._speaker_influence_file)
+
+        print("Speaker influence analysis finished. Results saved to " + self.config["results_dir"] + self._speaker_influence_file)
+
+        return
+
+    def run_operating_point_analysis(self, thresholds=None, target_fprs=None, num_thresholds=None):
+        """ Evaluates the False Positive Rate, False Negative Rate and detection cost functions of the average and of
+        every subgroup at a grid of operating points, and their ratios to the average at the same operating point.
+        The DET curves computed by :py:meth:`run_tests` are reused, so that each subgroup requires one binary search
+        over its curve for the whole grid (see :py:func:`metrics.compute_operating_points`).
+
+        The grid is taken from the arguments or else from the optional ``operating_points`` section of the config file,
+        which can specify ``thresholds``, ``target_fprs`` or ``num_thresholds``. Target FPRs are translated into
+        thresholds on the average DET curve. By default, ``num_thresholds`` (1000) evenly spaced thresholds spanning
+        the average scores are used.
+
+        :param thresholds: Threshold values at which to evaluate the operating points
+        :type thresholds: list or ndarray
+        :param target_fprs: Average False Positive Rates at which to evaluate the operating points
+        :type target_fprs: list or ndarray
+        :param num_thresholds: Number of evenly spaced thresholds if neither thresholds nor target_fprs are given
+        :type num_thresholds: int
+
+        :returns: operating_points_file to the results directory as specified in config.yaml
+        :rtype: csv_file or parquet_file
+
+        """
+
+        if "average" not in self.error_rates_by_speaker_group:
+            self.run_tests()
+
+        operating_points_config = self.config.get("operating_points") or dict()
+        if thresholds is None and target_fprs is None:
+            thresholds = operating_points_config.get("thresholds")
+            target_fprs = operating_points_config.get("target_fprs")
+        if num_thresholds is None:
+            num_thresholds = operating_points_config.get("num_thresholds", 1000)
+
+        average_rates = self.error_rates_by_speaker_group["average"]
+        if thresholds is not None:
+            threshold_values = np.asarray(thresholds, dtype=np.float64)
+        elif target_fprs is not None:
+            threshold_values = get_thresholds_at_fprs(average_rates["FPRS"].values, average_rates["Thresholds"].values,
+                                                      target_fprs)
+        else:
+            finite_thresholds = average_rates["Thresholds"].values[np.isfinite(average_rates["Thresholds"].values)]
+            threshold_values = np.linspace(finite_thresholds.min(), finite_thresholds.max(), num_thresholds)
+
+        print("Running operating point analysis on " + str(len(threshold_values)) + " thresholds")
+
+        group_names = ["average"]
+        subgroup_names = ["average"]
+        operating_points = [compute_operating_points(average_rates["FPRS"].values, average_rates["FNRS"].values,
+                                                     average_rates["Thresholds"].values, threshold_values,
+                                                     self.config["dcf_costs"])]
+        for group in self.scores_by_speaker_groups:
+            error_rates_by_subgroup = dict(tuple(self.error_rates_by_speaker_group[group].groupby("Subgroup", sort=False)))
+            for subgroup in self.scores_by_speaker_groups[group]:
+                if subgroup in error_rates_by_subgroup:
+                    error_rates = error_rates_by_subgroup[subgroup]
+                    fprs, fnrs, subgroup_thresholds = error_rates["FPRS"].values, error_rates["FNRS"].values, error_rates["Thresholds"].values
+                else:
+                    # no scores available for subgroup
+                    fprs, fnrs, subgroup_thresholds = [], [], []
+                group_names.append(group)
+                subgroup_names.append(subgroup)
+                operating_points.append(compute_operating_points(fprs, fnrs, subgroup_thresholds, threshold_values,
+                                                                 self.config["dcf_costs"]))
+
+        # assemble a long table with one block of rows per subgroup
+        output = pd.DataFrame({"speaker_groups": np.repeat(group_names, len(threshold_values)),
+                               "group_name": np.repeat(subgroup_names, len(threshold_values)),
+                               "threshold": np.tile(threshold_values, len(operating_points))})
+        for column in operating_points[0]:
+            output[column] = np.concatenate([points[column] for points in operating_points])
+        self.operating_points = compute_fpfn_ratio(output)
+
+        self._write(self.operating_points, self._operating_points_file, row_groups_by=["speaker_groups", "group_name"])
+
+        print("Operating point analysis finished. Results saved to " + self.config["results_dir"] + self._operating_points_file)
 
         return
 
@@ -296,3 +1171,443 @@ class SpeakerBiasTest(BiasTest):
         evaluate_scores_by_speaker_groups(self.scores_by_speaker_groups, self._dataset_eval_log_file)
 
         return
+
+
+class _SpeakerGroupSplits(Mapping):
+
+    """ Scores by speaker groups with the interface of the dictionary returned by :py:func:`groups.split_scores_by_speaker_groups`, but split one speaker group at a time
+    when the speaker group is accessed. Without spill_dir only the last accessed speaker group is kept in memory. With spill_dir every speaker group is split once and
+    its records are spilled to a memory-mapped file in a temporary directory in spill_dir, which is removed together with this object.
+
+    :param test: bias test whose scores are split
+    :type test: SpeakerBiasTest
+    :param spill_dir: Optional directory for memory-mapped files
+    :type spill_dir: str
+
+    """
+
+    # number of trials whose records are gathered and written to a memory-mapped file at a time
+    chunk_size = 2 ** 20
+
+    def __init__(self, test, spill_dir=None):
+
+        self._test = test
+        self._speaker_groups = {"_".join(dict.fromkeys(group)): group for group in test.config["speaker_groups"]}
+        self._splits = dict()
+        self._spill_dir = None
+        if spill_dir is not None:
+            os.makedirs(os.path.expanduser(spill_dir), exist_ok=True)
+            self._spill_dir = tempfile.mkdtemp(prefix="bt4vt_spill_", dir=os.path.expanduser(spill_dir))
+            weakref.finalize(self, shutil.rmtree, self._spill_dir, True)
+
+    def __getitem__(self, group_name):
+
+        if group_name not in self._splits:
+            if self._spill_dir is None:
+                test = self._test
+                split = split_scores_by_speaker_groups(test.scores, test.speaker_metadata, [self._speaker_groups[group_name]], id_delimiter=test.id_delimiter,
+                                                       metadata_index=test.metadata_index, id_pattern=test.id_pattern, id_field=test.id_field)[group_name]
+                self._splits.clear()
+            else:
+                split = self._spill_speaker_group(group_name)
+            self._splits[group_name] = split
+
+        return self._splits[group_name]
+
+    def _spill_speaker_group(self, group_name):
+        """ Split of a speaker group whose records are written to a memory-mapped file in chunks of chunk_size trials, so that only the sort indices of the trials are
+        held in memory. The records of all subgroups are stored in one file, subgroups are views of consecutive slices.
+
+        """
+
+        test = self._test
+        if "ref_id" not in test.scores.columns:
+            test.scores["ref_id"] = get_speaker_ids(test.scores["ref"], test.id_delimiter, id_pattern=test.id_pattern, id_field=test.id_field)
+        subgroups, score_order, order, subgroup_bounds = sort_trials_by_subgroups(test.scores, self._speaker_groups[group_name], test.metadata_index)
+
+        # trial weights are kept in the records of every subgroup, as in groups.split_scores_by_speaker_groups
+        record_columns = ["label", "score", "weight"] if "weight" in test.scores.columns else ["label", "score"]
+        columns = [test.scores[column].values for column in record_columns]
+        dtype = np.dtype([(column, values.dtype) for column, values in zip(record_columns, columns)])
+        start, end = subgroup_bounds[0], subgroup_bounds[-1]
+        if end > start:
+            record_chunks = (np.rec.fromarrays([values[trial_index] for values in columns], dtype=dtype)
+                             for trial_index in (score_order[order[chunk_start:min(chunk_start + self.chunk_size, end)]]
+                                                 for chunk_start in range(start, end, self.chunk_size)))
+            spilled_records = spill_records(record_chunks, os.path.join(self._spill_dir, str(len(self._splits)) + ".npy"), dtype, end - start)
+
+        split = dict()
+        for subgroup_code, subgroup in enumerate(subgroups):
+            subgroup_start, subgroup_end = subgroup_bounds[subgroup_code], subgroup_bounds[subgroup_code + 1]
+            if subgroup_start == subgroup_end:
+                split[subgroup] = [(np.nan, np.nan)]
+            else:
+                split[subgroup] = spilled_records[subgroup_start - start:subgroup_end - start]
+
+        return split
+
+    def __iter__(self):
+
+        return iter(self._speaker_groups)
+
+    def __len__(self):
+
+        return len(self._speaker_groups)
+
+
+class ShardedSpeakerBiasTest(SpeakerBiasTest):
+    """ Speaker bias test for scores that are split into several shard files, e.g. because they do not fit into the
+    memory of a single machine. Every shard is reduced to score counts per subgroup on a worker with
+    :py:func:`distributed.reduce_scores_shard`, and the counts are summed on the coordinator with
+    :py:func:`distributed.merge_shard_statistics`. The DET curves are computed from the merged counts, so that the
+    results are identical to running :py:class:`SpeakerBiasTest` on the concatenated scores. The results file is named
+    after the first shard.
+
+    Analyses that need the individual trials, i.e. the config options ``score_normalization``, ``memory_limit``,
+    ``speaker_metrics``, ``subgroup_discovery`` and ``speaker_influence`` and the methods :py:meth:`run_speaker_tests`,
+    :py:meth:`run_subgroup_discovery`, :py:meth:`run_influence_analysis` and :py:meth:`run_operating_point_analysis`,
+    are not supported for score shards.
+
+        :param score_shards: paths to csv or txt files that contain shards of the scores, all with the same columns
+        :type score_shards: list
+        :param config_file: path to yaml config file
+        :type config_file: str
+
+    """
+
+    # config options of analyses that need the individual trials
+    unsupported_options = ["score_normalization", "memory_limit", "speaker_metrics", "subgroup_discovery", "speaker_influence"]
+
+    def __init__(self, score_shards, config_file):
+        """Constructor method
+        """
+        self.score_shards = list(score_shards)
+        self.config_file = config_file
+        super().__init__(self.score_shards, config_file)
+
+    def _load_scores(self, score_shards, data_cache):
+        """ Load the first rows of the first shard to check the scores columns. The shards are only read by the workers.
+
+        """
+
+        return pd.read_csv(score_shards[0], sep=None, engine="python", nrows=10)
+
+    def _hash_scores(self, score_shards, scores_input):
+        """ Content hash of all score shards, used in the keys of the result cache.
+
+        """
+
+        return get_cache_key([hash_file(scores_shard) for scores_shard in score_shards])
+
+    def _check_input(self, scores_input, speaker_metadata_input):
+        """ Check the input as :py:meth:`SpeakerBiasTest._check_input` and reject the config options of analyses that are not supported for score shards, so that a
+        config file does not give other results files with score shards than without.
+
+        """
+
+        problems = [{"source": "config", "check": "sharded", "count": 1, "message": option + " in config file is not supported for score shards"}
+                    for option in self.unsupported_options if self.config.get(option) not in [None, False]]
+        try:
+            super()._check_input(scores_input, speaker_metadata_input)
+        except InputValidationError as error:
+            problems = error.problems + problems
+        if len(problems) > 0:
+            raise InputValidationError(problems)
+
+        return
+
+    def _validate_scores(self):
+        """ The values of the trials are checked by the workers, which construct a :py:class:`SpeakerBiasTest` for every shard.
+
+        """
+
+        return
+
+    def _compute_trial_weights(self):
+        """ Trial weights of the ``weights_column`` are read by the workers. Weights from subgroup or speaker frequencies would only count the trials of a single shard,
+        ``trial_weights`` is therefore not supported.
+
+        """
+
+        if self.config.get("trial_weights") is not None:
+            raise ValueError("trial_weights is not supported for score shards, per-trial weights can be set with weights_column")
+
+        return
+
+    def _get_scores_file_name(self, score_shards):
+        """ Name of the first shard used in results file names.
+
+        """
+
+        return Path(score_shards[0]).stem
+
+    def run_tests(self, executor=None):
+        """ Runs the bias tests on the score shards. Shards are reduced in parallel with the map method of the executor,
+        which can be any :py:class:`concurrent.futures.Executor`, e.g. a ProcessPoolExecutor or the executor of a
+        dask.distributed Client (``client.get_executor()``). If no executor is given, the shards are reduced one after
+        the other in the current process.
+
+        :param executor: executor that reduces the shards
+        :type executor: concurrent.futures.Executor
+
+        :returns: biastest_results_file to the results directory as specified in config.yaml
+        :rtype: csv_file or parquet_file
+
+        """
+
+        from .distributed import reduce_scores_shard, merge_shard_statistics
+
+        print("Running bias test on " + str(len(self.score_shards)) + " score shards")
+
+        map_function = map if executor is None else executor.map
+        # the statistics of every shard are merged as soon as they arrive
+        shard_statistics = map_function(reduce_scores_shard, self.score_shards, [self.config_file] * len(self.score_shards))
+        average_score_counts, self.scores_by_speaker_groups = merge_shard_statistics(shard_statistics)
+        self.subgroup_trial_counts = count_subgroup_trials(self.scores_by_speaker_groups)
+
+        # the weights of the score counts are their weighted number of trials, the DET curves are weighted cumulative sums of the counts
+        self._evaluate_average(average_score_counts["score"], average_score_counts["label"], average_score_counts["weight"])
+        self._evaluate_speaker_groups(calibration=self.config.get("calibration_metrics", False))
+        if self.config.get("calibration_metrics", False):
+            self._evaluate_calibration(average_score_counts["score"], average_score_counts["label"], trials=average_score_counts["trials"])
+
+        self._evict_cache()
+
+        self._write_results()
+        if self.config.get("export_det_curves", False):
+            self.export_det_curves()
+        self.wait_for_results()
+
+        print("Bias test finished. Results saved to " + self.config["results_dir"]+self._biastest_results_file)
+
+        return
+
+    def run_speaker_tests(self, top_k=None):
+        """ Speaker metrics need the trials of every speaker, which are only read by the workers.
+
+        """
+
+        raise ValueError("run_speaker_tests is not supported for score shards")
+
+    def run_subgroup_discovery(self, top_k=None):
+        """ Subgroup discovery needs the trials of every speaker, which are only read by the workers.
+
+        """
+
+        raise ValueError("run_subgroup_discovery is not supported for score shards")
+
+    def run_influence_analysis(self, top_k=None):
+        """ The influence analysis needs the trials of every speaker, which are only read by the workers.
+
+        """
+
+        raise ValueError("run_influence_analysis is not supported for score shards")
+
+    def run_operating_point_analysis(self, thresholds=None, target_fprs=None, num_thresholds=None):
+        """ The operating point analysis needs the trials of every subgroup, which are only read by the workers.
+
+        """
+
+        raise ValueError("run_operating_point_analysis is not supported for score shards")
+
+
+class SpeakerBiasMonitor(BiasTest):
+    """ The SpeakerBiasMonitor class monitors bias over a stream of verification trials. Trials are counted per score bin in histograms of the finest subgroups of the
+    speaker groups, with one histogram per time bucket of ``monitor_cadence`` seconds (default is 3600) in a ring buffer that covers ``monitor_window`` seconds (default is
+    86400). Whenever a trial of a new time bucket arrives, the EER and minimum DCF of the overall window and of every subgroup are computed from the histograms of the
+    window with :py:func:`discovery.compute_cell_metrics` and appended to the monitor results file together with their ratios. The update cost per trial is constant and
+    the memory only depends on the number of subgroups, of ``histogram_bins`` (default is 1000) and of time buckets.
+
+    Scores are binned in ``histogram_bins`` equally spaced bins over ``monitor_score_range`` as set in the config file, scores outside the range are counted in the
+    first or last bin. The range is required, since the bins of a stream cannot be adjusted once trials are counted.
+
+    Monitor results are always csv files, since every window is appended to the results file; ``output_format: parquet`` is rejected. With ``background_writes: True``
+    the windows are appended in a background thread in the order in which they are evaluated, see :py:meth:`BiasTest.wait_for_results`.
+
+        :param config_file: path to yaml config file
+        :type config_file: str
+
+    """
+
+    def __init__(self, config_file):
+        """Constructor method
+        """
+        self.config = load_config(config_file)
+        self.id_delimiter = self.config.get("id_delimiter", "/")
+        self.id_pattern = self.config.get("id_pattern")
+        self.id_field = self.config.get("id_field", 0)
+
+        speaker_metadata_input = load_data(self.config["speaker_metadata_file"])
+        problems = validate_config(self.config)
+        if len(problems) == 0:
+            # trials are passed as records, so that only the columns of the speaker metadata are checked
+            scores_columns = [self.config[column] for column in ["reference_filepath_column", "test_filepath_column", "label_column", "scores_column"]]
+            problems += validate_columns(pd.DataFrame(columns=scores_columns), speaker_metadata_input, self.config)
+            if self.config.get("attribute_bins") is not None and isinstance(self.config["select_columns"], list):
+                problems += validate_attribute_bins(self.config["attribute_bins"], self.config["select_columns"], speaker_metadata_input)
+        if self.config.get("monitor_cadence", 3600) <= 0 or self.config.get("monitor_window", 86400) < self.config.get("monitor_cadence", 3600):
+            problems.append({"source": "config", "check": "monitor_window", "count": 1,
+                             "message": "monitor_cadence in config file must be positive and not longer than monitor_window"})
+        score_range = self.config.get("monitor_score_range")
+        if not isinstance(score_range, (list, tuple)) or len(score_range) != 2 or not all(isinstance(value, (int, float)) for value in score_range) or \
+                not score_range[0] < score_range[1]:
+            problems.append({"source": "config", "check": "monitor_score_range", "count": 1,
+                             "message": "monitor_score_range in config file must be a range [min, max] of the scores with min < max"})
+        if self.config.get("output_format", "csv") != "csv":
+            problems.append({"source": "config", "check": "output_format", "count": 1,
+                             "message": "output_format in config file must be csv for the bias monitor, since windows are appended to the monitor results file"})
+        if len(problems) > 0:
+            raise InputValidationError(problems)
+
+        speaker_metadata = speaker_metadata_input[[self.config["id_column"]] + self.config["select_columns"]].replace(' ', np.nan).dropna()
+        self.speaker_metadata = speaker_metadata.rename(columns={self.config["id_column"]: "id"}).astype({"id": "str"})
+        if self.config.get("attribute_bins") is not None:
+            self.speaker_metadata = bin_speaker_metadata(self.speaker_metadata, self.config["attribute_bins"])
+        self.metadata_index = build_metadata_index(self.speaker_metadata, self.config["select_columns"], self.config["speaker_groups"])
+
+        # trials are counted per finest subgroup, i.e. per combination of the values of all attributes, the subgroups of every speaker group are sums of finest subgroups
+        speaker_attribute_codes = np.stack([attribute_index["codes"] for attribute_index in self.metadata_index["attributes"].values()], axis=1)
+        _, first_speakers, self._speaker_cells = np.unique(speaker_attribute_codes, axis=0, return_index=True, return_inverse=True)
+        self._speaker_cells = self._speaker_cells.reshape(-1)
+        self._num_cells = len(first_speakers)
+        self._subgroup_maps = {group_name: group_index["codes"][first_speakers] for group_name, group_index in self.metadata_index["speaker_groups"].items()}
+
+        self._cadence = self.config.get("monitor_cadence", 3600)
+        self._num_buckets = int(np.ceil(self.config.get("monitor_window", 86400) / self._cadence))
+        self._bins = self.config.get("histogram_bins", 1000)
+        self._score_edges = np.linspace(self.config["monitor_score_range"][0], self.config["monitor_score_range"][1], self._bins)
+        # the last cell counts trials of speakers that are not in the speaker metadata, which are only used for the overall window
+        self._bucket_counts = np.zeros((self._num_buckets, self._num_cells + 1, self._bins, 2), dtype=np.int64)
+        self._window_counts = np.zeros((self._num_cells + 1, self._bins, 2), dtype=np.int64)
+        self._current_bucket = None
+        self._datetime_timestamps = False
+        self.latest_window = None
+
+        results_dir = self.config["results_dir"]
+        if not os.path.isdir(os.path.expanduser(results_dir)):
+            os.makedirs(os.path.expanduser(results_dir))
+        self._monitor_results_file = "monitor_results_" + Path(config_file).stem + ".csv"
+        self.background_writes = self.config.get("background_writes", False)
+        self._pending_writes = []
+
+    def update(self, records):
+        """ Adds a batch of trials to the histograms of their time buckets. The window is evaluated before the first trial of a new time bucket is added. Trials that are
+        older than the window are ignored.
+
+            :param records: iterable of (ref, test, label, score, timestamp) tuples; labels have to be either {-1,1} or {0,1}, timestamps are seconds or datetimes
+            :type records: iterable
+
+            :returns: windows evaluated during the update, see :py:meth:`evaluate_window`
+            :rtype: list
+
+        """
+
+        records = list(records)
+        if len(records) == 0:
+            return []
+        refs, _, labels, scores, timestamps = zip(*records)
+
+        timestamps = np.asarray(timestamps)
+        if timestamps.dtype.kind not in "iuf":
+            self._datetime_timestamps = True
+            timestamps = pd.to_datetime(timestamps).values.astype("datetime64[ns]").astype(np.int64) / 10 ** 9
+        buckets = np.floor(timestamps / self._cadence).astype(np.int64)
+
+        scores = np.asarray(scores, dtype=np.float64)
+        score_bins = np.clip(np.searchsorted(self._score_edges, scores, side="right") - 1, 0, self._bins - 1)
+        targets = (np.asarray(labels) == 1).astype(np.int64)
+
+        speaker_codes = get_speaker_codes(get_speaker_ids(pd.Series(refs).astype(str), self.id_delimiter, id_pattern=self.id_pattern, id_field=self.id_field),
+                                          self.metadata_index)
+        cells = np.full(len(records), self._num_cells, dtype=np.int64)
+        cells[speaker_codes >= 0] = self._speaker_cells[speaker_codes[speaker_codes >= 0]]
+
+        if self._current_bucket is None:
+            self._current_bucket = buckets.min()
+
+        windows = []
+        order = np.argsort(buckets, kind="stable")
+        bucket_values, bucket_starts = np.unique(buckets[order], return_index=True)
+        for bucket, trial_index in zip(bucket_values, np.split(order, bucket_starts[1:])):
+            if bucket > self._current_bucket:
+                windows.append(self.evaluate_window())
+                # time buckets that leave the window are subtracted from the window and cleared
+                for expired_bucket in range(max(self._current_bucket + 1, bucket - self._num_buckets + 1), bucket + 1):
+                    slot = expired_bucket % self._num_buckets
+                    self._window_counts -= self._bucket_counts[slot]
+                    self._bucket_counts[slot] = 0
+                self._current_bucket = bucket
+            elif bucket <= self._current_bucket - self._num_buckets:
+                continue
+
+            slot = bucket % self._num_buckets
+            np.add.at(self._bucket_counts[slot], (cells[trial_index], score_bins[trial_index], targets[trial_index]), 1)
+            np.add.at(self._window_counts, (cells[trial_index], score_bins[trial_index], targets[trial_index]), 1)
+
+        return windows
+
+    def evaluate_window(self):
+        """ Computes the EER and minimum DCF of the overall window and of every subgroup from the histograms of the current window, and their ratios to the overall
+        window. The metrics are stored in self.latest_window and appended to the monitor results file.
+
+            :returns: window_metrics with the columns window_start, window_end, speaker_groups, group_name, trials, metrics and metric ratios
+            :rtype: DataFrame
+
+        """
+
+        cell_counts = self._window_counts[:-1]
+        counts = [self._window_counts.sum(axis=0, keepdims=True)]
+        speaker_groups = ["average"]
+        group_names = ["average"]
+        for group_name, subgroup_map in self._subgroup_maps.items():
+            subgroups = self.metadata_index["speaker_groups"][group_name]["subgroups"]
+            group_counts = np.zeros((len(subgroups), self._bins, 2), dtype=np.int64)
+            np.add.at(group_counts, subgroup_map, cell_counts)
+            counts.append(group_counts)
+            speaker_groups += [group_name] * len(subgroups)
+            group_names += subgroups
+        counts = np.concatenate(counts)
+        metrics = compute_cell_metrics(counts, self.config["dcf_costs"])
+
+        window_end = (self._current_bucket + 1) * self._cadence
+        window_start = window_end - self._num_buckets * self._cadence
+        if self._datetime_timestamps:
+            window_start, window_end = pd.to_datetime(window_start, unit="s"), pd.to_datetime(window_end, unit="s")
+
+        metric_names = ["EER"] + ["DCF " + str(cost) for cost in self.config["dcf_costs"]]
+        window_metrics = pd.DataFrame({"window_start": window_start, "window_end": window_end, "speaker_groups": speaker_groups, "group_name": group_names,
+                                       "trials": counts.sum(axis=(1, 2))})
+        for index, metric_name in enumerate(metric_names):
+            window_metrics[metric_name] = metrics[:, index]
+        ratio_names = ["EER ratio"] + ["DCF ratio " + str(cost) for cost in self.config["dcf_costs"]]
+        for index, ratio_name in enumerate(ratio_names):
+            window_metrics[ratio_name] = metrics[:, index] / metrics[0, index]
+        self.latest_window = window_metrics
+
+        self._write(window_metrics, self._monitor_results_file, append=True)
+
+        return window_metrics
+
+    def run_tests(self, records, batch_size=10000):
+        """ Monitors a stream of trials in batches of batch_size trials with :py:meth:`update`, and evaluates the last window when the stream ends.
+
+            :param records: iterable of (ref, test, label, score, timestamp) tuples, e.g. a generator of trials
+            :type records: iterable
+            :param batch_size: number of trials per update
+            :type batch_size: int
+
+            :returns: monitor_results_file to the results directory as specified in config.yaml
+            :rtype: csv_file
+
+        """
+
+        records = iter(records)
+        for batch in iter(lambda: list(itertools.islice(records, batch_size)), []):
+            self.update(batch)
+        if self._current_bucket is not None:
+            self.evaluate_window()
+        self.wait_for_results()
+
+        print("Bias monitor finished. Results saved to " + self.config["results_dir"] + self._monitor_results_file)
+
+        return
@@ -4,36 +4,140 @@
 # Created on 01-05-2022
 # @author: wiebket, AnnaLesch
 
+import numpy as np
 import pandas as pd
-import yaml
+import csv
+import hashlib
 import os
 import sys
 import shutil
-import importlib_resources
+import threading
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from queue import Queue
 
+# single thread that writes results files in the background, so that writes are serialised
+_background_writer = None
 
-def load_data(data_in):
-    """Read a csv, txt file or a DataFrame into a DataFrame. If given a file it uses the Python parsing engine to automatically detect the separator.
 
-    :param data_in: Either path to csv or txt file or a Pandas DataFrame
-    :type data_in: str or DataFrame
+def _sniff_separator(file_name):
+    """Detect the separator of a csv or txt file from its first line, in the same way as the Python parsing engine of pandas.
+
+    :param file_name: path to csv or txt file
+    :type file_name: str
+
+    :returns: separator
+    :rtype: str
+
+    """
+
+    with open(os.path.expanduser(file_name), 'r', newline='') as file:
+        separator = csv.Sniffer().sniff(file.readline()).delimiter
+
+    return separator
+
+
+def _read_csv(file_name, **kwargs):
+    """Read a csv or txt file with the C parsing engine of pandas, which releases the GIL while parsing, so that files can be read in parallel threads.
+    The separator is detected automatically and floats are parsed with round trip precision.
+
+    :param file_name: path to csv or txt file
+    :type file_name: str
+
+    :returns: data
+    :rtype: DataFrame or TextFileReader
+
+    """
+
+    return pd.read_csv(os.path.expanduser(file_name), sep=_sniff_separator(file_name), engine="c",
+                       float_precision="round_trip", **kwargs)
+
+
+def is_array_input(data_in):
+    """Check if data is given as a mapping of column names to arrays or as an Arrow table instead of a file or a DataFrame.
+
+    :param data_in: data
+    :type data_in: object
+
+    :returns: array_input
+    :rtype: bool
+
+    """
+
+    return isinstance(data_in, Mapping) or (hasattr(data_in, "column_names") and hasattr(data_in, "to_pandas"))
+
+
+def load_data(data_in, data_cache=None):
+    """Read a csv, txt file, a DataFrame, a mapping of column names to arrays or an Arrow table into a DataFrame. If given a file the separator is detected automatically
+    from the first line. Arrays are wrapped without copying, as are numeric columns of Arrow tables without nulls.
+
+    :param data_in: Either path to csv or txt file, a Pandas DataFrame, a dictionary of NumPy arrays or a pyarrow Table
+    :type data_in: str or DataFrame or dict or pyarrow.Table
+    :param data_cache: Optional dictionary of files that have already been read, keyed by their absolute path. Files are only read if they are not in the cache and are added to it after reading. The cached DataFrames must not be modified.
+    :type data_cache: dict
 
     :returns: data
     :rtype: DataFrame
 
     """
 
-    if isinstance(data_in, str):
-        data = pd.read_csv(data_in, sep=None, engine="python")
+    if isinstance(data_in, str) and data_cache is not None:
+        cache_key = os.path.abspath(os.path.expanduser(data_in))
+        if cache_key not in data_cache:
+            data_cache[cache_key] = _read_csv(data_in)
+        data = data_cache[cache_key]
+    elif isinstance(data_in, str):
+        data = _read_csv(data_in)
     elif isinstance(data_in, pd.DataFrame):
         data = data_in
+    elif isinstance(data_in, Mapping):
+        data = pd.DataFrame({column: np.asarray(values) for column, values in data_in.items()}, copy=False)
+    elif is_array_input(data_in):
+        # split_blocks keeps every column in its own block, so that numeric columns are not consolidated into a copy
+        data = data_in.to_pandas(split_blocks=True)
     else:
-        data = None
-        # TODO: error handling
+        raise TypeError("Data must be a path to a csv or txt file, a DataFrame, a dictionary of arrays or a pyarrow Table")
 
     return data
 
 
+def load_data_chunks(file_name, chunksize, prefetch=2):
+    """Read a csv or txt file in chunks. Chunks are parsed in a background thread while the previous chunks are processed by the caller.
+
+    :param file_name: path to csv or txt file
+    :type file_name: str
+    :param chunksize: number of rows per chunk
+    :type chunksize: int
+    :param prefetch: maximum number of parsed chunks waiting to be processed. Default is 2.
+    :type prefetch: int
+
+    :returns: generator of chunks
+    :rtype: generator
+
+    """
+
+    chunks = Queue(maxsize=prefetch)
+
+    def parse_chunks():
+        try:
+            with _read_csv(file_name, chunksize=chunksize) as reader:
+                for chunk in reader:
+                    chunks.put(chunk)
+        except Exception as error:
+            chunks.put(error)
+        chunks.put(None)
+
+    threading.Thread(target=parse_chunks, daemon=True).start()
+
+    while True:
+        chunk = chunks.get()
+        if chunk is None:
+            break
+        if isinstance(chunk, Exception):
+            raise chunk
+        yield chunk
+
+
 def load_config(file_name):
     """Read a yaml config file into a dictionary.
 
@@ -44,6 +148,8 @@ def load_config(file_name):
     :rtype: dict
 
     """
+    import yaml
+
     if not file_name.lower().endswith("yaml"):
         raise Exception("Config File has to be a YAML file with .yaml extension")
 
@@ -66,13 +172,317 @@ def load_config(file_name):
     return config
 
 
-def write_data(data, file_name):
+def _to_arrow_table(data, float32_columns=None):
+    """Convert a DataFrame into a compact Arrow table. Object columns are dictionary encoded strings, numeric columns keep their dtype and only the float columns in
+    float32_columns, e.g. the error rates of DET curves, are stored as float32.
+
+    :param data: data to convert
+    :type data: DataFrame
+    :param float32_columns: float columns that are stored as float32
+    :type float32_columns: list
+
+    :returns: table
+    :rtype: pyarrow.Table
+
+    """
+
+    import pyarrow as pa
+
+    float32_columns = [] if float32_columns is None else float32_columns
+    arrays = []
+    for column in data.columns:
+        values = data[column]
+        if values.dtype == object:
+            arrays.append(pa.array(values.astype(str).where(values.notna()), type=pa.string()).dictionary_encode())
+            continue
+        if column in float32_columns and pd.api.types.is_float_dtype(values.dtype):
+            values = values.astype("float32")
+        arrays.append(pa.array(values.values))
+
+    table = pa.Table.from_arrays(arrays, names=[str(column) for column in data.columns])
+
+    return table
+
+
+def _write_parquet(data, file_name, row_groups_by=None, float32_columns=None):
+    """Write a DataFrame to a zstd compressed Parquet file. If row_groups_by is given, every block of consecutive rows with the same values in these columns is written as a separate row group,
+    so that readers can load a single block without scanning the file (see :py:func:`load_det_curve`).
+
+    :param data: data to write
+    :type data: DataFrame
+    :param file_name: path to the Parquet file
+    :type file_name: str
+    :param row_groups_by: columns that define the row groups
+    :type row_groups_by: list
+    :param float32_columns: float columns that are stored as float32, see :py:func:`_to_arrow_table`
+    :type float32_columns: list
+
+    """
+
+    import pyarrow.parquet as pq
+
+    table = _to_arrow_table(data, float32_columns)
+    if row_groups_by is None or len(data) == 0:
+        pq.write_table(table, file_name, compression="zstd")
+        return
+
+    keys = data[row_groups_by]
+    block_starts = np.flatnonzero((keys.values[1:] != keys.values[:-1]).any(axis=1)) + 1
+    block_starts = np.concatenate(([0], block_starts, [len(data)]))
+    with pq.ParquetWriter(file_name, table.schema, compression="zstd") as writer:
+        for start, end in zip(block_starts[:-1], block_starts[1:]):
+            writer.write_table(table.slice(start, end - start), row_group_size=end - start)
+
+    return
+
+
+def _append_csv(data, file_name):
+    """Append a DataFrame to a csv file, the header is only written if the file does not exist yet. The file is checked when the rows are written, so that appends
+    that are queued in the background thread write one header.
+
+    :param data: data to append
+    :type data: DataFrame
+    :param file_name: path to the csv file
+    :type file_name: str
+
+    """
+
+    data.to_csv(file_name, mode="a", header=not os.path.isfile(file_name), index=False, na_rep="NaN")
+
+    return
+
+
+def write_data(data, file_name, background=False, row_groups_by=None, float32_columns=None, append=False):
+    """Write a DataFrame to a csv file, or to a Parquet file if the file name ends with .parquet (requires pyarrow).
+
+    :param data: data to write
+    :type data: DataFrame
+    :param file_name: path to the csv or Parquet file
+    :type file_name: str
+    :param background: write the file in a background thread and return immediately. Default is set to False.
+    :type background: bool
+    :param row_groups_by: columns that define the row groups of a Parquet file, see :py:func:`_write_parquet`
+    :type row_groups_by: list
+    :param float32_columns: float columns that are stored as float32 in a Parquet file, see :py:func:`_to_arrow_table`
+    :type float32_columns: list
+    :param append: append the rows to an existing csv file instead of overwriting it. Parquet files cannot be appended to. Default is set to False.
+    :type append: bool
+
+    :returns: future of the background write, None otherwise
+    :rtype: concurrent.futures.Future
+
+    """
+
+    global _background_writer
+
+    if file_name.lower().endswith(".parquet"):
+        if append:
+            raise ValueError("Parquet files cannot be appended to, append requires a csv file")
+        write_function, args, kwargs = _write_parquet, (data, file_name), {"row_groups_by": row_groups_by, "float32_columns": float32_columns}
+    elif append:
+        write_function, args, kwargs = _append_csv, (data, file_name), {}
+    else:
+        write_function, args, kwargs = data.to_csv, (file_name,), {"index": False, "na_rep": "NaN"}
 
-    data.to_csv(file_name, index=False, na_rep="NaN")
+    if background:
+        if _background_writer is None:
+            _background_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bt4vt_writer")
+        return _background_writer.submit(write_function, *args, **kwargs)
+
+    write_function(*args, **kwargs)
 
     return
 
 
+def load_det_curve(file_name, speaker_group, subgroup):
+    """Read the DET curve of a single subgroup from a DET curves file written by :py:class:`core.SpeakerBiasTest`. From Parquet files only the row group of the subgroup is read.
+
+    :param file_name: path to the csv or Parquet DET curves file
+    :type file_name: str
+    :param speaker_group: speaker group, e.g. Gender_Nationality, or average
+    :type speaker_group: str
+    :param subgroup: subgroup, e.g. f_India, or average
+    :type subgroup: str
+
+    :returns: det_curve with columns FPRS, FNRS and Thresholds
+    :rtype: DataFrame
+
+    """
+
+    if file_name.lower().endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        det_curve = pq.read_table(os.path.expanduser(file_name), columns=["FPRS", "FNRS", "Thresholds"],
+                                  filters=[("speaker_groups", "==", speaker_group), ("group_name", "==", subgroup)]).to_pandas()
+    else:
+        det_curves = load_data(file_name)
+        det_curve = det_curves.loc[(det_curves["speaker_groups"] == speaker_group) & (det_curves["group_name"] == subgroup),
+                                   ["FPRS", "FNRS", "Thresholds"]].reset_index(drop=True)
+
+    return det_curve
+
+
+def hash_file(file_name):
+    """Compute the SHA-256 hash of the content of a file.
+
+    :param file_name: path to the file
+    :type file_name: str
+
+    :returns: content_hash
+    :rtype: str
+
+    """
+
+    content_hash = hashlib.sha256()
+    with open(os.path.expanduser(file_name), 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            content_hash.update(block)
+
+    return content_hash.hexdigest()
+
+
+def _to_numpy_values(values):
+    """Convert index values to an array that can be stored without pickling. Object arrays are stored as strings.
+
+    """
+
+    values = np.asarray(values)
+    if values.dtype == object:
+        values = values.astype(str)
+
+    return values
+
+
+def save_metadata_index(metadata_index, file_name, content_hash):
+    """Save a metadata index as returned by :py:func:`groups.build_metadata_index` to a npz file, together with the content hash of the speaker metadata file it was built from.
+
+    :param metadata_index: metadata index
+    :type metadata_index: dict
+    :param file_name: path to the npz file
+    :type file_name: str
+    :param content_hash: content hash of the speaker metadata file, see :py:func:`hash_file`
+    :type content_hash: str
+
+    """
+
+    arrays = {"content_hash": np.array(content_hash),
+              "ids": metadata_index["ids"],
+              "attribute_names": np.array(list(metadata_index["attributes"].keys()), dtype=str),
+              "group_names": np.array(list(metadata_index["speaker_groups"].keys()), dtype=str)}
+    for index, attribute_index in enumerate(metadata_index["attributes"].values()):
+        arrays["attribute_" + str(index) + "_values"] = _to_numpy_values(attribute_index["values"])
+        arrays["attribute_" + str(index) + "_codes"] = attribute_index["codes"]
+    for index, group_index in enumerate(metadata_index["speaker_groups"].values()):
+        arrays["group_" + str(index) + "_subgroups"] = np.array(group_index["subgroups"], dtype=str)
+        arrays["group_" + str(index) + "_codes"] = group_index["codes"]
+
+    file_name = os.path.expanduser(file_name)
+    os.makedirs(os.path.dirname(os.path.abspath(file_name)), exist_ok=True)
+    # write to a temporary file first, so that concurrent runs never read a partially written index
+    temporary_file_name = file_name + "." + str(os.getpid()) + ".tmp.npz"
+    np.savez(temporary_file_name, **arrays)
+    os.replace(temporary_file_name, file_name)
+
+    return
+
+
+def load_metadata_index(file_name, content_hash):
+    """Load a metadata index saved with :py:func:`save_metadata_index`.
+
+    :param file_name: path to the npz file
+    :type file_name: str
+    :param content_hash: content hash of the current speaker metadata file, see :py:func:`hash_file`
+    :type content_hash: str
+
+    :returns: metadata_index, None if the file does not exist or was built from a different speaker metadata file content
+    :rtype: dict
+
+    """
+
+    file_name = os.path.expanduser(file_name)
+    if not os.path.isfile(file_name):
+        return None
+
+    with np.load(file_name, allow_pickle=False) as arrays:
+        if str(arrays["content_hash"]) != content_hash:
+            return None
+
+        metadata_index = {"ids": arrays["ids"], "attributes": dict(), "speaker_groups": dict()}
+        for index, attribute in enumerate(arrays["attribute_names"]):
+            metadata_index["attributes"][str(attribute)] = {"values": arrays["attribute_" + str(index) + "_values"],
+                                                            "codes": arrays["attribute_" + str(index) + "_codes"]}
+        for index, group_name in enumerate(arrays["group_names"]):
+            metadata_index["speaker_groups"][str(group_name)] = {"subgroups": list(arrays["group_" + str(index) + "_subgroups"]),
+                                                                 "codes": arrays["group_" + str(index) + "_codes"]}
+
+    return metadata_index
+
+
+def spill_records(record_chunks, file_name, dtype, num_records):
+    """Write chunks of records one after the other to a memory-mapped npy file and return the memory-mapped record array, so that the records are never held in
+    memory at once and their pages can be evicted from memory by the operating system.
+
+    :param record_chunks: iterable of record arrays with num_records records in total
+    :type record_chunks: iterable
+    :param file_name: path to the npy file
+    :type file_name: str
+    :param dtype: dtype of the records
+    :type dtype: numpy.dtype
+    :param num_records: number of records
+    :type num_records: int
+
+    :returns: memory_mapped_records
+    :rtype: numpy.recarray
+
+    """
+
+    memory_mapped_records = np.lib.format.open_memmap(os.path.expanduser(file_name), mode="w+", dtype=dtype, shape=(num_records,))
+    start = 0
+    for records in record_chunks:
+        memory_mapped_records[start:start + len(records)] = records
+        start += len(records)
+    memory_mapped_records.flush()
+
+    return memory_mapped_records.view(np.recarray)
+
+
+def load_cohort_scores(file_name, utterances_file=None):
+    """Read a cohort score matrix for score normalisation. The file is either a npy file with the score matrix (one row per utterance and one column per cohort
+    utterance) and a txt file utterances_file with the filepath of the utterance of every row, one per line, or a npz file with the arrays ``utterances`` and
+    ``scores``, or a csv or txt file with the filepaths of the utterances in the first column and one column per cohort utterance. A npy score matrix is memory-mapped,
+    so that only the blocks of rows that are normalised are read from disk.
+
+    :param file_name: path to npy, npz, csv or txt file
+    :type file_name: str
+    :param utterances_file: path to txt file with the filepaths of the utterances of a npy score matrix
+    :type utterances_file: str
+
+    :returns: utterances, cohort_scores
+    :rtype: ndarray, ndarray
+
+    """
+
+    if file_name.lower().endswith(".npy"):
+        if utterances_file is None:
+            raise ValueError("The utterances of a npy cohort score matrix must be given in a cohort_utterances_file")
+        cohort_scores = np.load(os.path.expanduser(file_name), mmap_mode="r", allow_pickle=False)
+        with open(os.path.expanduser(utterances_file)) as file:
+            utterances = np.array(file.read().splitlines(), dtype=object).astype(str)
+    elif file_name.lower().endswith(".npz"):
+        with np.load(os.path.expanduser(file_name), allow_pickle=False) as arrays:
+            utterances = arrays["utterances"].astype(str)
+            cohort_scores = arrays["scores"]
+    else:
+        cohort_input = _read_csv(file_name)
+        utterances = cohort_input.iloc[:, 0].astype(str).values
+        cohort_scores = cohort_input.iloc[:, 1:].to_numpy(dtype=np.float64)
+
+    if cohort_scores.ndim != 2 or len(cohort_scores) != len(utterances):
+        raise ValueError("Cohort scores must have one row of scores per utterance")
+
+    return utterances, cohort_scores
+
+
 def copy_example(dest_path, example_name="voxceleb"):
     """ Copy the example to a specified directory
 
@@ -82,6 +492,8 @@ def copy_example(dest_path, example_name="voxceleb"):
 
     """
 
+    import importlib_resources
+
     if example_name == "voxceleb":
 
         ref = importlib_resources.files("bt4vt.data")
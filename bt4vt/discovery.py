@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Created on 19-10-2026
+# @author: wiebket, AnnaLesch
+
+import numpy as np
+import pandas as pd
+
+#########################################
+# Discovery of the worst performing intersectional subgroups. Trials are counted once per score threshold and per finest
+# cell, i.e. per combination of the values of all attributes. The counts are sufficient statistics of the approximate DET
+# curve of a cell, so that the DET curve of any coarser cell is the sum of the counts of its finest cells. The lattice of
+# attribute combinations is searched level by level: cells with fewer than min_trials trials are pruned, since their
+# children have even fewer trials, and only the children of the beam_width worst cells of a level are evaluated.
+#########################################
+
+
+def compute_threshold_counts(scores, labels, cells, num_cells, bins=1000):
+    """ Count of target and non-target trials of every cell at the highest of bins equally spaced score thresholds that accepts them, with the same thresholds as
+    :py:func:`evaluate.compute_det_curve_histogram`.
+
+    :param scores: Array of scores
+    :type scores: ndarray
+    :param labels: Array of labels; labels have to be either {-1,1} or {0,1}
+    :type labels: ndarray
+    :param cells: Array of the cell of every trial
+    :type cells: ndarray
+    :param num_cells: Number of cells
+    :type num_cells: int
+    :param bins: Number of score thresholds. Default is 1000.
+    :type bins: int
+
+    :returns: counts with shape (num_cells, thresholds, 2), the last axis counts non-targets and targets
+    :rtype: ndarray
+
+    """
+
+    scores = np.asarray(scores, dtype=np.float64)
+    thresholds = np.unique(np.linspace(scores.min(), scores.max(), bins))
+    threshold_index = np.searchsorted(thresholds, scores, side="right") - 1
+    keys = (np.asarray(cells, dtype=np.int64) * len(thresholds) + threshold_index) * 2 + (np.asarray(labels) == 1)
+    counts = np.bincount(keys, minlength=num_cells * len(thresholds) * 2)
+
+    return counts.reshape(num_cells, len(thresholds), 2)
+
+
+def compute_cell_metrics(counts, dcf_costs):
+    """ Equal Error Rate and minimum of the detection cost function of every cell from its threshold counts, computed for all cells at once. Cells with only one
+    class of trials obtain NaN.
+
+    :param counts: threshold counts as returned by :py:func:`compute_threshold_counts`
+    :type counts: ndarray
+    :param dcf_costs: List of dcf costs as specified in config file
+    :type dcf_costs: list
+
+    :returns: metrics with one row per cell and the EER followed by the minimum DCF of every dcf cost as columns
+    :rtype: ndarray
+
+    """
+
+    fps = counts[:, ::-1, 0].cumsum(axis=1)[:, ::-1]
+    tps = counts[:, ::-1, 1].cumsum(axis=1)[:, ::-1]
+    metrics = np.full((len(counts), len(dcf_costs) + 1), np.nan)
+    valid = (fps[:, 0] > 0) & (tps[:, 0] > 0)
+    if not valid.any():
+        return metrics
+
+    # the threshold at infinity rejects all trials
+    fprs = np.hstack([fps[valid] / fps[valid, :1], np.zeros((valid.sum(), 1))])
+    fnrs = np.hstack([1 - tps[valid] / tps[valid, :1], np.ones((valid.sum(), 1))])
+
+    rows = np.arange(len(fprs))
+    eer_index = np.argmin(np.absolute(fnrs - fprs), axis=1)
+    metrics[valid, 0] = np.maximum(fprs[rows, eer_index], fnrs[rows, eer_index]) * 100
+    for index, (p_target, c_fp, c_fn) in enumerate(dcf_costs):
+        metrics[valid, index + 1] = np.min(fnrs * c_fn * p_target + fprs * c_fp * (1 - p_target), axis=1)
+
+    return metrics
+
+
+def discover_worst_subgroups(scores, labels, speaker_codes, metadata_index, dcf_costs, min_trials=0, max_depth=None, beam_width=10, top_k=10, rank_by="EER",
+                             bins=1000):
+    """ Search of the lattice of attribute combinations of the speaker metadata for the subgroups with the highest metric ratio, i.e. the metric of the subgroup
+    divided by the metric of the overall dataset. Subgroups are cells of the lattice, e.g. Gender: f at depth 1 and Gender: f, Nationality: India at depth 2. A cell is
+    evaluated if it has at least min_trials trials and at least one of its parents is among the beam_width cells with the highest metric ratio of the previous depth.
+    Metrics are computed on the DET curve approximated on bins score thresholds (see :py:func:`evaluate.compute_det_curve_histogram`). Trials are attributed to the
+    speaker of the reference utterance, trials of speakers that are not in the speaker metadata are only used for the overall dataset.
+
+    :param scores: Array of scores
+    :type scores: ndarray
+    :param labels: Array of labels; labels have to be either {-1,1} or {0,1}
+    :type labels: ndarray
+    :param speaker_codes: Array of speaker codes of the trials as returned by :py:func:`groups.get_speaker_codes`
+    :type speaker_codes: ndarray
+    :param metadata_index: Index as returned by :py:func:`groups.build_metadata_index`, all its attributes are searched
+    :type metadata_index: dict
+    :param dcf_costs: List of dcf costs as specified in config file
+    :type dcf_costs: list
+    :param min_trials: Minimum number of trials of an evaluated cell. Default is 0.
+    :type min_trials: int
+    :param max_depth: Maximum number of attributes of a cell. Default is the number of attributes.
+    :type max_depth: int
+    :param beam_width: Number of cells per depth whose children are evaluated. Default is 10.
+    :type beam_width: int
+    :param top_k: Number of subgroups to return. Default is 10.
+    :type top_k: int
+    :param rank_by: EER or minDCF, the metric whose ratio ranks the subgroups. minDCF refers to the first dcf cost. Default is EER.
+    :type rank_by: str
+    :param bins: Number of score thresholds. Default is 1000.
+    :type bins: int
+
+    :returns: worst_subgroups with the columns speaker_groups, group_name, depth, trials, metrics and metric ratios, sorted by the metric ratio of rank_by
+    :rtype: DataFrame
+
+    """
+
+    if rank_by not in ["EER", "minDCF"]:
+        raise ValueError("rank_by must be EER or minDCF")
+    rank_column = 0 if rank_by == "EER" else 1
+    attributes = list(metadata_index["attributes"].keys())
+    if max_depth is None:
+        max_depth = len(attributes)
+
+    # finest cells are the combinations of attribute values that occur in the speaker metadata
+    speaker_attribute_codes = np.stack([metadata_index["attributes"][attribute]["codes"] for attribute in attributes], axis=1)
+    finest_codes, speaker_cells = np.unique(speaker_attribute_codes, axis=0, return_inverse=True)
+    speaker_cells = speaker_cells.reshape(-1)
+    speaker_codes = np.asarray(speaker_codes)
+    in_metadata = speaker_codes >= 0
+
+    # counts of the overall dataset are stored as an additional cell
+    trial_cells = np.full(len(speaker_codes), len(finest_codes), dtype=np.int64)
+    trial_cells[in_metadata] = speaker_cells[speaker_codes[in_metadata]]
+    counts = compute_threshold_counts(scores, labels, trial_cells, len(finest_codes) + 1, bins)
+    average_counts = counts.sum(axis=0, keepdims=True)
+    counts = counts[:-1]
+    cell_trials = counts.sum(axis=(1, 2))
+    average_metrics = compute_cell_metrics(average_counts, dcf_costs)[0]
+
+    results = []
+    # promising cells of the previous depth by attribute combination, as sets of value code tuples
+    promising = {(): {()}}
+    for depth in range(1, max_depth + 1):
+        candidates = dict()
+        for parent_attributes, parent_values in promising.items():
+            for attribute_index in range(len(attributes)):
+                if attribute_index not in parent_attributes:
+                    cell_attributes = tuple(sorted(parent_attributes + (attribute_index,)))
+                    candidates.setdefault(cell_attributes, []).append((parent_attributes, parent_values))
+
+        level = []
+        for cell_attributes, parents in candidates.items():
+            # finest cells whose projection on a parent attribute combination is a promising parent cell
+            expanded = np.zeros(len(finest_codes), dtype=bool)
+            for parent_attributes, parent_values in parents:
+                parent_codes = [tuple(codes) for codes in finest_codes[:, list(parent_attributes)]]
+                expanded |= np.fromiter((codes in parent_values for codes in parent_codes), dtype=bool, count=len(finest_codes))
+            expanded &= cell_trials > 0
+            if not expanded.any():
+                continue
+
+            cell_codes, cell_index = np.unique(finest_codes[expanded][:, list(cell_attributes)], axis=0, return_inverse=True)
+            cell_index = cell_index.reshape(-1)
+            trials = np.bincount(cell_index, weights=cell_trials[expanded], minlength=len(cell_codes))
+            # cells below min_trials are pruned together with all their children
+            kept = trials >= max(min_trials, 1)
+            if not kept.any():
+                continue
+
+            order = np.argsort(cell_index, kind="stable")
+            bounds = np.flatnonzero(np.diff(np.concatenate([[-1], cell_index[order]])))
+            cell_counts = np.add.reduceat(counts[expanded][order], bounds, axis=0)[kept]
+            metrics = compute_cell_metrics(cell_counts, dcf_costs)
+            for codes, cell_trial_count, cell_metrics in zip(cell_codes[kept], trials[kept], metrics):
+                level.append((cell_attributes, tuple(codes), int(cell_trial_count), cell_metrics))
+
+        if len(level) == 0:
+            break
+        results += level
+
+        # the children of the beam_width cells with the highest metric ratio are evaluated at the next depth
+        ratios = np.array([cell[3][rank_column] for cell in level]) / average_metrics[rank_column]
+        beam = np.argsort(-np.nan_to_num(ratios, nan=-np.inf), kind="stable")[:beam_width]
+        promising = dict()
+        for index in beam:
+            if not np.isnan(ratios[index]):
+                promising.setdefault(level[index][0], set()).add(level[index][1])
+        if len(promising) == 0:
+            break
+
+    metric_names = ["EER"] + ["DCF " + str(cost) for cost in dcf_costs]
+    ratio_names = ["EER ratio"] + ["DCF ratio " + str(cost) for cost in dcf_costs]
+    worst_subgroups = pd.DataFrame({"speaker_groups": ["_".join(attributes[index] for index in cell[0]) for cell in results],
+                                    "group_name": ["_".join(str(metadata_index["attributes"][attributes[index]]["values"][code]) for index, code in zip(cell[0], cell[1]))
+                                                   for cell in results],
+                                    "depth": [len(cell[0]) for cell in results],
+                                    "trials": [cell[2] for cell in results]})
+    metrics = np.array([cell[3] for cell in results]).reshape(len(results), len(metric_names))
+    for index, metric_name in enumerate(metric_names):
+        worst_subgroups[metric_name] = metrics[:, index]
+    for index, ratio_name in enumerate(ratio_names):
+        worst_subgroups[ratio_name] = metrics[:, index] / average_metrics[index]
+
+    worst_subgroups = worst_subgroups.sort_values(ratio_names[rank_column], ascending=False, kind="stable", na_position="last").head(top_k).reset_index(drop=True)
+
+    return worst_subgroups
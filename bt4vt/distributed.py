@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Created on 19-10-2026
+# @author: wiebket, AnnaLesch
+
+import numpy as np
+
+#########################################
+# Sharded bias tests reduce every scores shard to score counts per subgroup on a worker, i.e. to the distinct (score,
+# label) pairs with their number of trials and sum of trial weights. Score counts are mergeable: summing the counts of
+# every (score, label) pair over all shards yields the DET curve of each subgroup, so that the metrics are identical to
+# a bias test on the complete scores file while no raw trials are sent to the coordinator.
+#########################################
+
+
+def count_scores(label_score_list):
+    """Reduction of a record array of trials to score counts with one record per distinct (score, label) pair, the sum of the trial weights of the pair in the
+    weight field and its number of trials in the trials field. Trials without weight field count with weight 1. Score counts are sorted by score in descending order,
+    like the subgroups of :py:func:`groups.split_scores_by_speaker_groups`, and can be reduced again, so that the score counts of several shards are merged by
+    counting their concatenation.
+
+    :param label_score_list: record array with label, score and optional weight and trials fields
+    :type label_score_list: numpy.recarray
+
+    :returns: score_counts with the fields label, score, weight and trials
+    :rtype: numpy.recarray
+
+    """
+
+    names = label_score_list.dtype.names
+    trials = label_score_list["trials"] if "trials" in names else np.ones(len(label_score_list), dtype=np.int64)
+    weights = label_score_list["weight"] if "weight" in names else trials
+
+    order = np.lexsort((label_score_list["label"], label_score_list["score"]))[::-1]
+    sorted_labels = label_score_list["label"][order]
+    sorted_scores = label_score_list["score"][order]
+    if len(order) == 0:
+        # e.g. a shard or a subgroup without trials
+        return np.rec.fromarrays([sorted_labels, sorted_scores, np.empty(0, dtype=np.float64), np.empty(0, dtype=np.int64)],
+                                 names=["label", "score", "weight", "trials"])
+    # first trial of every distinct (score, label) pair
+    is_first = np.empty(len(order), dtype=bool)
+    is_first[0] = True
+    np.not_equal(sorted_scores[1:], sorted_scores[:-1], out=is_first[1:])
+    is_first[1:] |= sorted_labels[1:] != sorted_labels[:-1]
+    first_index = np.flatnonzero(is_first)
+
+    score_counts = np.rec.fromarrays([sorted_labels[first_index], sorted_scores[first_index],
+                                      np.add.reduceat(np.asarray(weights, dtype=np.float64)[order], first_index),
+                                      np.add.reduceat(np.asarray(trials, dtype=np.int64)[order], first_index)],
+                                     names=["label", "score", "weight", "trials"])
+
+    return score_counts
+
+
+def reduce_scores_shard(scores_shard, config_file):
+    """Reduction of a scores shard to mergeable per-subgroup statistics. The shard is split into the speaker groups
+    specified in the config file with :py:func:`groups.split_scores_by_speaker_groups` and the trials of every subgroup
+    are reduced to score counts with :py:func:`count_scores`. Trial weights of the ``weights_column`` are summed in the
+    score counts. This function runs on the workers of a sharded bias test.
+
+    :param scores_shard: path to csv or txt file with a shard of the scores
+    :type scores_shard: str
+    :param config_file: path to yaml config file
+    :type config_file: str
+
+    :returns: shard_statistics with the score counts of the overall shard under the key "average" and the score counts of every subgroup under the key "speaker_groups". Subgroups without scores are None.
+    :rtype: dict
+
+    """
+
+    from .core import SpeakerBiasTest
+    from .groups import split_scores_by_speaker_groups
+
+    test = SpeakerBiasTest(scores_shard, config_file)
+    scores_by_speaker_groups = split_scores_by_speaker_groups(test.scores, test.speaker_metadata,
+                                                              test.config["speaker_groups"],
+                                                              id_delimiter=test.id_delimiter, id_pattern=test.id_pattern,
+                                                              id_field=test.id_field)
+
+    record_columns = ["label", "score", "weight"] if "weight" in test.scores.columns else ["label", "score"]
+    shard_statistics = {"average": count_scores(test.scores[record_columns].to_records(index=False)),
+                        "speaker_groups": dict()}
+    del test
+    for group in scores_by_speaker_groups:
+        shard_statistics["speaker_groups"][group] = dict()
+        for subgroup, label_score_list in scores_by_speaker_groups[group].items():
+            if isinstance(label_score_list, np.recarray):
+                shard_statistics["speaker_groups"][group][subgroup] = count_scores(label_score_list)
+            else:
+                # no scores available for subgroup in this shard
+                shard_statistics["speaker_groups"][group][subgroup] = None
+            # the trials of a subgroup are released as soon as they are counted
+            scores_by_speaker_groups[group][subgroup] = None
+
+    return shard_statistics
+
+
+def _count_preceding(score_counts, other_score_counts):
+    """Number of score counts that precede every record of other_score_counts in the order of :py:func:`count_scores`, i.e. with a higher score or with the same
+    score and a higher label, and whether the next score count is the same (score, label) pair. Both score counts are sorted in this order.
+
+    :param score_counts: score counts as returned by :py:func:`count_scores`
+    :type score_counts: numpy.recarray
+    :param other_score_counts: score counts as returned by :py:func:`count_scores`
+    :type other_score_counts: numpy.recarray
+
+    :returns: number of preceding score counts, boolean array of records whose (score, label) pair is in score_counts
+    :rtype: ndarray, ndarray
+
+    """
+
+    # scores in ascending order without a copy, the number of higher scores is found with a binary search
+    ascending_scores = score_counts["score"][::-1]
+    num_preceding = len(score_counts) - np.searchsorted(ascending_scores, other_score_counts["score"], side="right")
+    # the next score count has the same score or is past the end, the higher label of a score comes first
+    next_index = np.minimum(num_preceding, len(score_counts) - 1)
+    same_score = (num_preceding < len(score_counts)) & (score_counts["score"][next_index] == other_score_counts["score"])
+    next_labels = score_counts["label"][next_index]
+    num_preceding += same_score & (next_labels > other_score_counts["label"])
+    # a higher next label is followed by the lower label of the same score
+    next_index = np.minimum(num_preceding, len(score_counts) - 1)
+    is_equal = (num_preceding < len(score_counts)) & (score_counts["score"][next_index] == other_score_counts["score"]) & \
+               (score_counts["label"][next_index] == other_score_counts["label"])
+
+    return num_preceding, is_equal
+
+
+def _merge_two_score_counts(score_counts, other_score_counts):
+    """Merge of two sorted score counts in linear time. Every record is written to its position in the merged score counts, the weights and trials of records of
+    the same (score, label) pair are summed.
+
+    :param score_counts: score counts as returned by :py:func:`count_scores`
+    :type score_counts: numpy.recarray
+    :param other_score_counts: score counts as returned by :py:func:`count_scores`
+    :type other_score_counts: numpy.recarray
+
+    :returns: merged_score_counts
+    :rtype: numpy.recarray
+
+    """
+
+    if len(score_counts) == 0 or len(other_score_counts) == 0:
+        return score_counts if len(other_score_counts) == 0 else other_score_counts
+
+    other_preceding, is_equal = _count_preceding(score_counts, other_score_counts)
+    preceding, _ = _count_preceding(other_score_counts, score_counts)
+    # records of a pair that is in both score counts share a position, preceding positions are reduced by the number of shared pairs before them
+    num_shared = np.zeros(len(other_score_counts) + 1, dtype=np.int64)
+    np.cumsum(is_equal, out=num_shared[1:])
+    positions = np.arange(len(score_counts)) + preceding - num_shared[preceding]
+    other_positions = np.arange(len(other_score_counts)) + other_preceding - num_shared[:-1]
+    del preceding, other_preceding
+
+    merged_score_counts = np.recarray(len(score_counts) + len(other_score_counts) - num_shared[-1],
+                                      dtype=np.result_type(score_counts.dtype, other_score_counts.dtype))
+    for field in ["label", "score", "weight", "trials"]:
+        merged_score_counts[field][positions] = score_counts[field]
+        if field in ["weight", "trials"]:
+            merged_score_counts[field][other_positions[is_equal]] += other_score_counts[field][is_equal]
+            merged_score_counts[field][other_positions[~is_equal]] = other_score_counts[field][~is_equal]
+        else:
+            merged_score_counts[field][other_positions] = other_score_counts[field]
+
+    return merged_score_counts
+
+
+def merge_score_counts(score_counts):
+    """Merge the score counts of several shards by summing the weights and trials of every (score, label) pair. The sorted score counts are merged one at a time in
+    linear time, so that score counts can be passed as an iterator and are released as soon as they are merged.
+
+    :param score_counts: iterable of score counts as returned by :py:func:`count_scores`, None entries are ignored
+    :type score_counts: iterable
+
+    :returns: merged_score_counts, None if all entries are None
+    :rtype: numpy.recarray
+
+    """
+
+    merged_score_counts = None
+    for counts in score_counts:
+        if counts is None:
+            continue
+        merged_score_counts = counts if merged_score_counts is None else _merge_two_score_counts(merged_score_counts, counts)
+
+    return merged_score_counts
+
+
+def merge_shard_statistics(shard_statistics):
+    """Merge the statistics of all shards, as returned by :py:func:`reduce_scores_shard`, into the score counts of the
+    overall dataset and the score counts by speaker groups. The statistics of every shard are merged as soon as they
+    arrive, so that the statistics can be passed as an iterator, e.g. the results of ``executor.map``, and the
+    coordinator never holds the statistics of all shards at once. Subgroups without scores in any shard obtain the
+    (NaN, NaN) placeholder of :py:func:`groups.split_scores_by_speaker_groups`.
+
+    :param shard_statistics: iterable of shard statistics
+    :type shard_statistics: iterable
+
+    :returns: average_score_counts, score_counts_by_speaker_groups
+    :rtype: numpy.recarray, dict
+
+    """
+
+    average_score_counts = None
+    score_counts_by_speaker_groups = None
+    for statistics in shard_statistics:
+        average_score_counts = merge_score_counts([average_score_counts, statistics["average"]])
+        if score_counts_by_speaker_groups is None:
+            # all shards are split with the same speaker metadata, so that groups and subgroups are in the same order
+            score_counts_by_speaker_groups = {group: dict.fromkeys(subgroups) for group, subgroups in statistics["speaker_groups"].items()}
+        for group, subgroups in score_counts_by_speaker_groups.items():
+            for subgroup in subgroups:
+                subgroups[subgroup] = merge_score_counts([subgroups[subgroup], statistics["speaker_groups"][group][subgroup]])
+        del statistics
+
+    for subgroups in score_counts_by_speaker_groups.values():
+        for subgroup, merged_score_counts in subgroups.items():
+            if merged_score_counts is None:
+                subgroups[subgroup] = [(np.nan, np.nan)]
+
+    return average_score_counts, score_counts_by_speaker_groups
@@ -4,29 +4,268 @@
 # Created on 18-05-2021
 # @author: wiebket
 
-import sklearn.metrics as sklearn_metrics
+import numpy as np
 from .metrics import compute_eer, compute_min_cdet, compute_cdet_at_threshold
+from .kernels import jit_enabled, evaluate_sorted_scores
 
 
-def compute_fpfnth(scores, labels):
-    """ Calculation of False Positive Rates and False Negative Rates and corresponding thresholds
+# number of trials of each class per block of the unsorted DET curve computation
+_BLOCK_SIZE = 8192
+
+
+def _distinct_score_blocks(target_scores, nontarget_scores, block_size=_BLOCK_SIZE):
+    """Distinct scores of two arrays of scores sorted in ascending order, in ascending blocks. The blocks are bounded by every block_size-th score of both arrays, so
+    that a block contains at most block_size scores of each array.
+
+    :param target_scores: Array of target scores sorted in ascending order
+    :type target_scores: ndarray
+    :param nontarget_scores: Array of non-target scores sorted in ascending order
+    :type nontarget_scores: ndarray
+    :param block_size: number of scores of each array per block
+    :type block_size: int
+
+    :returns: generator of arrays of distinct scores in ascending order
+    :rtype: generator
+
+    """
+
+    boundaries = np.unique(np.concatenate([target_scores[::block_size], nontarget_scores[::block_size]]))
+    target_bounds = np.append(np.searchsorted(target_scores, boundaries), len(target_scores))
+    nontarget_bounds = np.append(np.searchsorted(nontarget_scores, boundaries), len(nontarget_scores))
+    for block in range(len(boundaries)):
+        yield np.union1d(target_scores[target_bounds[block]:target_bounds[block + 1]], nontarget_scores[nontarget_bounds[block]:nontarget_bounds[block + 1]])
+
+
+def _compute_det_curve_unsorted(scores, targets):
+    """Calculation of the DET curve of unsorted scores without weights, see :py:func:`compute_det_curve`. Instead of sorting all trials with an index array, the scores
+    of the target and of the non-target trials are copied and sorted in place. The thresholds of the DET curve are the distinct scores from the lowest target score to
+    the lowest score above all non-target scores, and the true and false positives at every threshold are counted with a binary search in the sorted scores. All
+    intermediate arrays are blocks of at most _BLOCK_SIZE thresholds, so that the memory besides the curve is a copy of the scores.
+
+    :param scores: Array of scores
+    :type scores: ndarray
+    :param targets: Boolean array of targets
+    :type targets: ndarray
+
+    :returns: fprs, fnrs, thresholds
+    :rtype: ndarray, ndarray, ndarray
+
+    """
+
+    target_scores = scores[targets]
+    nontarget_scores = scores[~targets]
+    del targets
+    p_count = len(target_scores)
+    n_count = len(nontarget_scores)
+    if p_count == 0 or n_count == 0:
+        raise ValueError("Only one class is present in labels. Detection error tradeoff curve is not defined in that case.")
+    target_scores.sort()
+    nontarget_scores.sort()
+
+    # the curve starts at the lowest target score, where all targets are accepted, and stops at the first threshold without false positives, which is the lowest
+    # target score above all non-target scores or the threshold at infinity
+    last_target = np.searchsorted(target_scores, nontarget_scores[-1], side="right")
+    with_inf = last_target == p_count
+    first_nontarget = np.searchsorted(nontarget_scores, target_scores[0])
+    curve_target_scores = target_scores[:last_target + 1]
+    curve_nontarget_scores = nontarget_scores[first_nontarget:]
+
+    num_thresholds = sum(len(block) for block in _distinct_score_blocks(curve_target_scores, curve_nontarget_scores)) + with_inf
+    thresholds = np.empty(num_thresholds)
+    start = 0
+    for block in _distinct_score_blocks(curve_target_scores, curve_nontarget_scores):
+        thresholds[start:start + len(block)] = block
+        start += len(block)
+    if with_inf:
+        thresholds[-1] = np.inf
+    del curve_target_scores, curve_nontarget_scores
+
+    # trials with score >= threshold are accepted, the sorted scores of each class are released once its error rates are counted
+    fprs = np.empty(num_thresholds)
+    for start in range(0, num_thresholds, _BLOCK_SIZE):
+        block_thresholds = thresholds[start:start + _BLOCK_SIZE].astype(scores.dtype)
+        fprs[start:start + len(block_thresholds)] = n_count - np.searchsorted(nontarget_scores, block_thresholds)
+    del nontarget_scores
+    np.divide(fprs, n_count, out=fprs)
+    fnrs = np.empty(num_thresholds)
+    for start in range(0, num_thresholds, _BLOCK_SIZE):
+        block_thresholds = thresholds[start:start + _BLOCK_SIZE].astype(scores.dtype)
+        fnrs[start:start + len(block_thresholds)] = np.searchsorted(target_scores, block_thresholds)
+    del target_scores
+    np.divide(fnrs, p_count, out=fnrs)
+
+    return fprs, fnrs, thresholds
+
+
+def compute_det_curve(scores, labels, order=None, presorted=False, weights=None):
+    """ Calculation of the Detection Error Tradeoff (DET) curve, i.e. False Positive Rates and False Negative Rates at all
+    distinct score thresholds. Without order, presorted or weights, the target and non-target scores are sorted separately
+    and the error rates at every threshold are counted with a binary search, see :py:func:`_compute_det_curve_unsorted`.
+    Otherwise true and false positives are counted with a cumulative sum over the sorted labels and ties are collapsed to
+    the last trial of every distinct score. The output is identical to
+    ``sklearn.metrics.det_curve(labels, scores, pos_label=1)`` (scikit-learn >= 1.7), including the threshold at infinity
+    where all trials are rejected.
+
+    Scores can be float32 or float64 and are not copied to a higher precision. If the order that sorts the scores in
+    descending order is already known, e.g. because it is shared between subgroups, it can be passed as order. If the
+    scores and labels are already sorted in descending order of scores, presorted avoids any further copies.
+
+    If weights are given, every trial is counted with its weight, i.e. true and false positives are weighted cumulative
+    sums. The rates equal those of a trial list in which every trial is repeated as often as its weight.
+
+    :param scores: Array of scores
+    :type scores: ndarray
+    :param labels: Array of labels; labels have to be either {-1,1} or {0,1}
+    :type labels: ndarray
+    :param order: Optional indices that sort the scores in descending order
+    :type order: ndarray
+    :param presorted: Set to True if scores and labels are already sorted in descending order of scores. Default is set to False.
+    :type presorted: bool
+    :param weights: Optional array of non-negative trial weights in the order of scores
+    :type weights: ndarray
+
+    :returns: fprs, fnrs, thresholds
+    :rtype: ndarray, ndarray, ndarray
+
+    """
+
+    scores = np.asarray(scores)
+    if scores.dtype != np.float32 and scores.dtype != np.float64:
+        scores = scores.astype(np.float64)
+    targets = np.asarray(labels) == 1
+    if order is None and not presorted and weights is None:
+        return _compute_det_curve_unsorted(scores, targets)
+    sorted_weights = None
+
+    if presorted:
+        sorted_scores = scores
+        sorted_targets = targets
+        if weights is not None:
+            sorted_weights = np.asarray(weights, dtype=np.float64)
+    else:
+        if order is None:
+            order = np.argsort(scores, kind="mergesort")[::-1]
+        sorted_scores = scores[order]
+        sorted_targets = targets[order]
+        if weights is not None:
+            sorted_weights = np.asarray(weights, dtype=np.float64)[order]
+        del order, targets
+
+    # the last trial of every distinct score is a threshold
+    num_trials = len(sorted_scores)
+    is_threshold = np.empty(num_trials, dtype=bool)
+    np.not_equal(sorted_scores[1:], sorted_scores[:-1], out=is_threshold[:-1])
+    is_threshold[-1] = True
+    num_thresholds = np.count_nonzero(is_threshold) + 1
+
+    # true positives, false positives and thresholds are written in reverse order into the output arrays, followed by
+    # a threshold at inf where all trials are rejected. One buffer is reused for both cumulative sums.
+    tps = np.empty(num_thresholds)
+    fps = np.empty(num_thresholds)
+    thresholds = np.empty(num_thresholds)
+    if sorted_weights is None:
+        counts = np.empty(num_trials, dtype=np.int32 if num_trials < np.iinfo(np.int32).max else np.int64)
+        np.cumsum(sorted_targets, out=counts)
+        tps[-2::-1] = counts[is_threshold]
+        np.cumsum(~sorted_targets, out=counts)
+        fps[-2::-1] = counts[is_threshold]
+    else:
+        counts = np.multiply(sorted_weights, sorted_targets)
+        np.cumsum(counts, out=counts)
+        tps[-2::-1] = counts[is_threshold]
+        np.multiply(sorted_weights, ~sorted_targets, out=counts)
+        np.cumsum(counts, out=counts)
+        fps[-2::-1] = counts[is_threshold]
+        del sorted_weights
+    thresholds[-2::-1] = sorted_scores[is_threshold]
+    tps[-1] = fps[-1] = 0.0
+    thresholds[-1] = np.inf
+    del counts, is_threshold
+
+    p_count = tps[0]
+    n_count = fps[0]
+    if p_count == 0 or n_count == 0:
+        raise ValueError("Only one class is present in labels. Detection error tradeoff curve is not defined in that case.")
+
+    # start with the last threshold without false positives and stop at the first threshold without false negatives,
+    # in reverse order: the first threshold at which all targets are accepted up to the last one without false positives
+    first_ind = num_thresholds - np.searchsorted(tps[::-1], p_count) - 1
+    last_ind = num_thresholds - np.searchsorted(fps[::-1], 0.0, side="right") + 1
+
+    fprs = np.divide(fps, n_count, out=fps)[first_ind:last_ind]
+    fns = np.subtract(p_count, tps, out=tps)
+    fnrs = np.divide(fns, p_count, out=fns)[first_ind:last_ind]
+    thresholds = thresholds[first_ind:last_ind]
+
+    return fprs, fnrs, thresholds
+
+
+def compute_det_curve_histogram(scores, labels, bins=1000, weights=None):
+    """ Approximation of the Detection Error Tradeoff (DET) curve on a grid of equally spaced score thresholds between the minimum and the maximum score, followed by
+    the threshold at infinity where all trials are rejected. Trials are counted per threshold with one bincount, so that no sorted copy of the scores is needed and the
+    curve has at most bins + 1 points. The False Positive Rates and False Negative Rates at the grid thresholds are exact.
+
+    :param scores: Array of scores
+    :type scores: ndarray
+    :param labels: Array of labels; labels have to be either {-1,1} or {0,1}
+    :type labels: ndarray
+    :param bins: Number of score thresholds. Default is 1000.
+    :type bins: int
+    :param weights: Optional array of non-negative trial weights, see :py:func:`compute_det_curve`
+    :type weights: ndarray
+
+    :returns: fprs, fnrs, thresholds
+    :rtype: ndarray, ndarray, ndarray
+
+    """
+
+    scores = np.asarray(scores, dtype=np.float64)
+    targets = np.asarray(labels) == 1
+    thresholds = np.unique(np.linspace(scores.min(), scores.max(), bins))
+
+    # every trial is counted at the highest threshold that accepts it, i.e. at the highest threshold <= score
+    threshold_index = np.searchsorted(thresholds, scores, side="right") - 1
+    target_weights = None if weights is None else np.asarray(weights, dtype=np.float64)[targets]
+    non_target_weights = None if weights is None else np.asarray(weights, dtype=np.float64)[~targets]
+    tps = np.bincount(threshold_index[targets], weights=target_weights, minlength=len(thresholds))[::-1].cumsum()[::-1]
+    fps = np.bincount(threshold_index[~targets], weights=non_target_weights, minlength=len(thresholds))[::-1].cumsum()[::-1]
+
+    p_count = tps[0]
+    n_count = fps[0]
+    if p_count == 0 or n_count == 0:
+        raise ValueError("Only one class is present in labels. Detection error tradeoff curve is not defined in that case.")
+
+    fprs = np.append(fps / n_count, 0.0)
+    fnrs = np.append(1 - tps / p_count, 1.0)
+    thresholds = np.append(thresholds, np.inf)
+
+    return fprs, fnrs, thresholds
+
+
+def compute_fpfnth(scores, labels, weights=None):
+    """ Calculation of False Positive Rates and False Negative Rates and corresponding thresholds with :py:func:`compute_det_curve`. Scores that are already sorted in
+    descending order, e.g. the subgroups of :py:func:`groups.split_scores_by_speaker_groups`, are not sorted again.
 
     :param scores: Series of scores
     :type scores: pandas.Series
     :param labels: Series of labels; labels have to be either {-1,1} or {0,1}
     :type labels: pandas.Series
+    :param weights: Optional array of non-negative trial weights, see :py:func:`compute_det_curve`
+    :type weights: ndarray
 
     :returns: fprs, fnrs, thresholds
     :rtype: ndarray, ndarray, ndarray
 
     """
 
-    fprs, fnrs, thresholds = sklearn_metrics.det_curve(labels, scores, pos_label=1)
+    scores = np.asarray(scores)
+    presorted = bool(np.all(scores[:-1] >= scores[1:]))
+    fprs, fnrs, thresholds = compute_det_curve(scores, labels, presorted=presorted, weights=weights)
 
     return fprs, fnrs, thresholds
 
 
-def evaluate_scores(scores, labels, dcf_costs, threshold_values=None):
+def evaluate_scores(scores, labels, dcf_costs, threshold_values=None, det_curve=None, weights=None):
     """ Evaluation of scores for the overall dataset and for specified speaker groups. In the average case no threshold_values are provided.
         Threshold values are used to compute the detection cost function for specified speaker groups.
         The function returns False Positive Rates, False Negative Rates and corresponding thresholds as well as the corresponding metric scores. In the average case, metric thresholds are returned in addition.
@@ -39,25 +278,53 @@ def evaluate_scores(scores, labels, dcf_costs, threshold_values=None):
         :type dcf_costs: list
         :param threshold_values: Series of threshold values computed for the overall dataset and used to determine the metric scores for the specified speaker groups
         :type threshold_values: pandas.Series
+        :param det_curve: Optional tuple (fprs, fnrs, thresholds) of the scores, e.g. from the result cache, so that the DET curve is not computed again
+        :type det_curve: tuple
+        :param weights: Optional array of non-negative trial weights, the DET curve and all metrics are computed on weighted trial counts
+        :type weights: ndarray
 
         :returns: fprs, fnrs, thresholds, metric_scores, (metric_thresholds)
         :rtype: ndarray, ndarray, ndarray, list, (list)
 
     """
 
-    fprs, fnrs, thresholds = compute_fpfnth(scores, labels)
+    if det_curve is None and jit_enabled():
+        # fused DET curve, EER and minimum detection cost functions with the JIT compiled kernel
+        scores = np.asarray(scores)
+        targets = np.asarray(labels) == 1
+        if weights is not None:
+            weights = np.asarray(weights)
+        if not np.all(scores[:-1] >= scores[1:]):
+            order = np.argsort(scores, kind="mergesort")[::-1]
+            scores = scores[order]
+            targets = targets[order]
+            if weights is not None:
+                weights = weights[order]
+            del order
+        fprs, fnrs, thresholds, eer, eer_threshold, min_cdets, min_cdet_thresholds = evaluate_sorted_scores(scores, targets, dcf_costs, sorted_weights=weights)
+    else:
+        if det_curve is None:
+            fprs, fnrs, thresholds = compute_fpfnth(scores, labels, weights=weights)
+        else:
+            fprs, fnrs, thresholds = det_curve
+        eer, eer_threshold = compute_eer(fprs, fnrs, thresholds)
+        min_cdets = []
+        min_cdet_thresholds = []
+        if threshold_values is None:
+            for cost in dcf_costs:
+                min_cdet, min_cdet_threshold = compute_min_cdet(fprs, fnrs, thresholds, cost[0], cost[1], cost[2])
+                min_cdets.append(min_cdet)
+                min_cdet_thresholds.append(min_cdet_threshold)
 
     metric_scores = []
     metric_thresholds = []
 
-    eer, eer_threshold = compute_eer(fprs, fnrs, thresholds)
     metric_scores.append(eer)
     metric_thresholds.append(eer_threshold)
     # TODO: error handling check that dcf_cost is not empty
     # this is the average case
     if threshold_values is None:
-        for cost in dcf_costs:
-            min_cdet, min_cdet_threshold = compute_min_cdet(fprs, fnrs, thresholds, cost[0], cost[1], cost[2])
+        for min_cdet, min_cdet_threshold in zip(min_cdets, min_cdet_thresholds):
             metric_scores.append(min_cdet)
             metric_thresholds.append(min_cdet_threshold)
 
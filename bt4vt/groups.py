@@ -5,11 +5,228 @@
 # @author: wiebket, AnnaLesch
 
 import itertools
+import re
 import numpy as np
+import pandas as pd
 
 
-def split_scores_by_speaker_groups(scores, speaker_metadata, speaker_groups, id_delimiter):
+def get_speaker_ids(filepaths, id_delimiter="/", id_pattern=None, id_field=0):
+    """ Extraction of speaker ids from utterance filepaths. By default the file extension is removed and the filepath is split by id_delimiter, the speaker id is the
+    field at position id_field. Alternatively, the speaker id is extracted with the regular expression id_pattern: the named group "id" if the pattern has one, else the
+    first group, else the complete match. Filepaths that do not match the pattern obtain a NaN speaker id. Speaker ids are extracted once per unique filepath, so that the
+    work scales with the number of utterances rather than the number of trials.
+
+    :param filepaths: Series of utterance filepaths
+    :type filepaths: pandas.Series
+    :param id_delimiter: If not specified in config file, default is "/"
+    :type id_delimiter: string
+    :param id_pattern: Optional regular expression for the speaker id, e.g. "^(id\\d+)/"
+    :type id_pattern: string
+    :param id_field: Position of the speaker id in the filepath split by id_delimiter, negative positions count from the end. If not specified in config file, default is 0
+    :type id_field: int
+
+    :returns: speaker_ids
+    :rtype: pandas.Series
+
+    """
+
+    codes, utterances = pd.factorize(filepaths, sort=False)
+    utterances = pd.Series(utterances.astype(str))
+
+    if id_pattern is not None:
+        id_pattern = re.compile(id_pattern)
+        if "id" in id_pattern.groupindex:
+            utterance_ids = utterances.str.extract(id_pattern, expand=True)["id"]
+        elif id_pattern.groups > 0:
+            utterance_ids = utterances.str.extract(id_pattern, expand=True)[0]
+        else:
+            utterance_ids = utterances.str.extract("(" + id_pattern.pattern + ")", flags=id_pattern.flags, expand=False)
+    else:
+        # only the extension of the last path component is removed, dots in directory names are kept
+        utterance_ids = utterances.str.replace(r"\.[^./\\]*$", "", regex=True).str.split(id_delimiter, regex=False).str[id_field]
+
+    # unique ids are gathered back to the trials, missing filepaths have code -1 and obtain NaN
+    utterance_ids = np.append(utterance_ids.values.astype(object), np.nan)
+    speaker_ids = pd.Series(utterance_ids[codes], index=getattr(filepaths, "index", None),
+                            name=getattr(filepaths, "name", None))
+
+    return speaker_ids
+
+
+def build_metadata_index(speaker_metadata, attributes, speaker_groups):
+    """ Construction of an index that maps every speaker id to an integer code per attribute and per speaker group. Subgroups of a speaker group are all combinations of
+    the attribute values of its attributes, in the order in which the values appear in the speaker metadata, e.g. Gender: [m, f], Nationality: [India, USA] becomes
+    [m_India, m_USA, f_India, f_USA]. The subgroup code of a speaker is the position of its combination in this list. If a speaker id appears several times in the
+    speaker metadata, its first row is used.
+
+    :param speaker_metadata: DataFrame that contains speaker metadata with speaker ids and speaker groups attributes as specified in config file
+    :type speaker_metadata: DataFrame
+    :param attributes: List of attributes to index, i.e. the select_columns of the config file
+    :type attributes: list
+    :param speaker_groups: List of speaker groups as specified in config file
+    :type speaker_groups: list
+
+    :returns: metadata_index with the speaker ids under "ids", the values and codes of each attribute under "attributes" and the subgroups and codes of each speaker group under "speaker_groups"
+    :rtype: dict
+
+    """
+
+    speakers = speaker_metadata.drop_duplicates("id")
+    metadata_index = {"ids": speakers["id"].values.astype(str), "attributes": dict(), "speaker_groups": dict()}
+
+    for attribute in attributes:
+        values = speaker_metadata[attribute].unique()
+        codes = pd.Categorical(speakers[attribute], categories=values).codes.astype(np.int64)
+        metadata_index["attributes"][attribute] = {"values": values, "codes": codes}
+
+    for group in speaker_groups:
+        group_attributes = list(dict.fromkeys(group))
+        subgroup_values = [[str(value) for value in metadata_index["attributes"][attribute]["values"]]
+                           for attribute in group_attributes]
+        # e.g. Gender: [m, f], Nationality: [India] becomes [(m, India), (f, India)]
+        subgroups = ["_".join(combination) for combination in itertools.product(*subgroup_values)]
+        codes = np.zeros(len(speakers), dtype=np.int64)
+        for attribute, values in zip(group_attributes, subgroup_values):
+            codes = codes * len(values) + metadata_index["attributes"][attribute]["codes"]
+        metadata_index["speaker_groups"]["_".join(group_attributes)] = {"subgroups": subgroups, "codes": codes}
+
+    return metadata_index
+
+
+def get_speaker_codes(speaker_ids, metadata_index):
+    """ Mapping of speaker ids to their integer position in the metadata index. Speaker ids that are not in the speaker metadata obtain the code -1.
+
+    :param speaker_ids: Series of speaker ids, one per trial
+    :type speaker_ids: pandas.Series
+    :param metadata_index: Index as returned by :py:func:`build_metadata_index`
+    :type metadata_index: dict
+
+    :returns: speaker_codes
+    :rtype: ndarray
+
+    """
+
+    speaker_codes = pd.Categorical(speaker_ids, categories=metadata_index["ids"]).codes.astype(np.int64)
+
+    return speaker_codes
+
+
+def get_subgroup_codes(speaker_codes, metadata_index, group_name):
+    """ Assignment of trials to the subgroups of a speaker group with one array gather per trial. Trials of speakers that are not in the speaker metadata obtain the code -1.
+
+    :param speaker_codes: Array of speaker codes as returned by :py:func:`get_speaker_codes`
+    :type speaker_codes: ndarray
+    :param metadata_index: Index as returned by :py:func:`build_metadata_index`
+    :type metadata_index: dict
+    :param group_name: Name of the speaker group, i.e. its attributes joined by "_"
+    :type group_name: str
+
+    :returns: subgroup_codes
+    :rtype: ndarray
+
+    """
+
+    speaker_subgroup_codes = metadata_index["speaker_groups"][group_name]["codes"]
+    # append -1 so that the code -1 of unknown speakers gathers -1
+    subgroup_codes = np.append(speaker_subgroup_codes, -1)[speaker_codes]
+
+    return subgroup_codes
+
+
+def get_coarse_code_map(metadata_index, fine_attributes, coarse_attributes):
+    """ Mapping of the subgroup codes of a fine speaker group to the subgroup codes of a coarse speaker group whose attributes are a subset of the fine attributes, e.g.
+    Gender_Nationality to Gender. Subgroup codes are mixed radix numbers of the attribute value codes, see :py:func:`build_metadata_index`, so that every fine subgroup
+    belongs to exactly one coarse subgroup.
+
+    :param metadata_index: Index as returned by :py:func:`build_metadata_index`
+    :type metadata_index: dict
+    :param fine_attributes: Attributes of the fine speaker group
+    :type fine_attributes: list
+    :param coarse_attributes: Attributes of the coarse speaker group
+    :type coarse_attributes: list
+
+    :returns: coarse_code_map with the coarse subgroup code of every fine subgroup code
+    :rtype: ndarray
+
+    """
+
+    fine_shape = [len(metadata_index["attributes"][attribute]["values"]) for attribute in fine_attributes]
+    attribute_codes = dict(zip(fine_attributes, np.unravel_index(np.arange(int(np.prod(fine_shape))), fine_shape)))
+    coarse_code_map = np.ravel_multi_index([attribute_codes[attribute] for attribute in coarse_attributes],
+                                           [len(metadata_index["attributes"][attribute]["values"]) for attribute in coarse_attributes])
+
+    return coarse_code_map
+
+
+def _get_subgroup_codes_by_speaker_groups(speaker_codes, metadata_index, speaker_groups):
+    """ Subgroup codes of every speaker group, see :py:func:`split_scores_by_speaker_groups`. Subgroup codes are computed once per finest speaker group, coarser speaker
+    groups are derived from the codes of the finer speaker group with :py:func:`get_coarse_code_map`.
+
+    :param speaker_codes: Array of speaker codes as returned by :py:func:`get_speaker_codes`
+    :type speaker_codes: ndarray
+    :param metadata_index: Index as returned by :py:func:`build_metadata_index`
+    :type metadata_index: dict
+    :param speaker_groups: List of speaker groups as specified in config file
+    :type speaker_groups: list
+
+    :returns: generator of group_name, subgroups and subgroup_codes of every speaker group
+    :rtype: generator
+
+    """
+
+    group_attributes = {"_".join(dict.fromkeys(group)): list(dict.fromkeys(group)) for group in speaker_groups}
+    fine_subgroup_codes = dict()
+
+    for group_name, attributes in group_attributes.items():
+        subgroups = metadata_index["speaker_groups"][group_name]["subgroups"]
+
+        # the finest speaker group that contains all attributes of this speaker group
+        fine_group_name = max([name for name in group_attributes if set(attributes) <= set(group_attributes[name])], key=lambda name: len(group_attributes[name]))
+        if fine_group_name not in fine_subgroup_codes:
+            fine_subgroup_codes[fine_group_name] = get_subgroup_codes(speaker_codes, metadata_index, fine_group_name)
+        if fine_group_name == group_name:
+            subgroup_codes = fine_subgroup_codes[group_name]
+        else:
+            # append -1 so that the code -1 of unknown speakers maps to -1
+            coarse_code_map = get_coarse_code_map(metadata_index, group_attributes[fine_group_name], attributes)
+            subgroup_codes = np.append(coarse_code_map, -1)[fine_subgroup_codes[fine_group_name]]
+
+        yield group_name, subgroups, subgroup_codes
+
+
+def _count_subgroup_trials(subgroup_codes, labels, subgroups, weights=None):
+    """ Number of trials and of target trials of every subgroup with one np.bincount of the subgroup codes and classes. Trials of speakers that are not in the speaker
+    metadata and trials with zero weight are not counted.
+
+    :param subgroup_codes: Array of subgroup codes, -1 for trials without subgroup
+    :type subgroup_codes: ndarray
+    :param labels: Array of labels; labels have to be either {-1,1} or {0,1}
+    :type labels: ndarray
+    :param subgroups: List of subgroups of the speaker group
+    :type subgroups: list
+    :param weights: Optional array of trial weights
+    :type weights: ndarray
+
+    :returns: trial_counts with the number of trials and of target trials of every subgroup
+    :rtype: dict
+
+    """
+
+    # one count per subgroup and class, trials with code -1 are counted in the first two bins and dropped
+    keys = (subgroup_codes.astype(np.int64) + 1) * 2 + (np.asarray(labels) == 1)
+    counts = np.bincount(keys, weights=None if weights is None else np.asarray(weights) > 0, minlength=2 * (len(subgroups) + 1))
+    counts = counts[2:].astype(np.int64).reshape(-1, 2)
+    trial_counts = dict(zip(subgroups, zip(counts.sum(axis=1).tolist(), counts[:, 1].tolist())))
+
+    return trial_counts
+
+
+def split_scores_by_speaker_groups(scores, speaker_metadata, speaker_groups, id_delimiter, metadata_index=None, id_pattern=None, id_field=0, return_counts=False):
     """ Construction of a dictionary that holds a list of tuples (label, score) for the speaker groups as defined in the config file and their corresponding subgroups.
+    Trials are assigned to subgroups with the integer codes of :py:func:`build_metadata_index`. All trials are sorted by score once, in descending order, and every speaker
+    group is grouped from this shared order with one stable integer sort of its subgroup codes, so that the trials of every subgroup are sorted by score in descending
+    order. Subgroup codes are computed once per finest speaker group, coarser speaker groups whose attributes are contained in a finer speaker group, e.g. Gender in
+    Gender_Nationality, are derived from the codes of the finer speaker group with :py:func:`get_coarse_code_map`.
 
     :param scores: DataFrame that contains reference and test utterances and corresponding labels and scores
     :type scores: DataFrame
@@ -19,52 +236,320 @@ def split_scores_by_speaker_groups(scores, speaker_metadata, speaker_groups, id_
     :type speaker_groups: list
     :param id_delimiter: If not specified in config file, default is "/"
     :type id_delimiter: string
+    :param metadata_index: Optional index as returned by :py:func:`build_metadata_index`, it is built from the speaker metadata if not given
+    :type metadata_index: dict
+    :param id_pattern: Optional regular expression for the speaker id, see :py:func:`get_speaker_ids`
+    :type id_pattern: string
+    :param id_field: Position of the speaker id in the filepath split by id_delimiter, default is 0
+    :type id_field: int
+    :param return_counts: Set to True to also return the number of trials and of target trials of every subgroup, counted from the subgroup codes of the split. Trials
+        with zero weight are not counted. Default is set to False.
+    :type return_counts: bool
 
-    :returns: scores_by_speaker_groups
+    :returns: scores_by_speaker_groups, and trial_counts with a tuple (trials, targets) per subgroup of every speaker group if return_counts is set
     :rtype: dict
 
     """
 
     scores_by_speaker_groups = dict()
+    trial_counts = dict()
 
-    # create id column for scores, first split by dot to get rid of .wav, then by id_delimiter
-    scores['ref_id'] = scores['ref'].apply(lambda x: x.split(".")[0]).apply(lambda x: x.split(id_delimiter)[0])
+    # create id column for scores, unless it has been created while loading the scores
+    if 'ref_id' not in scores.columns:
+        scores['ref_id'] = get_speaker_ids(scores['ref'], id_delimiter, id_pattern=id_pattern, id_field=id_field)
 
-    for group in speaker_groups:
-        subgroup_per_group = dict()
-        group_copy = group.copy()
+    if metadata_index is None:
+        attributes = list(dict.fromkeys(attribute for group in speaker_groups for attribute in group))
+        metadata_index = build_metadata_index(speaker_metadata, attributes, speaker_groups)
 
-        while len(group_copy) > 0:
-            group_name = group_copy[0]
-            subgroups = list(speaker_metadata[group_name].unique())
-            subgroup_per_group.update({group_name: subgroups})
-            group_copy.pop(0)
+    # one descending sort of all trials by score is shared by all speaker groups
+    score_order = np.argsort(scores["score"].values, kind="stable")[::-1]
+    speaker_codes = get_speaker_codes(scores['ref_id'], metadata_index)[score_order]
+    # trial weights are kept in the records of every subgroup
+    record_columns = ["label", "score", "weight"] if "weight" in scores.columns else ["label", "score"]
+    label_score_records = scores[record_columns].to_records(index=False)[score_order]
+    del score_order
 
-        scores_by_speaker_groups["_".join(subgroup_per_group.keys())] = dict()
-        # for a list of subgroups for groups create category combination
-        # e.g. Gender: [m, f], Nationality: [India] becomes [(m, India), (f, India)]
-        subgroups_combinations = list(itertools.product(*subgroup_per_group.values()))
+    for group_name, subgroups, subgroup_codes in _get_subgroup_codes_by_speaker_groups(speaker_codes, metadata_index, speaker_groups):
+        if return_counts:
+            trial_counts[group_name] = _count_subgroup_trials(subgroup_codes, label_score_records["label"], subgroups,
+                                                              label_score_records["weight"] if "weight" in record_columns else None)
 
-        for combination in subgroups_combinations:
-            subgroup_dataframe = speaker_metadata
-            for index, subcategory in enumerate(combination):
-                subgroup_dataframe = subgroup_dataframe.loc[subgroup_dataframe[list(subgroup_per_group.keys())[index]] == subcategory]
+        # sort trials by subgroup, trials of a subgroup keep their descending order of scores. Small integer codes are sorted with a radix sort.
+        subgroup_codes = subgroup_codes.astype(np.int16 if len(subgroups) < np.iinfo(np.int16).max else np.int64)
+        order = np.argsort(subgroup_codes, kind="stable")
+        subgroup_bounds = np.searchsorted(subgroup_codes[order], np.arange(len(subgroups) + 1))
 
-            # subgroup combination not available in speaker_metadata
-            if subgroup_dataframe.empty:
-                scores_by_speaker_groups["_".join(subgroup_per_group.keys())].update({"_".join(combination): [(np.nan, np.nan)]})
+        scores_by_speaker_groups[group_name] = dict()
+        for subgroup_code, subgroup in enumerate(subgroups):
+            start, end = subgroup_bounds[subgroup_code], subgroup_bounds[subgroup_code + 1]
+            # subgroup combination not available in speaker_metadata or speaker id in metadata but no scores provided
+            if start == end:
+                scores_by_speaker_groups[group_name].update({subgroup: [(np.nan, np.nan)]})
                 # TODO logging here
                 continue
 
-            id_list = subgroup_dataframe["id"]
-            scores_filtered = scores[scores['ref_id'].isin(id_list)]
+            label_score_list = label_score_records[order[start:end]]
+            scores_by_speaker_groups[group_name].update({subgroup: label_score_list})
 
-            # speaker id in metadata but no scores provided
-            if scores_filtered.empty:
-                scores_by_speaker_groups["_".join(subgroup_per_group.keys())].update({"_".join(combination): [(np.nan, np.nan)]})
-                # TODO Logging here
-                continue
+    if return_counts:
+        return scores_by_speaker_groups, trial_counts
 
-            label_score_list = scores_filtered[["label", "score"]].to_records(index=False)
-            scores_by_speaker_groups["_".join(subgroup_per_group.keys())].update({"_".join(combination): label_score_list})
     return scores_by_speaker_groups
+
+
+def sort_trials_by_subgroups(scores, speaker_group, metadata_index):
+    """ Order of the trials of the subgroups of one speaker group as in :py:func:`split_scores_by_speaker_groups`, i.e. sorted by subgroup and by score in descending
+    order within a subgroup, without gathering the records of the subgroups. The trials of subgroup i are scores.iloc[score_order[order[subgroup_bounds[i]:
+    subgroup_bounds[i + 1]]]], trials of speakers that are not in the speaker metadata come before subgroup_bounds[0].
+
+    :param scores: DataFrame with the columns label, score and ref_id
+    :type scores: DataFrame
+    :param speaker_group: Speaker group as specified in config file, e.g. ["Gender", "Nationality"]
+    :type speaker_group: list
+    :param metadata_index: Index as returned by :py:func:`build_metadata_index`
+    :type metadata_index: dict
+
+    :returns: subgroups, score_order, order, subgroup_bounds
+    :rtype: list, ndarray, ndarray, ndarray
+
+    """
+
+    # subgroup codes are computed in the order of the trials and only the small integer codes are gathered in the order of scores
+    group_name, subgroups, subgroup_codes = next(_get_subgroup_codes_by_speaker_groups(get_speaker_codes(scores["ref_id"], metadata_index), metadata_index,
+                                                                                       [speaker_group]))
+    subgroup_codes = subgroup_codes.astype(np.int16 if len(subgroups) < np.iinfo(np.int16).max else np.int64)
+    score_order = np.argsort(scores["score"].values, kind="stable")[::-1]
+    subgroup_codes = subgroup_codes[score_order]
+    order = np.argsort(subgroup_codes, kind="stable")
+    subgroup_bounds = np.searchsorted(subgroup_codes[order], np.arange(len(subgroups) + 1))
+
+    return subgroups, score_order, order, subgroup_bounds
+
+
+def count_trials_by_speaker_groups(scores, speaker_metadata, speaker_groups, id_delimiter, metadata_index=None, id_pattern=None, id_field=0):
+    """ Number of trials and of target trials of every subgroup of the speaker groups, as returned by :py:func:`split_scores_by_speaker_groups` with return_counts,
+    but without sorting and splitting the trials. Trials with zero weight are not counted.
+
+    :param scores: DataFrame that contains reference and test utterances and corresponding labels and scores
+    :type scores: DataFrame
+    :param speaker_metadata: DataFrame that contains speaker metadata with speaker ids and speaker groups attributes as specified in config file
+    :type speaker_metadata: DataFrame
+    :param speaker_groups: List of speaker groups as specified in config file
+    :type speaker_groups: list
+    :param id_delimiter: If not specified in config file, default is "/"
+    :type id_delimiter: string
+    :param metadata_index: Optional index as returned by :py:func:`build_metadata_index`, it is built from the speaker metadata if not given
+    :type metadata_index: dict
+    :param id_pattern: Optional regular expression for the speaker id, see :py:func:`get_speaker_ids`
+    :type id_pattern: string
+    :param id_field: Position of the speaker id in the filepath split by id_delimiter, default is 0
+    :type id_field: int
+
+    :returns: trial_counts with a tuple (trials, targets) per subgroup of every speaker group
+    :rtype: dict
+
+    """
+
+    if 'ref_id' not in scores.columns:
+        scores['ref_id'] = get_speaker_ids(scores['ref'], id_delimiter, id_pattern=id_pattern, id_field=id_field)
+
+    if metadata_index is None:
+        attributes = list(dict.fromkeys(attribute for group in speaker_groups for attribute in group))
+        metadata_index = build_metadata_index(speaker_metadata, attributes, speaker_groups)
+
+    speaker_codes = get_speaker_codes(scores['ref_id'], metadata_index)
+    weights = scores["weight"].values if "weight" in scores.columns else None
+    trial_counts = {group_name: _count_subgroup_trials(subgroup_codes, scores["label"].values, subgroups, weights)
+                    for group_name, subgroups, subgroup_codes in _get_subgroup_codes_by_speaker_groups(speaker_codes, metadata_index, speaker_groups)}
+
+    return trial_counts
+
+
+def count_subgroup_trials(scores_by_speaker_groups):
+    """ Number of trials and of target trials of every subgroup, counted from the records of scores_by_speaker_groups, e.g. the merged score counts of a sharded bias
+    test. If the records contain trial weights, trials with zero weight are not counted. If the records are score counts of :py:func:`distributed.count_scores`, the
+    trials of every record are counted. Splits of :py:func:`split_scores_by_speaker_groups` return these counts from the partition with return_counts.
+
+    :param scores_by_speaker_groups: Dictionary as returned by :py:func:`split_scores_by_speaker_groups`
+    :type scores_by_speaker_groups: dict
+
+    :returns: trial_counts with a tuple (trials, targets) per subgroup of every speaker group
+    :rtype: dict
+
+    """
+
+    trial_counts = dict()
+    for group, subgroups in scores_by_speaker_groups.items():
+        trial_counts[group] = dict()
+        for subgroup, label_score_list in subgroups.items():
+            if isinstance(label_score_list, np.ndarray):
+                if "weight" in label_score_list.dtype.names:
+                    label_score_list = label_score_list[label_score_list["weight"] > 0]
+                if "trials" in label_score_list.dtype.names:
+                    trials = int(label_score_list["trials"].sum())
+                    targets = int(label_score_list["trials"][label_score_list["label"] == 1].sum())
+                else:
+                    trials = len(label_score_list)
+                    targets = int(np.count_nonzero(label_score_list["label"] == 1))
+            else:
+                # (NaN, NaN) placeholder of subgroups without scores
+                trials = 0
+                targets = 0
+            trial_counts[group][subgroup] = (trials, targets)
+
+    return trial_counts
+
+
+def get_subgroup_diagnostics(trial_counts, min_trials=0):
+    """ Classification of every subgroup from its number of target and non-target trials, before any metric is computed. The counts are read from trial_counts, as
+    returned by :py:func:`split_scores_by_speaker_groups` with return_counts, so that no trials are scanned. Subgroups that cannot be evaluated obtain one of the reason
+    codes
+
+    - ``no_trials``: no scores available for the subgroup
+    - ``no_targets``: the subgroup contains only non-target trials
+    - ``no_nontargets``: the subgroup contains only target trials
+    - ``min_trials``: the subgroup contains fewer than min_trials trials
+
+    and all other subgroups obtain the status ``ok``.
+
+    :param trial_counts: Dictionary with a tuple (trials, targets) per subgroup of every speaker group
+    :type trial_counts: dict
+    :param min_trials: Minimum number of trials of a subgroup. If not specified in config file, default is 0
+    :type min_trials: int
+
+    :returns: subgroup_diagnostics with one row per subgroup and the columns speaker_groups, group_name, trials, targets, nontargets and status
+    :rtype: DataFrame
+
+    """
+
+    diagnostics = []
+    for group, subgroups in trial_counts.items():
+        for subgroup, (trials, targets) in subgroups.items():
+            nontargets = trials - targets
+
+            if trials == 0:
+                status = "no_trials"
+            elif targets == 0:
+                status = "no_targets"
+            elif nontargets == 0:
+                status = "no_nontargets"
+            elif trials < min_trials:
+                status = "min_trials"
+            else:
+                status = "ok"
+            diagnostics.append((group, subgroup, trials, targets, nontargets, status))
+
+    subgroup_diagnostics = pd.DataFrame(diagnostics, columns=["speaker_groups", "group_name", "trials", "targets", "nontargets", "status"])
+
+    return subgroup_diagnostics
+
+
+def get_inverse_frequency_weights(labels, trial_codes):
+    """ Trial weights that rebalance the trials of groups, e.g. the subgroups of a speaker group or the speakers, to equal shares. Target and non-target trials are
+    weighted separately: every trial of group g and class c obtains the weight N_c / (K_c * n_gc), where n_gc is the number of trials of group g and class c, N_c the
+    number of trials of class c in all groups and K_c the number of groups with trials of class c. The weights of a class sum up to its number of trials, so that the
+    weighted trials correspond to a resampled trial list of the same size. Trials with code -1, e.g. of speakers that are not in the speaker metadata, obtain the
+    weight 1.
+
+    :param labels: Array of labels; labels have to be either {-1,1} or {0,1}
+    :type labels: ndarray
+    :param trial_codes: Array of non-negative integer group codes per trial, -1 for trials without group
+    :type trial_codes: ndarray
+
+    :returns: weights
+    :rtype: ndarray
+
+    """
+
+    trial_codes = np.asarray(trial_codes, dtype=np.int64)
+    known = trial_codes >= 0
+    weights = np.ones(len(trial_codes))
+    if not known.any():
+        return weights
+
+    # one count per group and class
+    keys = trial_codes[known] * 2 + (np.asarray(labels)[known] == 1)
+    counts = np.bincount(keys).astype(np.float64)
+    for target in [0, 1]:
+        class_counts = counts[target::2]
+        num_groups = np.count_nonzero(class_counts)
+        if num_groups > 0:
+            class_counts[class_counts > 0] = class_counts.sum() / (num_groups * class_counts[class_counts > 0])
+    weights[known] = counts[keys]
+
+    return weights
+
+
+def get_bin_edges(values, edges=None, quantiles=None, bins=None):
+    """ Edges of the bins of a numeric attribute, either fixed edges, the values at the given quantiles or the edges of bins equally populated bins. Duplicate edges,
+    e.g. quantiles of many equal values, are merged.
+
+    :param values: Series of numeric attribute values, e.g. one per speaker
+    :type values: pandas.Series
+    :param edges: Optional list of fixed bin edges
+    :type edges: list
+    :param quantiles: Optional list of quantiles between 0 and 1
+    :type quantiles: list
+    :param bins: Optional number of equally populated bins
+    :type bins: int
+
+    :returns: bin_edges in ascending order
+    :rtype: ndarray
+
+    """
+
+    if edges is None:
+        if quantiles is None:
+            quantiles = np.arange(1, bins) / bins
+        edges = np.quantile(pd.to_numeric(values).values.astype(np.float64), quantiles)
+
+    bin_edges = np.unique(np.asarray(edges, dtype=np.float64))
+
+    return bin_edges
+
+
+def bin_attribute(values, bin_edges):
+    """ Assignment of numeric attribute values to the bins between the bin edges with one binary search, so that the binned attribute is categorical. Bins are labelled
+    by their interval, e.g. the edges [30, 50] give the bins "< 30", "[30, 50)" and ">= 50".
+
+    :param values: Series of numeric attribute values
+    :type values: pandas.Series
+    :param bin_edges: Bin edges in ascending order as returned by :py:func:`get_bin_edges`
+    :type bin_edges: ndarray
+
+    :returns: bin_labels, one per value
+    :rtype: ndarray
+
+    """
+
+    edge_labels = [format(edge, "g") for edge in bin_edges]
+    labels = np.array(["< " + edge_labels[0]] + ["[" + lower + ", " + upper + ")" for lower, upper in zip(edge_labels[:-1], edge_labels[1:])] +
+                      [">= " + edge_labels[-1]], dtype=object)
+    # a value equal to an edge belongs to the bin that starts at the edge, as with np.digitize
+    bin_labels = labels[np.searchsorted(bin_edges, pd.to_numeric(values).values.astype(np.float64), side="right")]
+
+    return bin_labels
+
+
+def bin_speaker_metadata(speaker_metadata, attribute_bins):
+    """ Binning of the numeric attributes of the speaker metadata with :py:func:`get_bin_edges` and :py:func:`bin_attribute`. Quantiles and equally populated bins are
+    computed over the speakers, i.e. the first row of every speaker id.
+
+    :param speaker_metadata: DataFrame that contains speaker metadata with speaker ids and speaker groups attributes as specified in config file
+    :type speaker_metadata: DataFrame
+    :param attribute_bins: Dictionary with the binning of every numeric attribute, e.g. {"Age": {"bins": 4}}, {"Age": {"quantiles": [0.5]}} or {"Age": {"edges": [30, 50]}}
+    :type attribute_bins: dict
+
+    :returns: speaker_metadata with binned attributes
+    :rtype: DataFrame
+
+    """
+
+    speaker_metadata = speaker_metadata.copy()
+    speakers = speaker_metadata.drop_duplicates("id")
+    for attribute, binning in attribute_bins.items():
+        bin_edges = get_bin_edges(speakers[attribute], edges=binning.get("edges"), quantiles=binning.get("quantiles"), bins=binning.get("bins"))
+        speaker_metadata[attribute] = bin_attribute(speaker_metadata[attribute], bin_edges)
+
+    return speaker_metadata
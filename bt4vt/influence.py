@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Created on 19-10-2026
+# @author: wiebket, AnnaLesch
+
+import numpy as np
+import pandas as pd
+
+from .discovery import compute_cell_metrics
+
+#########################################
+# Leave-one-speaker-out influence of the speakers of a subgroup. The trials of a subgroup are counted once per distinct
+# score, and the counts of every speaker are subtracted from the counts of the subgroup, so that the DET curve of the
+# subgroup without a speaker is obtained without sorting or evaluating its scores again. The DET curves of a block of
+# speakers are evaluated at once with :py:func:`discovery.compute_cell_metrics`.
+#########################################
+
+
+def compute_speaker_influence(scores, labels, speaker_codes, dcf_costs, weights=None, bins=None, block_size=2 ** 20):
+    """ Equal Error Rate and minimum of the detection cost function of a subgroup and of the subgroup without the trials of each of its speakers. The DET curves are
+    exact at all distinct scores, or approximated on bins equally spaced score thresholds as in :py:func:`evaluate.compute_det_curve_histogram` if bins is given. If
+    the scores are sorted in descending order, e.g. the subgroups of :py:func:`groups.split_scores_by_speaker_groups`, they are not sorted again. Speakers whose
+    removal leaves only one class of trials obtain NaN.
+
+    :param scores: Array of scores of the subgroup
+    :type scores: ndarray
+    :param labels: Array of labels; labels have to be either {-1,1} or {0,1}
+    :type labels: ndarray
+    :param speaker_codes: Array of the speaker code of every trial
+    :type speaker_codes: ndarray
+    :param dcf_costs: List of dcf costs as specified in config file
+    :type dcf_costs: list
+    :param weights: Optional array of non-negative trial weights
+    :type weights: ndarray
+    :param bins: Optional number of score thresholds. Default is all distinct scores.
+    :type bins: int
+    :param block_size: Number of counts that are evaluated at once, i.e. speakers times thresholds. Default is 2 ** 20.
+    :type block_size: int
+
+    :returns: speakers, trials per speaker, metrics of the subgroup, metrics without every speaker with one row per speaker. Metrics are the EER followed by the minimum DCF of every dcf cost.
+    :rtype: ndarray, ndarray, ndarray, ndarray
+
+    """
+
+    scores = np.asarray(scores, dtype=np.float64)
+    targets = np.asarray(labels) == 1
+    weights = np.ones(len(scores)) if weights is None else np.asarray(weights, dtype=np.float64)
+
+    # index of the threshold of every trial in ascending order of thresholds
+    if bins is not None:
+        thresholds = np.unique(np.linspace(scores.min(), scores.max(), bins))
+        threshold_index = np.searchsorted(thresholds, scores, side="right") - 1
+        num_thresholds = len(thresholds)
+    elif np.all(scores[:-1] >= scores[1:]):
+        is_new_score = np.empty(len(scores), dtype=np.int64)
+        is_new_score[0] = 0
+        np.not_equal(scores[1:], scores[:-1], out=is_new_score[1:])
+        distinct_index = np.cumsum(is_new_score)
+        num_thresholds = int(distinct_index[-1]) + 1
+        threshold_index = num_thresholds - 1 - distinct_index
+    else:
+        thresholds, threshold_index = np.unique(scores, return_inverse=True)
+        num_thresholds = len(thresholds)
+    keys = threshold_index * 2 + targets
+
+    # counts of the subgroup with shape (thresholds, 2), the last axis counts non-targets and targets
+    counts = np.bincount(keys, weights=weights, minlength=num_thresholds * 2).reshape(num_thresholds, 2)
+    metrics = compute_cell_metrics(counts[np.newaxis], dcf_costs)[0]
+
+    speakers, speaker_index = np.unique(np.asarray(speaker_codes), return_inverse=True)
+    speaker_index = speaker_index.reshape(-1)
+    trials = np.bincount(speaker_index, minlength=len(speakers))
+    speaker_targets = np.bincount(speaker_index, weights=targets, minlength=len(speakers))
+    order = np.argsort(speaker_index, kind="stable")
+    bounds = np.searchsorted(speaker_index[order], np.arange(len(speakers) + 1))
+
+    metrics_without = np.full((len(speakers), len(metrics)), np.nan)
+    speakers_per_block = max(1, block_size // num_thresholds)
+    for start in range(0, len(speakers), speakers_per_block):
+        end = min(start + speakers_per_block, len(speakers))
+        block_trials = order[bounds[start]:bounds[end]]
+        block_keys = (speaker_index[block_trials] - start) * num_thresholds * 2 + keys[block_trials]
+        speaker_counts = np.bincount(block_keys, weights=weights[block_trials], minlength=(end - start) * num_thresholds * 2)
+        speaker_counts = speaker_counts.reshape(end - start, num_thresholds, 2)
+        # the counts of the subgroup without a speaker are the counts of the subgroup minus the counts of the speaker
+        np.subtract(counts, speaker_counts, out=speaker_counts)
+        metrics_without[start:end] = compute_cell_metrics(speaker_counts, dcf_costs)
+
+    # weighted counts of the remaining trials can differ from zero by rounding errors, the classes are checked on the number of trials
+    remaining_targets = np.count_nonzero(targets) - speaker_targets
+    remaining_nontargets = len(scores) - np.count_nonzero(targets) - (trials - speaker_targets)
+    metrics_without[(remaining_targets == 0) | (remaining_nontargets == 0)] = np.nan
+
+    return speakers, trials, metrics, metrics_without
+
+
+def rank_speaker_influence(speakers, trials, metrics, metrics_without, dcf_costs, top_k=10, rank_by="EER"):
+    """ Ranking of the speakers of a subgroup by their influence on a metric, i.e. the metric of the subgroup minus the metric of the subgroup without the speaker.
+    Speakers with a positive influence increase the metric of the subgroup, the speakers with the highest influence are ranked first.
+
+    :param speakers: Array of speaker codes as returned by :py:func:`compute_speaker_influence`
+    :type speakers: ndarray
+    :param trials: Array of the number of trials of every speaker
+    :type trials: ndarray
+    :param metrics: Metrics of the subgroup
+    :type metrics: ndarray
+    :param metrics_without: Metrics of the subgroup without every speaker
+    :type metrics_without: ndarray
+    :param dcf_costs: List of dcf costs as specified in config file
+    :type dcf_costs: list
+    :param top_k: Number of speakers to return. Default is 10.
+    :type top_k: int
+    :param rank_by: EER or minDCF, the metric whose influence ranks the speakers. minDCF refers to the first dcf cost. Default is EER.
+    :type rank_by: str
+
+    :returns: speaker_influence with the columns rank, speaker_code, trials and for every metric the metric, the metric without speaker and the influence
+    :rtype: DataFrame
+
+    """
+
+    if rank_by not in ["EER", "minDCF"]:
+        raise ValueError("rank_by must be EER or minDCF")
+
+    metric_names = ["EER"] + ["DCF " + str(cost) for cost in dcf_costs]
+    influence = metrics[np.newaxis, :] - metrics_without
+    rank_column = 0 if rank_by == "EER" else 1
+    ranking = np.argsort(-np.nan_to_num(influence[:, rank_column], nan=-np.inf), kind="stable")[:top_k]
+
+    speaker_influence = pd.DataFrame({"rank": np.arange(1, len(ranking) + 1), "speaker_code": np.asarray(speakers)[ranking],
+                                      "trials": np.asarray(trials)[ranking]})
+    for index, metric_name in enumerate(metric_names):
+        speaker_influence[metric_name] = metrics[index]
+        speaker_influence[metric_name + " without speaker"] = metrics_without[ranking, index]
+        speaker_influence[metric_name + " influence"] = influence[ranking, index]
+
+    return speaker_influence
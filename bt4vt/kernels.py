@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Created on 19-10-2026
+# @author: wiebket, AnnaLesch
+
+import os
+import numpy as np
+
+#########################################
+# Optional JIT compiled kernels. If Numba is installed, the DET curve, the Equal Error Rate and all minimum detection
+# cost functions are computed in a counting pass and a fused fill pass over the sorted scores, without temporary arrays
+# per DET point. The results are identical to :py:func:`evaluate.compute_det_curve`, :py:func:`metrics.compute_eer` and
+# :py:func:`metrics.compute_min_cdet`. Set the environment variable BT4VT_DISABLE_JIT=1 to use the NumPy path.
+#########################################
+
+_jit_kernels = None
+
+
+def _det_range_loop(sorted_scores, sorted_targets, sorted_weights=None):
+    """Counting pass of the fused computation over scores sorted in descending order: number of targets and non-targets, last DET point without false positives
+    and first DET point with all targets. Point 0 is the threshold at infinity, point j > 0 is the j-th distinct score in descending order. With sorted_weights,
+    trials are counted with their weights. This function is compiled with Numba if it is installed, it runs as plain Python otherwise.
+
+    :param sorted_scores: Array of scores sorted in descending order
+    :type sorted_scores: ndarray
+    :param sorted_targets: Boolean array of targets in the order of sorted_scores
+    :type sorted_targets: ndarray
+    :param sorted_weights: Optional array of non-negative trial weights in the order of sorted_scores
+    :type sorted_weights: ndarray
+
+    :returns: p_count, n_count, last_zero_fps_point, first_all_tps_point. The points are -1 if only one class is present.
+    :rtype: float, float, int, int
+
+    """
+
+    num_trials = len(sorted_scores)
+
+    # without weights every trial counts 1 and the counts stay integers. The branches on sorted_weights are resolved when the kernel is compiled.
+    p_count = 0
+    n_count = 0
+    for index in range(num_trials):
+        if sorted_weights is None:
+            weight = 1
+        else:
+            weight = sorted_weights[index]
+        if sorted_targets[index]:
+            p_count += weight
+        else:
+            n_count += weight
+    if p_count == 0 or n_count == 0:
+        return p_count, n_count, -1, -1
+
+    tps = 0
+    fps = 0
+    point = 0
+    last_zero_fps_point = 0
+    first_all_tps_point = -1
+    for index in range(num_trials):
+        if sorted_weights is None:
+            weight = 1
+        else:
+            weight = sorted_weights[index]
+        if sorted_targets[index]:
+            tps += weight
+        else:
+            fps += weight
+        if index == num_trials - 1 or sorted_scores[index + 1] != sorted_scores[index]:
+            point += 1
+            if fps == 0:
+                last_zero_fps_point = point
+            if tps == p_count and first_all_tps_point < 0:
+                first_all_tps_point = point
+
+    return p_count, n_count, last_zero_fps_point, first_all_tps_point
+
+
+def _det_metrics_loop(sorted_scores, sorted_targets, dcf_costs, p_count, n_count, last_zero_fps_point, first_all_tps_point, fprs, fnrs, thresholds, min_cdets,
+                      min_cdet_thresholds, sorted_weights=None):
+    """Fill pass of the fused computation of the DET curve, the Equal Error Rate and the minimum detection cost functions of scores sorted in descending order. The DET
+    points from last_zero_fps_point to first_all_tps_point of :py:func:`_det_range_loop` are written in ascending order of thresholds into fprs, fnrs and thresholds
+    while the metrics are updated. Minima are taken at the lowest threshold, as with np.nanargmin over the ascending DET curve. This function is compiled with Numba
+    if it is installed, it runs as plain Python otherwise.
+
+    :param sorted_scores: Array of scores sorted in descending order
+    :type sorted_scores: ndarray
+    :param sorted_targets: Boolean array of targets in the order of sorted_scores
+    :type sorted_targets: ndarray
+    :param dcf_costs: Array of weights for the detection cost function with one row (dcf_p_target, dcf_c_fp, dcf_c_fn) per cost
+    :type dcf_costs: ndarray
+    :param p_count: number of targets
+    :type p_count: float
+    :param n_count: number of non-targets
+    :type n_count: float
+    :param last_zero_fps_point: last DET point without false positives
+    :type last_zero_fps_point: int
+    :param first_all_tps_point: first DET point with all targets
+    :type first_all_tps_point: int
+    :param fprs: Output array of False Positive Rates with first_all_tps_point - last_zero_fps_point + 1 elements
+    :type fprs: ndarray
+    :param fnrs: Output array of False Negative Rates with first_all_tps_point - last_zero_fps_point + 1 elements
+    :type fnrs: ndarray
+    :param thresholds: Output array of thresholds with first_all_tps_point - last_zero_fps_point + 1 elements
+    :type thresholds: ndarray
+    :param min_cdets: Output array of minimum detection cost functions, one per cost
+    :type min_cdets: ndarray
+    :param min_cdet_thresholds: Output array of minimum detection cost function thresholds, one per cost
+    :type min_cdet_thresholds: ndarray
+    :param sorted_weights: Optional array of non-negative trial weights in the order of sorted_scores
+    :type sorted_weights: ndarray
+
+    :returns: eer, eer_threshold
+    :rtype: float, float
+
+    """
+
+    num_trials = len(sorted_scores)
+
+    eer_diff = np.inf
+    eer = np.nan
+    eer_threshold = np.nan
+    min_cdets[:] = np.inf
+    min_cdet_thresholds[:] = np.nan
+    tps = 0
+    fps = 0
+    point = 0
+    index = 0
+    while point <= first_all_tps_point:
+        if point > 0:
+            while True:
+                if sorted_weights is None:
+                    weight = 1
+                else:
+                    weight = sorted_weights[index]
+                if sorted_targets[index]:
+                    tps += weight
+                else:
+                    fps += weight
+                index += 1
+                if index == num_trials or sorted_scores[index] != sorted_scores[index - 1]:
+                    break
+            threshold = sorted_scores[index - 1]
+        else:
+            threshold = np.inf
+        if point >= last_zero_fps_point:
+            fpr = fps / n_count
+            fnr = (p_count - tps) / p_count
+            output_index = first_all_tps_point - point
+            fprs[output_index] = fpr
+            fnrs[output_index] = fnr
+            thresholds[output_index] = threshold
+            # <= keeps the lowest threshold among equal values, points are visited in descending order of thresholds
+            diff = abs(fnr - fpr)
+            if diff <= eer_diff:
+                eer_diff = diff
+                eer = max(fpr, fnr) * 100
+                eer_threshold = threshold
+            for cost_index in range(dcf_costs.shape[0]):
+                cdet = fnr * dcf_costs[cost_index, 2] * dcf_costs[cost_index, 0] + fpr * dcf_costs[cost_index, 1] * (1 - dcf_costs[cost_index, 0])
+                if cdet <= min_cdets[cost_index]:
+                    min_cdets[cost_index] = cdet
+                    min_cdet_thresholds[cost_index] = threshold
+        point += 1
+
+    return eer, eer_threshold
+
+
+def jit_enabled():
+    """Check whether the JIT compiled kernels are used, i.e. Numba is installed and the environment variable BT4VT_DISABLE_JIT is not set.
+
+    :returns: jit_enabled
+    :rtype: bool
+
+    """
+
+    if os.environ.get("BT4VT_DISABLE_JIT", "0") not in ["", "0"]:
+        return False
+    try:
+        import numba  # noqa: F401
+    except ImportError:
+        return False
+
+    return True
+
+
+def _get_jit_kernels():
+    """Compilation of :py:func:`_det_range_loop` and :py:func:`_det_metrics_loop` with Numba on first use. Compiled code is cached on disk next to this module.
+
+    """
+
+    global _jit_kernels
+
+    if _jit_kernels is None:
+        import numba
+
+        _jit_kernels = (numba.njit(cache=True, nogil=True)(_det_range_loop), numba.njit(cache=True, nogil=True)(_det_metrics_loop))
+
+    return _jit_kernels
+
+
+def evaluate_sorted_scores(sorted_scores, sorted_targets, dcf_costs, jit=True, sorted_weights=None):
+    """Computation of the DET curve, the Equal Error Rate and the minimum detection cost functions of scores sorted in descending order with the fused kernels
+    :py:func:`_det_range_loop` and :py:func:`_det_metrics_loop`. The counting pass determines the number of DET points, so that the output arrays are allocated with
+    their final size.
+
+    :param sorted_scores: Array of scores sorted in descending order
+    :type sorted_scores: ndarray
+    :param sorted_targets: Boolean array of targets in the order of sorted_scores
+    :type sorted_targets: ndarray
+    :param dcf_costs: list of tuples specifying the weights for the detection cost function (dcf_p_target, dcf_c_fp, dcf_c_fn)
+    :type dcf_costs: list
+    :param jit: Use the Numba compiled kernels. If set to False, the kernels run as plain Python, which is only meant for tests. Default is set to True.
+    :type jit: bool
+    :param sorted_weights: Optional array of non-negative trial weights in the order of sorted_scores
+    :type sorted_weights: ndarray
+
+    :returns: fprs, fnrs, thresholds, eer, eer_threshold, min_cdets, min_cdet_thresholds
+    :rtype: ndarray, ndarray, ndarray, float, float, ndarray, ndarray
+
+    """
+
+    sorted_scores = np.ascontiguousarray(sorted_scores)
+    if sorted_scores.dtype != np.float32 and sorted_scores.dtype != np.float64:
+        sorted_scores = sorted_scores.astype(np.float64)
+    sorted_targets = np.ascontiguousarray(sorted_targets, dtype=np.bool_)
+    dcf_costs = np.asarray(dcf_costs, dtype=np.float64).reshape(-1, 3)
+    if sorted_weights is not None:
+        sorted_weights = np.ascontiguousarray(sorted_weights, dtype=np.float64)
+
+    range_kernel, metrics_kernel = _get_jit_kernels() if jit else (_det_range_loop, _det_metrics_loop)
+    p_count, n_count, last_zero_fps_point, first_all_tps_point = range_kernel(sorted_scores, sorted_targets, sorted_weights)
+    if first_all_tps_point < 0:
+        raise ValueError("Only one class is present in labels. Detection error tradeoff curve is not defined in that case.")
+
+    num_points = first_all_tps_point - last_zero_fps_point + 1
+    fprs = np.empty(num_points)
+    fnrs = np.empty(num_points)
+    thresholds = np.empty(num_points)
+    min_cdets = np.empty(len(dcf_costs))
+    min_cdet_thresholds = np.empty(len(dcf_costs))
+    eer, eer_threshold = metrics_kernel(sorted_scores, sorted_targets, dcf_costs, p_count, n_count, last_zero_fps_point, first_all_tps_point, fprs, fnrs, thresholds,
+                                        min_cdets, min_cdet_thresholds, sorted_weights)
+
+    # metrics are returned as NumPy floats like in the NumPy path
+    return fprs, fnrs, thresholds, np.float64(eer), np.float64(eer_threshold), min_cdets, min_cdet_thresholds
@@ -5,7 +5,6 @@
 # @author: wiebket, AnnaLesch
 
 import numpy as np
-import scipy as sp
 import pandas as pd
 
 #########################################
@@ -60,8 +59,7 @@ def compute_min_cdet(fprs, fnrs, thresholds, dcf_p_target, dcf_c_fp, dcf_c_fn):
     :rtype: float, float
     """
 
-    cdet = np.array([fnr * dcf_c_fn * dcf_p_target for fnr in fnrs]) + np.array(
-        [fpr * dcf_c_fp * (1 - dcf_p_target) for fpr in fprs])
+    cdet = np.asarray(fnrs, dtype=np.float64) * dcf_c_fn * dcf_p_target + np.asarray(fprs, dtype=np.float64) * dcf_c_fp * (1 - dcf_p_target)
     min_ix = np.nanargmin(cdet)
     min_cdet = cdet[min_ix]
     min_cdet_threshold = thresholds[min_ix]
@@ -69,6 +67,95 @@ def compute_min_cdet(fprs, fnrs, thresholds, dcf_p_target, dcf_c_fp, dcf_c_fn):
     return min_cdet, min_cdet_threshold
 
 
+def _norm_ppf(values):
+    """Percent point function (inverse of the cumulative distribution function) of the standard normal distribution.
+    Uses scipy if it is installed and falls back to the Python standard library otherwise.
+
+    :param values: Array of probabilities
+    :type values: ndarray
+
+    :returns: ppf_values
+    :rtype: ndarray
+
+    """
+
+    try:
+        from scipy.stats import norm
+    except ImportError:
+        from statistics import NormalDist
+
+        values = np.asarray(values, dtype=np.float64)
+        ppf_values = np.full(values.shape, np.nan)
+        inside = (values > 0) & (values < 1)
+        ppf_values[inside] = [NormalDist().inv_cdf(value) for value in values[inside]]
+        ppf_values[values == 0] = -np.inf
+        ppf_values[values == 1] = np.inf
+    else:
+        ppf_values = norm.ppf(values)
+
+    return ppf_values
+
+
+def _get_threshold_index(thresholds, threshold_values):
+    """Get the indices of the thresholds that are closest to the given threshold values. The thresholds have to be sorted
+    in ascending order, as returned by :py:func:`evaluate.compute_fpfnth`. If two thresholds are equally close, the lower
+    one is selected.
+
+    :param thresholds: Array of Threshold values sorted in ascending order
+    :type thresholds: ndarray
+    :param threshold_values: Threshold values to look up
+    :type threshold_values: ndarray
+
+    :returns: threshold_index
+    :rtype: ndarray
+
+    """
+
+    thresholds = np.asarray(thresholds)
+    threshold_values = np.asarray(threshold_values, dtype=np.float64)
+
+    # position of the first threshold >= threshold value and the threshold just below it
+    upper_ix = np.clip(np.searchsorted(thresholds, threshold_values, side="left"), 0, len(thresholds) - 1)
+    lower_ix = np.clip(upper_ix - 1, 0, len(thresholds) - 1)
+    with np.errstate(invalid="ignore"):
+        lower_diff = np.absolute(threshold_values - thresholds[lower_ix])
+        upper_diff = np.absolute(thresholds[upper_ix] - threshold_values)
+    threshold_index = np.where(lower_diff <= upper_diff, lower_ix, upper_ix)
+
+    return threshold_index
+
+
+def get_fpfn_at_thresholds(fprs, fnrs, thresholds, threshold_values, ppf_norm=False):
+    """Get the False Positive Rates and False Negative Rates at many threshold values at once. For each threshold value the
+    closest threshold of the DET curve is looked up with a single binary search over the sorted thresholds.
+
+    :param fprs: Array of False Positive Rates
+    :type fprs: ndarray
+    :param fnrs: Array of False Negative Rates
+    :type fnrs: ndarray
+    :param thresholds: Array of Threshold values corresponding to fprs and fnrs, sorted in ascending order
+    :type thresholds: ndarray
+    :param threshold_values: Threshold values to get fprs and fnrs for
+    :type threshold_values: ndarray
+    :param ppf_norm: normalise the fpr and fnr values to the percent point function. Default is set to False.
+    :type ppf_norm: bool
+
+    :returns: fprs_at_thresholds, fnrs_at_thresholds
+    :rtype: ndarray, ndarray
+
+    """
+
+    threshold_index = _get_threshold_index(thresholds, threshold_values)
+    fprs_at_thresholds = np.asarray(fprs)[threshold_index]
+    fnrs_at_thresholds = np.asarray(fnrs)[threshold_index]
+
+    if ppf_norm:
+        fprs_at_thresholds = _norm_ppf(fprs_at_thresholds)
+        fnrs_at_thresholds = _norm_ppf(fnrs_at_thresholds)
+
+    return fprs_at_thresholds, fnrs_at_thresholds
+
+
 def get_fpfn_at_threshold(fprs, fnrs, thresholds, threshold_value, ppf_norm=False):
     """Get the False Positive Rate and False Negative Rate at a given threshold value.
 
@@ -88,18 +175,36 @@ def get_fpfn_at_threshold(fprs, fnrs, thresholds, threshold_value, ppf_norm=Fals
 
     """
     # Find the index in df that is closest to the SUBGROUP minimum threshold value
-    threshold_diff = np.array([abs(i - threshold_value) for i in thresholds])
-
-    if ppf_norm:
-        fpr_at_threshold = sp.stats.norm.ppf(fprs)[np.ndarray.argmin(threshold_diff)]
-        fnr_at_threshold = sp.stats.norm.ppf(fnrs)[np.ndarray.argmin(threshold_diff)]
-    else:
-        fpr_at_threshold = fprs[np.ndarray.argmin(threshold_diff)]
-        fnr_at_threshold = fnrs[np.ndarray.argmin(threshold_diff)]
+    fprs_at_threshold, fnrs_at_threshold = get_fpfn_at_thresholds(fprs, fnrs, thresholds, [threshold_value],
+                                                                  ppf_norm=ppf_norm)
+    fpr_at_threshold = fprs_at_threshold[0]
+    fnr_at_threshold = fnrs_at_threshold[0]
 
     return fpr_at_threshold, fnr_at_threshold
 
 
+def get_thresholds_at_fprs(fprs, thresholds, target_fprs):
+    """Get the lowest threshold values at which the False Positive Rate does not exceed the target False Positive Rates.
+
+    :param fprs: Array of False Positive Rates, decreasing with increasing thresholds
+    :type fprs: ndarray
+    :param thresholds: Array of Threshold values corresponding to fprs, sorted in ascending order
+    :type thresholds: ndarray
+    :param target_fprs: Target False Positive Rates
+    :type target_fprs: ndarray
+
+    :returns: threshold_values
+    :rtype: ndarray
+
+    """
+
+    fprs = np.asarray(fprs)
+    threshold_index = np.searchsorted(-fprs, -np.asarray(target_fprs, dtype=np.float64), side="left")
+    threshold_values = np.asarray(thresholds)[np.clip(threshold_index, 0, len(thresholds) - 1)]
+
+    return threshold_values
+
+
 def compute_cdet_at_threshold(fprs, fnrs, thresholds, threshold_value, dcf_p_target, dcf_c_fp, dcf_c_fn):
     """Computation of detection cost function at a given threshold. Computation is performed as defined in the `NIST Speaker Recognition Evaluation Plan 2019 <https://www.nist.gov/itl/iad/mig/nist-2019-speaker-recognition-evaluation>`_
 
@@ -131,6 +236,180 @@ def compute_cdet_at_threshold(fprs, fnrs, thresholds, threshold_value, dcf_p_tar
     return cdet_at_threshold
 
 
+#########################################
+# In this section we compute calibration metrics, scores are interpreted as log-likelihood ratios
+# 1. Log-likelihood ratio cost (Cllr)
+# 2. Actual Detection Cost Function (actDCF) at the Bayes threshold
+#########################################
+
+def get_bayes_thresholds(dcf_costs):
+    """Computation of the Bayes decision thresholds of calibrated log-likelihood ratio scores for the weights of the detection cost function.
+
+    .. math:: \\theta_{Bayes} = \\log \\frac{C_{FP} \\times (1 - P_{Target})}{C_{FN} \\times P_{Target}}
+
+    :param dcf_costs: list of tuples specifying the weights for the detection cost function (dcf_p_target, dcf_c_fp, dcf_c_fn)
+    :type dcf_costs: list
+
+    :returns: bayes_thresholds
+    :rtype: ndarray
+
+    """
+
+    dcf_costs = np.asarray(dcf_costs, dtype=np.float64).reshape(-1, 3)
+    bayes_thresholds = np.log(dcf_costs[:, 1] * (1 - dcf_costs[:, 0])) - np.log(dcf_costs[:, 2] * dcf_costs[:, 0])
+
+    return bayes_thresholds
+
+
+def _segment_sums(values, segment_bounds):
+    """Sums of contiguous segments of an array, segment i spans values[segment_bounds[i]:segment_bounds[i + 1]]. Every segment is summed on its own with
+    np.add.reduceat, so that the sum of a small segment does not lose precision to the sums of the preceding segments. Empty segments sum to 0.
+
+    :param values: Array of values, the last axis is segmented
+    :type values: ndarray
+    :param segment_bounds: Array of segment boundaries in ascending order, ending at the length of the last axis
+    :type segment_bounds: ndarray
+
+    :returns: segment_sums
+    :rtype: ndarray
+
+    """
+
+    segment_sums = np.zeros(values.shape[:-1] + (len(segment_bounds) - 1,))
+    # reduceat sums from every start to the next start, the start of an empty segment is the start of the next segment and is skipped
+    is_nonempty = segment_bounds[1:] > segment_bounds[:-1]
+    if is_nonempty.any():
+        segment_sums[..., is_nonempty] = np.add.reduceat(values, segment_bounds[:-1][is_nonempty], axis=-1)
+
+    return segment_sums
+
+
+def compute_calibration_metrics(labels, scores, segment_bounds, dcf_costs, trials=None):
+    """Computation of the log-likelihood ratio cost (Cllr) and of the actual detection cost function (actDCF) of several subgroups in one batch. The scores of all
+    subgroups are stored in one contiguous array, the scores of subgroup i span scores[segment_bounds[i]:segment_bounds[i + 1]]. The log-likelihood ratio cost is
+    computed with the numerically stable softplus log(1 + exp(x)) = logaddexp(0, x).
+
+    .. math:: C_{llr} = \\frac{1}{2 \\log 2} \\left( \\frac{1}{N_{Target}} \\sum_{t} \\log(1 + e^{-s_t}) + \\frac{1}{N_{NonTarget}} \\sum_{n} \\log(1 + e^{s_n}) \\right)
+
+    The actual detection cost function is the detection cost function at the Bayes threshold of :py:func:`get_bayes_thresholds`, trials with score >= threshold are accepted.
+
+    :param labels: Array of labels; labels have to be either {-1,1} or {0,1}
+    :type labels: ndarray
+    :param scores: Array of log-likelihood ratio scores
+    :type scores: ndarray
+    :param segment_bounds: Array of segment boundaries of the subgroups in ascending order, starting at 0 and ending at len(scores)
+    :type segment_bounds: ndarray
+    :param dcf_costs: list of tuples specifying the weights for the detection cost function (dcf_p_target, dcf_c_fp, dcf_c_fn)
+    :type dcf_costs: list
+    :param trials: Optional array with the number of trials of every score, e.g. of score counts. Default is one trial per score.
+    :type trials: ndarray
+
+    :returns: cllrs with one value per subgroup, act_dcfs with one row per subgroup and one column per dcf cost. Subgroups without target or non-target trials obtain NaN.
+    :rtype: ndarray, ndarray
+
+    """
+
+    scores = np.asarray(scores, dtype=np.float64)
+    targets = np.asarray(labels) == 1
+    segment_bounds = np.asarray(segment_bounds)
+    dcf_costs = np.asarray(dcf_costs, dtype=np.float64).reshape(-1, 3)
+
+    trials = np.ones(len(scores)) if trials is None else np.asarray(trials, dtype=np.float64)
+
+    target_counts = _segment_sums(targets * trials, segment_bounds)
+    nontarget_counts = _segment_sums(~targets * trials, segment_bounds)
+
+    # target trials cost log(1 + exp(-s)), non-target trials cost log(1 + exp(s))
+    llr_costs = np.logaddexp(0, np.where(targets, -scores, scores)) * trials
+    target_costs = _segment_sums(np.where(targets, llr_costs, 0), segment_bounds)
+    nontarget_costs = _segment_sums(np.where(targets, 0, llr_costs), segment_bounds)
+
+    # one row of decisions per dcf cost
+    accepted = scores >= get_bayes_thresholds(dcf_costs)[:, np.newaxis]
+    false_negatives = _segment_sums((~accepted & targets) * trials, segment_bounds)
+    false_positives = _segment_sums((accepted & ~targets) * trials, segment_bounds)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cllrs = (target_costs / target_counts + nontarget_costs / nontarget_counts) / (2 * np.log(2))
+        fnrs = false_negatives / target_counts
+        fprs = false_positives / nontarget_counts
+    act_dcfs = (fnrs * (dcf_costs[:, 2] * dcf_costs[:, 0])[:, np.newaxis] + fprs * (dcf_costs[:, 1] * (1 - dcf_costs[:, 0]))[:, np.newaxis]).T
+
+    return cllrs, act_dcfs
+
+
+#########################################
+# In this section we compute speaker level metrics
+# 1. False Positive and False Negative Rates per speaker at given thresholds
+# 2. Worst performing speakers per subgroup
+#########################################
+
+def compute_speaker_error_rates(speaker_codes, labels, scores, threshold_values, num_speakers):
+    """Computation of the False Positive Rates and False Negative Rates of every speaker at the given threshold values.
+    Trials are attributed to speakers by integer speaker codes and error counts are aggregated with one vectorized
+    groupby (np.bincount) per threshold value. Speakers without target or non-target trials obtain NaN rates.
+
+    :param speaker_codes: Array of integer speaker codes between 0 and num_speakers - 1, one per trial
+    :type speaker_codes: ndarray
+    :param labels: Array of labels; labels have to be either {-1,1} or {0,1}
+    :type labels: ndarray
+    :param scores: Array of scores
+    :type scores: ndarray
+    :param threshold_values: Threshold values at which trials with score >= threshold are accepted
+    :type threshold_values: list
+    :param num_speakers: Number of speakers
+    :type num_speakers: int
+
+    :returns: target_counts, nontarget_counts, fprs, fnrs with one row per speaker and one column per threshold value
+    :rtype: ndarray, ndarray, ndarray, ndarray
+
+    """
+
+    speaker_codes = np.asarray(speaker_codes)
+    scores = np.asarray(scores)
+    targets = np.asarray(labels) == 1
+
+    target_counts = np.bincount(speaker_codes, weights=targets, minlength=num_speakers)
+    nontarget_counts = np.bincount(speaker_codes, weights=~targets, minlength=num_speakers)
+
+    fprs = np.empty((num_speakers, len(threshold_values)))
+    fnrs = np.empty((num_speakers, len(threshold_values)))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for index, threshold_value in enumerate(threshold_values):
+            accepted = scores >= threshold_value
+            false_positives = np.bincount(speaker_codes, weights=accepted & ~targets, minlength=num_speakers)
+            false_negatives = np.bincount(speaker_codes, weights=~accepted & targets, minlength=num_speakers)
+            fprs[:, index] = false_positives / nontarget_counts
+            fnrs[:, index] = false_negatives / target_counts
+
+    return target_counts, nontarget_counts, fprs, fnrs
+
+
+def get_worst_speakers(speaker_costs, speaker_index, top_k):
+    """Selection of the top_k speakers with the highest cost among a subset of speakers. A partial sort
+    (np.argpartition) is used, so that only the selected speakers are fully sorted. Speakers with NaN costs are ignored.
+
+    :param speaker_costs: Array of costs for all speakers, i.e. the detection cost function of each speaker
+    :type speaker_costs: ndarray
+    :param speaker_index: Indices of the speakers to select from, i.e. the speakers of one subgroup
+    :type speaker_index: ndarray
+    :param top_k: Number of speakers to select
+    :type top_k: int
+
+    :returns: worst_speaker_index sorted from highest to lowest cost
+    :rtype: ndarray
+
+    """
+
+    speaker_index = np.asarray(speaker_index)
+    speaker_index = speaker_index[~np.isnan(speaker_costs[speaker_index])]
+    if len(speaker_index) > top_k:
+        speaker_index = speaker_index[np.argpartition(-speaker_costs[speaker_index], top_k - 1)[:top_k]]
+    worst_speaker_index = speaker_index[np.argsort(-speaker_costs[speaker_index], kind="stable")]
+
+    return worst_speaker_index
+
+
 #########################################
 # In this section we compute bias metrics
 # 1. Ratio of group mincdet / average mincdet
@@ -157,8 +436,64 @@ def compute_metrics_ratios(metrics):
     return metrics_ratios
 
 
-def compute_fpfn_ratio(fpfnth, metrics, metrics_baseline, filter_keys: list, threshold_type):
+def compute_operating_points(fprs, fnrs, thresholds, threshold_values, dcf_costs):
+    """Computation of the False Positive Rates, False Negative Rates and detection cost functions of a single DET curve
+    at a grid of threshold values.
+
+    :param fprs: Array of False Positive Rates
+    :type fprs: ndarray
+    :param fnrs: Array of False Negative Rates
+    :type fnrs: ndarray
+    :param thresholds: Array of Threshold values corresponding to fprs and fnrs, sorted in ascending order
+    :type thresholds: ndarray
+    :param threshold_values: Grid of threshold values at which to evaluate the operating points
+    :type threshold_values: ndarray
+    :param dcf_costs: list of tuples specifying the weights for the detection cost function (dcf_p_target, dcf_c_fp, dcf_c_fn)
+    :type dcf_costs: list
+
+    :returns: operating_points with columns FPR, FNR and one DCF column per dcf_costs tuple
+    :rtype: dict
+
+    """
+
+    threshold_values = np.asarray(threshold_values, dtype=np.float64)
+    if len(thresholds) == 0:
+        fprs_at_thresholds = np.full(len(threshold_values), np.nan)
+        fnrs_at_thresholds = np.full(len(threshold_values), np.nan)
+    else:
+        fprs_at_thresholds, fnrs_at_thresholds = get_fpfn_at_thresholds(fprs, fnrs, thresholds, threshold_values)
+
+    operating_points = {"FPR": fprs_at_thresholds, "FNR": fnrs_at_thresholds}
+    for cost in dcf_costs:
+        operating_points["DCF " + str(cost)] = fprs_at_thresholds * cost[1] * (1 - cost[0]) + \
+                                              fnrs_at_thresholds * cost[2] * cost[0]
+
+    return operating_points
+
+
+def compute_fpfn_ratio(operating_points):
+    """Computation of operating point ratios defined as the subgroup FPR, FNR and DCF at a threshold divided by the average
+    FPR, FNR and DCF at the same threshold. This shows the real life impact of threshold settings on speaker groups.
+
+    :param operating_points: DataFrame with columns speaker_groups, group_name, threshold and one column per operating point metric, as created by :py:meth:`core.SpeakerBiasTest.run_operating_point_analysis`. Rows where group_name is average are used as baseline.
+    :type operating_points: DataFrame
+
+    :returns: operating_points with an additional ratio column per operating point metric
+    :rtype: DataFrame
+
+    """
+
+    metric_columns = [column for column in operating_points.columns
+                      if column not in ("speaker_groups", "group_name", "threshold")]
+    average = operating_points.loc[operating_points["group_name"] == "average", metric_columns].values
+
+    # every subgroup is evaluated on the same threshold grid, so rows align with the average by position
+    grid_position = operating_points.groupby(["speaker_groups", "group_name"], sort=False).cumcount().values
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratios = operating_points[metric_columns].values / average[grid_position]
 
-    # nice function for future to understand the real life impact of threshold settings
+    operating_points = operating_points.copy()
+    for index, column in enumerate(metric_columns):
+        operating_points[column + " ratio"] = ratios[:, index]
 
-    return
+    return operating_points
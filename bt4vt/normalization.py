@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Created on 19-10-2026
+# @author: wiebket, AnnaLesch
+
+import numpy as np
+import pandas as pd
+
+#########################################
+# Score normalisation with a cohort score matrix. Every utterance has a row of scores against the cohort, and the mean and
+# standard deviation of a row (or of its top_k highest scores for adaptive normalisation) are computed once per utterance.
+# The trials then only gather the statistics of their reference and test utterances.
+#########################################
+
+NORMALIZATIONS = ["z-norm", "t-norm", "s-norm", "as-norm"]
+
+
+def compute_cohort_statistics(cohort_scores, rows=None, top_k=None, block_size=4096):
+    """Mean and standard deviation of the cohort scores of every utterance. If top_k is given, only the top_k highest cohort scores of every utterance are used, which
+    are selected with np.partition in linear time. Rows are processed in blocks of block_size rows, so that the memory does not grow with the number of utterances.
+
+    :param cohort_scores: cohort score matrix with one row per utterance and one column per cohort utterance
+    :type cohort_scores: ndarray
+    :param rows: Optional rows of the utterances for which statistics are computed, default is all rows
+    :type rows: ndarray
+    :param top_k: Optional number of highest cohort scores per utterance, default is all cohort scores
+    :type top_k: int
+    :param block_size: number of rows per block
+    :type block_size: int
+
+    :returns: means, stds
+    :rtype: ndarray, ndarray
+
+    """
+
+    if rows is None:
+        rows = np.arange(len(cohort_scores))
+    num_cohort = cohort_scores.shape[1]
+    if top_k is not None and not 0 < top_k <= num_cohort:
+        raise ValueError("cohort_top_k must be between 1 and the number of cohort utterances")
+
+    means = np.empty(len(rows), dtype=np.float64)
+    stds = np.empty(len(rows), dtype=np.float64)
+    for start in range(0, len(rows), block_size):
+        block = np.asarray(cohort_scores[rows[start:start + block_size]], dtype=np.float64)
+        if top_k is not None and top_k < num_cohort:
+            block = np.partition(block, num_cohort - top_k, axis=1)[:, num_cohort - top_k:]
+        means[start:start + len(block)] = block.mean(axis=1)
+        stds[start:start + len(block)] = block.std(axis=1)
+
+    return means, stds
+
+
+def normalize_scores(ref, test, scores, utterances, cohort_scores, method, top_k=None, block_size=4096):
+    """Normalisation of the scores of trials with a cohort score matrix. Z-norm normalises with the cohort statistics of the reference utterance, T-norm with the cohort
+    statistics of the test utterance and S-norm averages both. AS-norm is S-norm with the statistics of the top_k highest cohort scores of each utterance.
+    Statistics are only computed for the utterances of the trials. Utterances that are not in the cohort scores or whose cohort scores have a standard deviation of
+    zero raise a ValueError.
+
+    :param ref: Array of reference utterance filepaths
+    :type ref: ndarray
+    :param test: Array of test utterance filepaths
+    :type test: ndarray
+    :param scores: Array of scores
+    :type scores: ndarray
+    :param utterances: Array of the filepaths of the rows of cohort_scores
+    :type utterances: ndarray
+    :param cohort_scores: cohort score matrix as returned by :py:func:`dataio.load_cohort_scores`
+    :type cohort_scores: ndarray
+    :param method: one of z-norm, t-norm, s-norm or as-norm
+    :type method: str
+    :param top_k: number of highest cohort scores per utterance for as-norm
+    :type top_k: int
+    :param block_size: number of utterances per block of :py:func:`compute_cohort_statistics`
+    :type block_size: int
+
+    :returns: normalized_scores
+    :rtype: ndarray
+
+    """
+
+    if method not in NORMALIZATIONS:
+        raise ValueError("Score normalization must be one of " + ", ".join(NORMALIZATIONS))
+    if method != "as-norm":
+        top_k = None
+
+    # every unique utterance of the trials is looked up once in the rows of the cohort score matrix, statistics are computed only for rows that occur in trials
+    utterance_index = pd.Index(utterances)
+    sides = []
+    for side_utterances in ([ref] if method != "t-norm" else []) + ([test] if method != "z-norm" else []):
+        codes, unique_utterances = pd.factorize(side_utterances)
+        sides.append(utterance_index.get_indexer(pd.Index(unique_utterances).astype(str))[codes])
+    missing_utterances = sum(np.count_nonzero(side_rows < 0) for side_rows in sides)
+    if missing_utterances > 0:
+        raise ValueError(str(missing_utterances) + " utterances of the trials are not found in the cohort scores")
+
+    rows, inverse = np.unique(np.concatenate(sides), return_inverse=True)
+    means, stds = compute_cohort_statistics(cohort_scores, rows, top_k=top_k, block_size=block_size)
+    # constant cohort scores cannot normalise a score, the trials would obtain infinite or NaN scores
+    degenerate_utterances = np.count_nonzero(~(stds > 0))
+    if degenerate_utterances > 0:
+        raise ValueError(str(degenerate_utterances) + " utterances of the trials have cohort scores with a standard deviation of zero")
+
+    scores = np.asarray(scores, dtype=np.float64)
+    normalized_scores = np.zeros(len(scores), dtype=np.float64)
+    for side_inverse in np.split(inverse, len(sides)):
+        normalized_scores += (scores - means[side_inverse]) / stds[side_inverse]
+
+    return normalized_scores / len(sides)
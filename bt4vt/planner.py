@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Created on 19-10-2026
+# @author: wiebket, AnnaLesch
+
+#########################################
+# The execution planner estimates the memory footprint of every stage of a bias test from the number of trials and
+# subgroups and picks the first execution strategy whose estimated peak stays under the memory limit:
+# 1. in_memory: all speaker groups are split at once and kept in memory
+# 2. streaming: speaker groups are split one at a time, only the current speaker group is kept in memory
+# 3. memmap: speaker groups are split one at a time and their records are written to memory-mapped files in chunks
+# 4. histogram: as streaming, DET curves are approximated on a fixed grid of score thresholds. The metrics are
+#    approximate, so this strategy is only considered if it is explicitly allowed.
+#########################################
+
+STRATEGIES = ["in_memory", "streaming", "memmap", "histogram"]
+
+# bytes per trial of a (label, score) record, of the sort indices and of the DET curve kernel
+_RECORD_BYTES = 16
+_INDEX_BYTES = 8
+_DET_KERNEL_BYTES = 46
+_DET_CURVE_BYTES = 24
+
+_UNITS = {"B": 1, "KB": 10 ** 3, "MB": 10 ** 6, "GB": 10 ** 9, "TB": 10 ** 12}
+
+
+def parse_memory_limit(memory_limit):
+    """Conversion of a memory limit in bytes or as a string with unit, e.g. "512MB" or "4 GB", to bytes.
+
+    :param memory_limit: memory limit
+    :type memory_limit: int or str
+
+    :returns: memory_limit_bytes
+    :rtype: int
+
+    """
+
+    if isinstance(memory_limit, (int, float)) and not isinstance(memory_limit, bool):
+        return int(memory_limit)
+
+    memory_limit = str(memory_limit).strip().upper().replace(" ", "")
+    for unit in sorted(_UNITS, key=len, reverse=True):
+        if memory_limit.endswith(unit):
+            try:
+                return int(float(memory_limit[:-len(unit)]) * _UNITS[unit])
+            except ValueError:
+                break
+
+    raise ValueError("memory_limit in config file must be a number of bytes or a string with unit B, KB, MB, GB or TB")
+
+
+def estimate_stage_bytes(strategy, num_trials, trials_bytes, num_groups, num_subgroups, histogram_bins=1000):
+    """Estimation of the memory footprint of every stage of a bias test for an execution strategy. The estimates are upper bounds derived from the number of trials,
+    i.e. every speaker group partitions the trials and a subgroup contains at most all trials.
+
+    :param strategy: execution strategy, one of STRATEGIES
+    :type strategy: str
+    :param num_trials: number of trials
+    :type num_trials: int
+    :param trials_bytes: memory footprint of the trials DataFrame including the speaker id column
+    :type trials_bytes: int
+    :param num_groups: number of speaker groups
+    :type num_groups: int
+    :param num_subgroups: number of subgroups of all speaker groups
+    :type num_subgroups: int
+    :param histogram_bins: number of score thresholds of the histogram strategy
+    :type histogram_bins: int
+
+    :returns: stage_bytes with the estimates of the stages trials, split, det_kernel and det_curves
+    :rtype: dict
+
+    """
+
+    # the split of one speaker group holds its records and the sort indices of the subgroup codes
+    split_bytes = (_RECORD_BYTES + 2 * _INDEX_BYTES) * num_trials
+    if strategy == "in_memory":
+        split_bytes += _RECORD_BYTES * num_trials * (num_groups - 1)
+    elif strategy == "memmap":
+        # records are gathered and written to the memory-mapped file in chunks and paged in by the operating system, only the sort indices stay resident
+        split_bytes = 2 * _INDEX_BYTES * num_trials
+
+    if strategy == "histogram":
+        det_kernel_bytes = _INDEX_BYTES * num_trials + 2 * _DET_CURVE_BYTES * histogram_bins
+        det_curves_bytes = _DET_CURVE_BYTES * histogram_bins * (num_subgroups + 1)
+    else:
+        det_kernel_bytes = _DET_KERNEL_BYTES * num_trials
+        # stored curves of all speaker groups and of the average, concatenated once per speaker group
+        det_curves_bytes = _DET_CURVE_BYTES * num_trials * (num_groups + 2)
+
+    stage_bytes = {"trials": int(trials_bytes),
+                   "split": int(split_bytes),
+                   "det_kernel": int(det_kernel_bytes),
+                   "det_curves": int(det_curves_bytes)}
+
+    return stage_bytes
+
+
+def plan_execution(num_trials, trials_bytes, num_groups, num_subgroups, memory_limit, histogram_bins=1000, allow_histogram=False):
+    """Selection of the first execution strategy in STRATEGIES whose estimated peak memory stays under the memory limit. If no strategy fits, the strategy with the
+    lowest estimated peak is selected. The histogram strategy, which only gives approximate metrics, is only considered if allow_histogram is set.
+
+    :param num_trials: number of trials
+    :type num_trials: int
+    :param trials_bytes: memory footprint of the trials DataFrame including the speaker id column
+    :type trials_bytes: int
+    :param num_groups: number of speaker groups
+    :type num_groups: int
+    :param num_subgroups: number of subgroups of all speaker groups
+    :type num_subgroups: int
+    :param memory_limit: memory limit in bytes or as a string with unit, see :py:func:`parse_memory_limit`
+    :type memory_limit: int or str
+    :param histogram_bins: number of score thresholds of the histogram strategy
+    :type histogram_bins: int
+    :param allow_histogram: Set to True to allow the histogram strategy with approximate metrics. Default is set to False.
+    :type allow_histogram: bool
+
+    :returns: execution_plan with the selected strategy, the memory limit, the estimated peak, whether it fits, the histogram bins and the estimated bytes of every stage
+    :rtype: dict
+
+    """
+
+    memory_limit = parse_memory_limit(memory_limit)
+
+    execution_plan = None
+    for strategy in STRATEGIES if allow_histogram else STRATEGIES[:-1]:
+        stage_bytes = estimate_stage_bytes(strategy, num_trials, trials_bytes, num_groups, num_subgroups, histogram_bins)
+        plan = {"strategy": strategy,
+                "memory_limit": memory_limit,
+                "estimated_peak": sum(stage_bytes.values()),
+                "fits": sum(stage_bytes.values()) <= memory_limit,
+                "histogram_bins": histogram_bins,
+                "stages": stage_bytes}
+        if plan["fits"]:
+            return plan
+        if execution_plan is None or plan["estimated_peak"] < execution_plan["estimated_peak"]:
+            execution_plan = plan
+
+    return execution_plan
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Created on 19-10-2026
+# @author: wiebket, AnnaLesch
+
+import copy
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+from .core import SpeakerBiasTest
+from .evaluate import evaluate_scores
+from .groups import build_metadata_index, get_speaker_ids, split_scores_by_speaker_groups
+from .validation import InputValidationError, validate_config
+
+#########################################
+# The bias test service loads the scores and speaker metadata once and answers bias test queries with other dcf_costs,
+# speaker_groups or min_trials from memory. The split of the scores and the DET curve of every subgroup are computed
+# on the first query that needs them and shared by all later queries, so that a query only reads the metrics off the
+# DET curves. Queries run in parallel threads on shallow copies of the loaded bias test.
+#########################################
+
+
+class _ServiceBiasTest(SpeakerBiasTest):
+    """ Bias test whose DET curves are kept in a dictionary in memory instead of the result cache in cache_dir.
+
+    """
+
+    def _evaluate_scores(self, scores, labels, cache_key, threshold_values=None, weights=None):
+
+        det_curve = self._det_curves.get(cache_key)
+        evaluation = evaluate_scores(scores, labels, self.config['dcf_costs'], threshold_values=threshold_values, det_curve=det_curve, weights=weights)
+        if det_curve is None:
+            self._det_curves[cache_key] = evaluation[:3]
+
+        return evaluation
+
+    def _evict_cache(self):
+
+        return
+
+
+class BiasTestService:
+    """ Bias tests of one scores file that are kept in memory between queries. The scores and the speaker metadata are loaded once, the splits of the scores by speaker
+    groups and the DET curves are computed once and reused by all queries.
+
+        :param scores: Either path to csv or txt file or a Pandas DataFrame, see :py:class:`core.SpeakerBiasTest`
+        :type scores: str or DataFrame
+        :param config_file: path to yaml config file
+        :type config_file: str
+
+    """
+
+    def __init__(self, scores, config_file):
+
+        self._test = _ServiceBiasTest(scores, config_file)
+        # speaker ids are extracted once, so that queries never modify the shared scores
+        if "ref_id" not in self._test.scores.columns:
+            self._test.scores["ref_id"] = get_speaker_ids(self._test.scores["ref"], self._test.id_delimiter, id_pattern=self._test.id_pattern,
+                                                          id_field=self._test.id_field)
+        # DET curves of all queries are keyed by speaker group and subgroup
+        self._test._cache_dir = "memory"
+        self._test._scores_cache_key = "scores"
+        self._test._groups_cache_key = "speaker_groups"
+        self._test._det_curves = dict()
+        self._attributes = [attribute for attribute in self._test.speaker_metadata.columns if attribute != "id"]
+        self._splits = dict()
+        self._lock = threading.Lock()
+        # the split and DET curves of the speaker groups of the config file are computed before the first query
+        self.query()
+
+    def _get_split(self, speaker_groups):
+        """ Metadata index, split of the scores and trial counts of the subgroups for a list of speaker groups, computed on the first query with these speaker groups.
+
+        """
+
+        key = json.dumps(speaker_groups)
+        with self._lock:
+            if key not in self._splits:
+                test = self._test
+                metadata_index = build_metadata_index(test.speaker_metadata, self._attributes, speaker_groups)
+                scores_by_speaker_groups, trial_counts = split_scores_by_speaker_groups(test.scores, test.speaker_metadata, speaker_groups, id_delimiter=test.id_delimiter,
+                                                                                        metadata_index=metadata_index, id_pattern=test.id_pattern, id_field=test.id_field,
+                                                                                        return_counts=True)
+                self._splits[key] = (metadata_index, scores_by_speaker_groups, trial_counts)
+
+        return self._splits[key]
+
+    def query(self, dcf_costs=None, speaker_groups=None, min_trials=None):
+        """ Runs the bias test of :py:meth:`core.SpeakerBiasTest.run_tests` with the given config attributes instead of the attributes of the config file, without
+        writing results files.
+
+            :param dcf_costs: Optional list of dcf costs
+            :type dcf_costs: list
+            :param speaker_groups: Optional list of speaker groups, their attributes have to be in the select_columns of the config file
+            :type speaker_groups: list
+            :param min_trials: Optional minimum number of trials of an evaluated subgroup
+            :type min_trials: int
+
+            :returns: results in the layout of the biastest results file, subgroup_diagnostics
+            :rtype: DataFrame, DataFrame
+
+        """
+
+        config = dict(self._test.config)
+        if dcf_costs is not None:
+            config["dcf_costs"] = [tuple(cost) for cost in dcf_costs]
+        if speaker_groups is not None:
+            config["speaker_groups"] = speaker_groups
+        if min_trials is not None:
+            config["min_trials"] = min_trials
+
+        problems = validate_config(config)
+        if len(problems) == 0:
+            for attribute in sorted(set(attribute for group in config["speaker_groups"] for attribute in group) - set(self._attributes)):
+                problems.append({"source": "config", "check": "speaker_groups", "count": 1, "message": str(attribute) + " not found in select_columns of the service"})
+        if not isinstance(config.get("min_trials", 0), int) or config.get("min_trials", 0) < 0:
+            problems.append({"source": "config", "check": "min_trials", "count": 1, "message": "min_trials must be a non-negative integer"})
+        if len(problems) > 0:
+            raise InputValidationError(problems)
+
+        test = copy.copy(self._test)
+        test.config = config
+        test.metrics = pd.DataFrame()
+        test.error_rates_by_speaker_group = dict()
+        test.metadata_index, test.scores_by_speaker_groups, test.subgroup_trial_counts = self._get_split(config["speaker_groups"])
+
+        test._evaluate_average(test.scores['score'], test.scores['label'], test.scores.get('weight'))
+        test._evaluate_speaker_groups()
+
+        return test._format_metrics(test.metrics), test.subgroup_diagnostics
+
+
+class _ServiceRequestHandler(BaseHTTPRequestHandler):
+    """ Handler of the HTTP requests of the bias test service.
+
+    """
+
+    def _send_json(self, status, body):
+
+        body = body.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+
+        if self.path == "/health":
+            self._send_json(200, json.dumps({"status": "ok", "trials": len(self.server.service._test.scores)}))
+        else:
+            self._send_json(404, json.dumps({"error": "not found"}))
+
+    def do_POST(self):
+
+        if self.path != "/run_tests":
+            self._send_json(404, json.dumps({"error": "not found"}))
+            return
+
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or "{}")
+            results, subgroup_diagnostics = self.server.service.query(dcf_costs=request.get("dcf_costs"), speaker_groups=request.get("speaker_groups"),
+                                                                      min_trials=request.get("min_trials"))
+        except InputValidationError as error:
+            self._send_json(400, json.dumps({"error": str(error), "problems": error.problems}))
+            return
+        except (ValueError, TypeError, AttributeError) as error:
+            self._send_json(400, json.dumps({"error": str(error)}))
+            return
+
+        # the tuples of dcf costs in the column names are kept as strings, NaN metrics are returned as null
+        self._send_json(200, '{"results": ' + results.to_json(orient="records") + ', "subgroup_diagnostics": ' +
+                        subgroup_diagnostics.to_json(orient="records") + '}')
+
+    def log_message(self, format, *args):
+
+        return
+
+
+def make_server(scores, config_file, host="127.0.0.1", port=8765):
+    """ Construction of the HTTP server of the bias test service. The server answers ``GET /health`` and ``POST /run_tests`` with an optional JSON body with the keys
+    dcf_costs, speaker_groups and min_trials, see :py:meth:`BiasTestService.query`. Requests are handled in parallel threads.
+
+    .. code-block:: bash
+
+        $ curl -X POST localhost:8765/run_tests -d '{"dcf_costs": [[0.01, 1, 1]], "speaker_groups": [["Gender"]]}'
+
+    :param scores: Either path to csv or txt file or a Pandas DataFrame
+    :type scores: str or DataFrame
+    :param config_file: path to yaml config file
+    :type config_file: str
+    :param host: host name, default is localhost
+    :type host: str
+    :param port: port, 0 selects a free port. Default is 8765.
+    :type port: int
+
+    :returns: server, call its serve_forever method to start the service
+    :rtype: http.server.ThreadingHTTPServer
+
+    """
+
+    server = ThreadingHTTPServer((host, port), _ServiceRequestHandler)
+    server.daemon_threads = True
+    server.service = BiasTestService(scores, config_file)
+
+    return server
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Created on 19-10-2026
+# @author: wiebket, AnnaLesch
+
+import numpy as np
+import pandas as pd
+
+#########################################
+# Input validation collects all problems of the config, the scores and the speaker metadata before any evaluation,
+# and raises a single InputValidationError that lists them with counts. Value checks run vectorized over the typed
+# columns, optionally on a random sample of the trials.
+#########################################
+
+
+class InputValidationError(ValueError):
+
+    """ Exception raised when the config, the scores or the speaker metadata do not fulfil the requirements of a bias test. All problems that were found are stored
+    in problems, each as a dictionary with the keys source (config, scores or metadata), check, count and message.
+
+    :param problems: list of problems
+    :type problems: list
+
+    """
+
+    def __init__(self, problems):
+
+        self.problems = problems
+        super().__init__("Input validation failed with " + str(len(problems)) + " problem(s):\n" +
+                         "\n".join("- " + problem["message"] for problem in problems))
+
+
+def _problem(source, check, message, count=1):
+    """Construction of a problem record.
+
+    """
+
+    return {"source": source, "check": check, "count": int(count), "message": message}
+
+
+def validate_config(config):
+    """Validation of the attributes of a config file that are required for a bias test.
+
+    :param config: config as returned by :py:func:`dataio.load_config`
+    :type config: dict
+
+    :returns: problems
+    :rtype: list
+
+    """
+
+    problems = []
+    for attribute in ["id_column", "select_columns", "speaker_groups", "reference_filepath_column", "test_filepath_column", "label_column", "scores_column",
+                      "dcf_costs"]:
+        if attribute not in config:
+            problems.append(_problem("config", "missing_attribute", attribute + " not specified in config file"))
+    if len(problems) > 0:
+        return problems
+
+    if not isinstance(config["select_columns"], list):
+        problems.append(_problem("config", "select_columns", "Select Columns in config file must be a list"))
+    if not all(isinstance(group, list) for group in config["speaker_groups"]):
+        problems.append(_problem("config", "speaker_groups", "Speaker Groups in config file must be a list of lists"))
+    elif isinstance(config["select_columns"], list):
+        missing_attributes = sorted(set(attribute for group in config["speaker_groups"] for attribute in group) - set(config["select_columns"]))
+        for attribute in missing_attributes:
+            problems.append(_problem("config", "speaker_groups", str(attribute) + " not found in select_columns as specified in config file"))
+
+    p_targets = np.array([cost[0] for cost in config["dcf_costs"]], dtype=np.float64)
+    invalid_costs = np.count_nonzero((p_targets <= 0.0) | (p_targets >= 1.0))
+    if invalid_costs > 0:
+        problems.append(_problem("config", "dcf_costs", "PTarget in DCF Costs needs to be between 0 and 1", invalid_costs))
+
+    return problems
+
+
+def validate_columns(scores_input, speaker_metadata_input, config, scores_attributes=None):
+    """Validation that the columns specified in the config file are present in the scores and in the speaker metadata.
+
+    :param scores_input: DataFrame that contains reference and test utterances and corresponding labels and scores
+    :type scores_input: DataFrame
+    :param speaker_metadata_input: DataFrame that contains speaker metadata with speaker ids and speaker groups attributes as specified in config file
+    :type speaker_metadata_input: DataFrame
+    :param config: config as returned by :py:func:`dataio.load_config`
+    :type config: dict
+    :param scores_attributes: Optional config attributes of the scores columns that are checked, default is all scores columns
+    :type scores_attributes: list
+
+    :returns: problems
+    :rtype: list
+
+    """
+
+    problems = []
+    scores_columns = set(scores_input.columns)
+    for attribute, name in [("reference_filepath_column", "reference filepath column"), ("test_filepath_column", "test filepath column"),
+                            ("label_column", "label column"), ("scores_column", "scores column")]:
+        if scores_attributes is not None and attribute not in scores_attributes:
+            continue
+        if config[attribute] not in scores_columns:
+            problems.append(_problem("scores", "missing_column", name + " '" + str(config[attribute]) + "' as specified in config file not found in scores file"))
+    if config.get("weights_column") is not None and config["weights_column"] not in scores_columns:
+        problems.append(_problem("scores", "missing_column", "weights column '" + str(config["weights_column"]) + "' as specified in config file not found in scores file"))
+
+    metadata_columns = set(speaker_metadata_input.columns)
+    if config["id_column"] not in metadata_columns:
+        problems.append(_problem("metadata", "missing_column", "id column '" + str(config["id_column"]) + "' as specified in config file not found in metadata file"))
+    for select_column in config["select_columns"]:
+        if select_column not in metadata_columns:
+            problems.append(_problem("metadata", "missing_column", "'" + str(select_column) + "' in select_columns as specified in config file not found in metadata file"))
+
+    return problems
+
+
+def validate_attribute_bins(attribute_bins, select_columns, speaker_metadata_input=None):
+    """Validation of the binning of numeric attributes: every binned attribute has to be in select_columns and has exactly one of fixed edges, quantiles between 0 and 1
+    or a positive number of bins. If the speaker metadata is given, the values of binned attributes have to be numeric.
+
+    :param attribute_bins: Dictionary with the binning of every numeric attribute, see :py:func:`groups.bin_speaker_metadata`
+    :type attribute_bins: dict
+    :param select_columns: select_columns as specified in config file
+    :type select_columns: list
+    :param speaker_metadata_input: Optional DataFrame that contains speaker metadata
+    :type speaker_metadata_input: DataFrame
+
+    :returns: problems
+    :rtype: list
+
+    """
+
+    if not isinstance(attribute_bins, dict):
+        return [_problem("config", "attribute_bins", "attribute_bins in config file must be a dictionary of attributes and binnings")]
+
+    problems = []
+    for attribute, binning in attribute_bins.items():
+        if attribute not in select_columns:
+            problems.append(_problem("config", "attribute_bins", str(attribute) + " in attribute_bins not found in select_columns as specified in config file"))
+            continue
+        if not isinstance(binning, dict) or len(set(binning) & {"edges", "quantiles", "bins"}) != 1 or len(binning) != 1:
+            problems.append(_problem("config", "attribute_bins", "binning of " + str(attribute) + " in attribute_bins must have one of edges, quantiles or bins"))
+            continue
+        if "edges" in binning and (not isinstance(binning["edges"], list) or len(binning["edges"]) == 0):
+            problems.append(_problem("config", "attribute_bins", "edges of " + str(attribute) + " in attribute_bins must be a non-empty list"))
+        if "quantiles" in binning and (not isinstance(binning["quantiles"], list) or len(binning["quantiles"]) == 0 or
+                                       not all(0 < quantile < 1 for quantile in binning["quantiles"])):
+            problems.append(_problem("config", "attribute_bins", "quantiles of " + str(attribute) + " in attribute_bins must be a non-empty list of values between 0 and 1"))
+        if "bins" in binning and (not isinstance(binning["bins"], int) or binning["bins"] < 2):
+            problems.append(_problem("config", "attribute_bins", "bins of " + str(attribute) + " in attribute_bins must be an integer of at least 2"))
+        if speaker_metadata_input is not None and attribute in speaker_metadata_input.columns:
+            values = speaker_metadata_input[attribute].replace(' ', np.nan)
+            non_numeric_values = np.count_nonzero(pd.to_numeric(values, errors="coerce").isnull()) - np.count_nonzero(values.isnull())
+            if non_numeric_values > 0:
+                problems.append(_problem("metadata", "attribute_bins", str(non_numeric_values) + " values of " + str(attribute) + " in attribute_bins are not numeric",
+                                         non_numeric_values))
+
+    return problems
+
+
+def validate_scores(labels, scores, speaker_ids=None, metadata_ids=None, sample_size=None, seed=0, weights=None):
+    """Validation of the values of the trials with vectorized checks: labels have to be either {-1,1} or {0,1}, scores have to be finite numbers and trial weights
+    have to be finite non-negative numbers. Labels of a
+    single class are returned as a warning, as shards of a scores file may contain a single class. Trials of speakers that are not found in the speaker metadata are only used for the average and are returned as warnings. If sample_size is given and smaller than the number of trials, the checks run on a random sample of the trials and counts
+    refer to the sample.
+
+    :param labels: Array of labels
+    :type labels: ndarray
+    :param scores: Array of scores
+    :type scores: ndarray
+    :param speaker_ids: Optional array of speaker ids of the reference utterances
+    :type speaker_ids: ndarray
+    :param metadata_ids: Optional array of speaker ids in the speaker metadata
+    :type metadata_ids: ndarray
+    :param sample_size: Optional number of trials to sample
+    :type sample_size: int
+    :param seed: Seed of the random sample
+    :type seed: int
+    :param weights: Optional array of trial weights
+    :type weights: ndarray
+
+    :returns: problems, warnings
+    :rtype: list, list
+
+    """
+
+    labels = np.asarray(labels)
+    scores = np.asarray(scores)
+    num_trials = len(labels)
+    sampled = ""
+    if sample_size is not None and sample_size < num_trials:
+        sample = np.sort(np.random.default_rng(seed).choice(num_trials, size=sample_size, replace=False))
+        labels = labels[sample]
+        scores = scores[sample]
+        if speaker_ids is not None:
+            speaker_ids = np.asarray(speaker_ids)[sample]
+        if weights is not None:
+            weights = np.asarray(weights)[sample]
+        sampled = " in a sample of " + str(sample_size) + " trials"
+
+    problems = []
+    warnings = []
+    if num_trials == 0:
+        return [_problem("scores", "empty", "scores file contains no trials", 0)], warnings
+
+    numeric_labels = pd.to_numeric(pd.Series(labels), errors="coerce").values
+    invalid_labels = np.count_nonzero(~np.isin(numeric_labels, [-1, 0, 1]))
+    if invalid_labels > 0:
+        problems.append(_problem("scores", "labels", str(invalid_labels) + " labels" + sampled + " are not in {-1,1} or {0,1}", invalid_labels))
+    else:
+        num_targets = np.count_nonzero(numeric_labels == 1)
+        if np.count_nonzero(numeric_labels == 0) > 0 and np.count_nonzero(numeric_labels == -1) > 0:
+            problems.append(_problem("scores", "labels", "labels" + sampled + " mix the non-target labels 0 and -1"))
+        elif num_targets == 0 or num_targets == len(numeric_labels):
+            warnings.append(_problem("scores", "labels", "labels" + sampled + " contain only one class, the DET curve is not defined"))
+
+    numeric_scores = pd.to_numeric(pd.Series(scores), errors="coerce").values.astype(np.float64)
+    non_numeric_scores = np.count_nonzero(np.isnan(numeric_scores)) - np.count_nonzero(pd.isnull(scores))
+    if non_numeric_scores > 0:
+        problems.append(_problem("scores", "scores", str(non_numeric_scores) + " scores" + sampled + " are not numeric", non_numeric_scores))
+    non_finite_scores = np.count_nonzero(~np.isfinite(numeric_scores)) - non_numeric_scores
+    if non_finite_scores > 0:
+        problems.append(_problem("scores", "scores", str(non_finite_scores) + " scores" + sampled + " are NaN or infinite", non_finite_scores))
+
+    if weights is not None:
+        numeric_weights = pd.to_numeric(pd.Series(weights), errors="coerce").values.astype(np.float64)
+        invalid_weights = np.count_nonzero(~np.isfinite(numeric_weights) | (numeric_weights < 0))
+        if invalid_weights > 0:
+            problems.append(_problem("scores", "weights", str(invalid_weights) + " trial weights" + sampled + " are not finite non-negative numbers", invalid_weights))
+
+    if speaker_ids is not None and metadata_ids is not None:
+        unknown_speakers = np.count_nonzero(~pd.Series(speaker_ids).isin(metadata_ids).values)
+        if unknown_speakers == len(speaker_ids):
+            warnings.append(_problem("scores", "speaker_ids", "no speaker id" + sampled + " of the reference utterances is found in the metadata file, "
+                                     "all subgroups are empty", unknown_speakers))
+        elif unknown_speakers > 0:
+            warnings.append(_problem("scores", "speaker_ids", str(unknown_speakers) + " trials" + sampled + " have speaker ids that are not found in the metadata file, "
+                                     "they are only used for the average", unknown_speakers))
+
+    return problems, warnings
@@ -0,0 +1,51 @@
+import bt4vt
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def _load_arrays():
+    scores_1 = pd.read_csv("./tests/analysis_tests/scores_1.csv")
+    return scores_1["lab"].values.copy(), scores_1["sc"].values.copy(), scores_1["ref_file"].values, scores_1["com_file"].values
+
+
+class TestArrayInput:
+    def test_numpy_arrays(self):
+        # Test Case 1: labels and scores as NumPy arrays with speaker ids are used without copying and give the results of the scores file
+        config_1 = "./tests/analysis_tests/config_1.yaml"
+        test_1 = bt4vt.core.SpeakerBiasTest("./tests/analysis_tests/scores_1.csv", config_1)
+        test_1.run_tests()
+
+        labels, scores, ref, _ = _load_arrays()
+        speaker_ids = np.array([filepath.split("/")[0] for filepath in ref], dtype=object)
+        test_arrays = bt4vt.core.SpeakerBiasTest({"label": labels, "score": scores}, config_1, speaker_ids=speaker_ids)
+        assert np.shares_memory(test_arrays.scores["score"].values, scores)
+        assert np.shares_memory(test_arrays.scores["label"].values, labels)
+        test_arrays.run_tests()
+
+        assert test_arrays.metrics.equals(test_1.metrics)
+
+    def test_arrow_table(self):
+        # Test Case 2: an Arrow table with filepaths gives the results of the scores file
+        pa = pytest.importorskip("pyarrow")
+        config_1 = "./tests/analysis_tests/config_1.yaml"
+        test_1 = bt4vt.core.SpeakerBiasTest("./tests/analysis_tests/scores_1.csv", config_1)
+        test_1.run_tests()
+
+        labels, scores, ref, test = _load_arrays()
+        table = pa.table({"label": labels, "score": scores, "ref": ref, "test": test})
+        test_table = bt4vt.core.SpeakerBiasTest(table, config_1)
+        test_table.run_tests()
+
+        assert test_table.metrics.equals(test_1.metrics)
+
+    def test_invalid_input(self):
+        # Test Case 3: arrays without speaker ids need filepaths, other inputs raise a TypeError
+        config_1 = "./tests/analysis_tests/config_1.yaml"
+        labels, scores, _, _ = _load_arrays()
+
+        with pytest.raises(bt4vt.validation.InputValidationError) as error:
+            bt4vt.core.SpeakerBiasTest({"label": labels, "score": scores}, config_1)
+        assert [problem["check"] for problem in error.value.problems] == ["missing_column", "missing_column"]
+
+        pytest.raises(TypeError, bt4vt.dataio.load_data, [labels, scores])
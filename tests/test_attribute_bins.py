@@ -0,0 +1,52 @@
+import bt4vt
+import numpy as np
+import pandas as pd
+import pytest
+
+
+class TestAttributeBins:
+    def test_bin_attribute(self):
+        # Test Case 1: fixed edges, quantiles and equally populated bins of a numeric attribute
+        values = pd.Series([18, 25, 30, 42, 50, 64, 77, 80])
+
+        bin_edges = bt4vt.groups.get_bin_edges(values, edges=[50, 30])
+        assert list(bin_edges) == [30, 50]
+        assert list(bt4vt.groups.bin_attribute(values, bin_edges)) == ["< 30", "< 30", "[30, 50)", "[30, 50)", ">= 50", ">= 50", ">= 50", ">= 50"]
+
+        assert list(bt4vt.groups.get_bin_edges(values, quantiles=[0.5])) == [46.0]
+        bin_labels = bt4vt.groups.bin_attribute(values, bt4vt.groups.get_bin_edges(values, bins=4))
+        assert (pd.Series(bin_labels).value_counts() == 2).all()
+
+        # quantiles of many equal values give fewer bins
+        assert list(bt4vt.groups.get_bin_edges(pd.Series([1, 1, 1, 1, 2]), bins=4)) == [1.0]
+
+    def test_binned_bias_test(self):
+        # Test Case 2: a binned numeric attribute is evaluated like a categorical attribute with one subgroup per bin
+        test_11 = bt4vt.core.SpeakerBiasTest("./tests/analysis_tests/scores_1.csv", "./tests/analysis_tests/config_11.yaml")
+        test_11.run_tests()
+
+        metadata = pd.read_csv("./tests/analysis_tests/metadata_age.csv", sep="\t")
+        age_subgroups = [column for column in test_11.metrics.columns if test_11.metrics[column].iloc[0] == "Age"]
+        assert len(age_subgroups) == 3
+        assert len(test_11.metadata_index["speaker_groups"]["Gender_Age"]["subgroups"]) == 6
+
+        bin_edges = bt4vt.groups.get_bin_edges(metadata["Age"], bins=3)
+        speaker_bins = pd.Series(bt4vt.groups.bin_attribute(metadata["Age"], bin_edges), index=metadata["VoxCeleb1 ID"])
+        assert (test_11.speaker_metadata.set_index("id")["Age"] == speaker_bins).all()
+
+        trial_bins = test_11.scores["ref_id"].map(speaker_bins)
+        for subgroup in age_subgroups:
+            trials = test_11.scores[trial_bins == subgroup]
+            eer = bt4vt.evaluate.evaluate_scores(trials["score"], trials["label"], test_11.config["dcf_costs"])[3][0]
+            assert np.isclose(test_11.metrics[subgroup].iloc[1], eer)
+
+    def test_invalid_attribute_bins(self, tmp_path):
+        # Test Case 3: bins of non-numeric attributes and invalid binnings raise an InputValidationError
+        with open("./tests/analysis_tests/config_11.yaml") as file:
+            config = file.read()
+        config_file = tmp_path / "config_bins.yaml"
+        config_file.write_text(config.replace('attribute_bins: {"Age": {"bins": 3}}', 'attribute_bins: {"Gender": {"bins": 2}, "Age": {"quantiles": [1.5]}}'))
+
+        with pytest.raises(bt4vt.validation.InputValidationError) as error:
+            bt4vt.core.SpeakerBiasTest("./tests/analysis_tests/scores_1.csv", str(config_file))
+        assert [(problem["source"], problem["check"]) for problem in error.value.problems] == [("metadata", "attribute_bins"), ("config", "attribute_bins")]
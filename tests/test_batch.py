@@ -0,0 +1,33 @@
+import bt4vt
+import filecmp
+import os
+import shutil
+from bt4vt.batch import load_manifest, run_batch
+from bt4vt.cli import main
+
+
+class TestBatch:
+    def test_batch_matches_single_runs(self):
+        # Test Case 1: batch results are identical to running each job on its own
+        jobs = load_manifest("./tests/analysis_tests/manifest.yaml")
+        single_results_dir = "./tests/analysis_tests/results/single/"
+        os.makedirs(single_results_dir, exist_ok=True)
+        for scores, config in jobs:
+            test = bt4vt.core.SpeakerBiasTest(scores, config)
+            test.run_tests()
+            shutil.copy(os.path.join(test.config["results_dir"], test._biastest_results_file), single_results_dir)
+
+        biastest_results_files = run_batch(jobs, workers=2)
+
+        assert len(biastest_results_files) == 3
+        for biastest_results_file in biastest_results_files:
+            assert filecmp.cmp(biastest_results_file,
+                               os.path.join(single_results_dir, os.path.basename(biastest_results_file)),
+                               shallow=False) == True
+
+    def test_cli_run(self):
+        # Test Case 2: run a single job from the command line
+        assert main(["run", "./tests/configfile_tests/scores_4.csv", "./tests/configfile_tests/config_4.yaml"]) == 0
+        assert filecmp.cmp("./tests/configfile_tests/results/biastest_results_config_4_scores_4.csv",
+                           "./tests/configfile_tests/reference_results/reference_biastest_results_config_4_scores_4.csv",
+                           shallow=False) == True
@@ -0,0 +1,101 @@
+import bt4vt
+import numpy as np
+import os
+import pandas as pd
+import pytest
+import yaml
+
+
+def _load_records(timestamps):
+    scores_1 = pd.read_csv("./tests/analysis_tests/scores_1.csv")
+    return list(zip(scores_1["ref_file"], scores_1["com_file"], scores_1["lab"], scores_1["sc"], timestamps(len(scores_1))))
+
+
+class TestBiasMonitor:
+    def test_single_window(self):
+        # Test Case 1: a window with all trials has the EER of the approximate DET curve of all trials and the subgroup sizes of the bias test
+        config_8 = "./tests/analysis_tests/config_8.yaml"
+        records = _load_records(lambda num_trials: np.zeros(num_trials))
+
+        monitor = bt4vt.core.SpeakerBiasMonitor(config_8)
+        monitor.update(records)
+        window = monitor.evaluate_window().set_index("group_name")
+
+        scores = np.array([record[3] for record in records])
+        labels = np.array([record[2] for record in records])
+        eer, _ = bt4vt.metrics.compute_eer(*bt4vt.evaluate.compute_det_curve_histogram(scores, labels))
+        assert np.isclose(window.loc["average", "EER"], eer)
+        assert window.loc["average", "trials"] == len(records)
+
+        test_8 = bt4vt.core.SpeakerBiasTest("./tests/analysis_tests/scores_1.csv", config_8)
+        test_8.run_tests()
+        for subgroup, records_subgroup in test_8.scores_by_speaker_groups["Gender_Nationality"].items():
+            assert window.loc[subgroup, "trials"] == (len(records_subgroup) if isinstance(records_subgroup, np.ndarray) else 0)
+
+    def test_rolling_window(self):
+        # Test Case 2: every window contains the trials of the last two cadences, trials older than the window are ignored
+        config_8 = "./tests/analysis_tests/config_8.yaml"
+        records = _load_records(lambda num_trials: np.repeat(np.arange(4) * 3600.0, num_trials // 4))
+
+        monitor = bt4vt.core.SpeakerBiasMonitor(config_8)
+        windows = monitor.update(records[:2250])
+        assert [window["trials"].iloc[0] for window in windows] == [750, 1500]
+        assert windows[1]["window_end"].iloc[0] == 7200
+
+        # a late trial of the first cadence is outside the window
+        windows = monitor.update(records[:1] + records[2250:])
+        assert monitor.evaluate_window()["trials"].iloc[0] == 1500
+        assert windows[0]["trials"].iloc[0] == 1500
+
+    def test_datetime_timestamps(self):
+        # Test Case 3: datetime timestamps are converted to seconds and windows are reported with datetimes
+        config_8 = "./tests/analysis_tests/config_8.yaml"
+        start = pd.Timestamp("2026-10-19 00:00:00")
+        records = _load_records(lambda num_trials: [start + pd.Timedelta(seconds=30 * index) for index in range(num_trials)])
+
+        results_file = "./tests/analysis_tests/results/monitor_results_config_8.csv"
+        if os.path.isfile(results_file):
+            os.remove(results_file)
+        monitor = bt4vt.core.SpeakerBiasMonitor(config_8)
+        monitor.run_tests(records, batch_size=1000)
+
+        results = pd.read_csv(results_file)
+        assert pd.to_datetime(results["window_end"]).max() == start + pd.Timedelta(hours=25)
+        assert (results.loc[results["group_name"] == "average", "EER ratio"] == 1.0).all()
+
+    def test_score_range_required(self, tmp_path):
+        # Test Case 4: the score bins are fixed for the whole stream, a config file without monitor_score_range raises an InputValidationError
+        with open("./tests/analysis_tests/config_8.yaml") as config_file:
+            config = yaml.safe_load(config_file)
+        del config["monitor_score_range"]
+        with open(tmp_path / "config_8.yaml", "w") as config_file:
+            yaml.safe_dump(config, config_file)
+
+        with pytest.raises(bt4vt.validation.InputValidationError) as error:
+            bt4vt.core.SpeakerBiasMonitor(str(tmp_path / "config_8.yaml"))
+        assert [problem["check"] for problem in error.value.problems] == ["monitor_score_range"]
+
+    def test_background_writes(self, tmp_path):
+        # Test Case 5: windows that are appended in the background give the same results file, parquet output is rejected since windows are appended
+        with open("./tests/analysis_tests/config_8.yaml") as config_file:
+            config = yaml.safe_load(config_file)
+        records = _load_records(lambda num_trials: np.repeat(np.arange(4) * 3600.0, num_trials // 4))
+
+        results = []
+        for background_writes in [False, True]:
+            config.update({"results_dir": str(tmp_path / str(background_writes)), "background_writes": background_writes})
+            with open(tmp_path / "config_8.yaml", "w") as config_file:
+                yaml.safe_dump(config, config_file)
+            monitor = bt4vt.core.SpeakerBiasMonitor(str(tmp_path / "config_8.yaml"))
+            monitor.run_tests(records, batch_size=500)
+            results.append(pd.read_csv(tmp_path / str(background_writes) / "monitor_results_config_8.csv"))
+        pd.testing.assert_frame_equal(results[0], results[1])
+        # one header and one average row per window
+        assert list(results[1].loc[results[1]["group_name"] == "average", "window_end"]) == [3600, 7200, 10800, 14400]
+
+        config["output_format"] = "parquet"
+        with open(tmp_path / "config_8.yaml", "w") as config_file:
+            yaml.safe_dump(config, config_file)
+        with pytest.raises(bt4vt.validation.InputValidationError) as error:
+            bt4vt.core.SpeakerBiasMonitor(str(tmp_path / "config_8.yaml"))
+        assert [problem["check"] for problem in error.value.problems] == ["output_format"]
@@ -0,0 +1,69 @@
+import bt4vt
+import numpy as np
+import pandas as pd
+
+
+def _direct_calibration_metrics(labels, scores, dcf_cost):
+    target_scores = scores[labels == 1]
+    nontarget_scores = scores[labels != 1]
+    cllr = (np.mean(np.log2(1 + np.exp(-target_scores))) + np.mean(np.log2(1 + np.exp(nontarget_scores)))) / 2
+    bayes_threshold = np.log(dcf_cost[1] * (1 - dcf_cost[0]) / (dcf_cost[2] * dcf_cost[0]))
+    act_dcf = dcf_cost[2] * dcf_cost[0] * np.mean(target_scores < bayes_threshold) + \
+        dcf_cost[1] * (1 - dcf_cost[0]) * np.mean(nontarget_scores >= bayes_threshold)
+    return cllr, act_dcf
+
+
+class TestCalibrationMetrics:
+    def test_batch_calibration_metrics(self):
+        # Test Case 1: batch computation over contiguous segments matches a direct computation per segment, segments with one class obtain NaN
+        rng = np.random.default_rng(0)
+        labels = rng.integers(0, 2, 1000)
+        scores = rng.normal(0, 4, 1000) + 4 * labels
+        labels[600:650] = 1
+        segment_bounds = np.array([0, 400, 600, 650, 650, 1000])
+        dcf_costs = [[0.05, 1, 1], [0.01, 1, 10]]
+
+        cllrs, act_dcfs = bt4vt.metrics.compute_calibration_metrics(labels, scores, segment_bounds, dcf_costs)
+
+        for index in [0, 1, 4]:
+            start, end = segment_bounds[index], segment_bounds[index + 1]
+            for cost_index, dcf_cost in enumerate(dcf_costs):
+                cllr, act_dcf = _direct_calibration_metrics(labels[start:end], scores[start:end], dcf_cost)
+                assert np.isclose(cllrs[index], cllr)
+                assert np.isclose(act_dcfs[index, cost_index], act_dcf)
+        assert np.isnan(cllrs[[2, 3]]).all()
+        assert np.isnan(act_dcfs[[2, 3]]).all()
+
+    def test_stable_for_large_scores(self):
+        # Test Case 2: very large log-likelihood ratios do not overflow
+        cllrs, act_dcfs = bt4vt.metrics.compute_calibration_metrics([1, 0], [1000.0, -1000.0], [0, 2], [[0.5, 1, 1]])
+        assert cllrs[0] == 0
+        assert act_dcfs[0, 0] == 0
+
+    def test_segment_precision(self):
+        # Test Case 3: the costs of a small segment after a segment with very large costs are not lost to cancellation
+        rng = np.random.default_rng(0)
+        labels = np.concatenate([[1, 0], rng.integers(0, 2, 100)])
+        labels[-2:] = [1, 0]
+        scores = np.concatenate([[-1e17, 1e17], rng.normal(0, 1, 100)])
+        segment_bounds = np.array([0, 2, 102])
+
+        cllrs, _ = bt4vt.metrics.compute_calibration_metrics(labels, scores, segment_bounds, [[0.05, 1, 1]])
+        cllr, _ = _direct_calibration_metrics(labels[2:], scores[2:], [0.05, 1, 1])
+        assert np.isclose(cllrs[1], cllr)
+
+    def test_results_file(self):
+        # Test Case 4: Cllr, actDCF and their ratios to average are added to the biastest results file
+        config_6 = "./tests/analysis_tests/config_6.yaml"
+        scores_1 = "./tests/analysis_tests/scores_1.csv"
+
+        test_6 = bt4vt.core.SpeakerBiasTest(scores_1, config_6)
+        test_6.run_tests()
+
+        results = pd.read_csv("./tests/analysis_tests/results/biastest_results_config_6_scores_1.csv").set_index("group_name")
+        trials = test_6.scores.loc[test_6.scores["ref_id"].isin(test_6.speaker_metadata.loc[test_6.speaker_metadata["Nationality"] == "UK", "id"])]
+        cllr, act_dcf = _direct_calibration_metrics(trials["label"].values, trials["score"].values, [0.01, 1, 1])
+        assert np.isclose(results.loc["UK", "Cllr"], cllr)
+        assert np.isclose(results.loc["UK", "actDCF (0.01, 1, 1)"], act_dcf)
+        assert np.isclose(results.loc["UK", "Cllr ratio"], cllr / results.loc["average", "Cllr"])
+        assert np.isnan(results.loc["f_India", "Cllr"])
@@ -20,19 +20,19 @@ class TestConfigInput:
         config_2a = "./tests/configfile_tests/config_2a.yaml"
         scores_2a = "./tests/configfile_tests/scores_2a.csv"
 
-        pytest.raises(SystemExit, bt4vt.core.SpeakerBiasTest, scores_2a, config_2a)
+        pytest.raises(bt4vt.validation.InputValidationError, bt4vt.core.SpeakerBiasTest, scores_2a, config_2a)
 
     def test_different_select_column(self):
         config_2b = "./tests/configfile_tests/config_2b.yaml"
         scores_2b = "./tests/configfile_tests/scores_2b.csv"
 
-        pytest.raises(SystemExit, bt4vt.core.SpeakerBiasTest, scores_2b, config_2b)
+        pytest.raises(bt4vt.validation.InputValidationError, bt4vt.core.SpeakerBiasTest, scores_2b, config_2b)
 
     def test_different_speaker_group(self):
         config_2c = "./tests/configfile_tests/config_2c.yaml"
         scores_2c = "./tests/configfile_tests/scores_2c.csv"
 
-        pytest.raises(SystemExit, bt4vt.core.SpeakerBiasTest, scores_2c, config_2c)
+        pytest.raises(bt4vt.validation.InputValidationError, bt4vt.core.SpeakerBiasTest, scores_2c, config_2c)
 
     def test_ptarget(self):
         #PTarget out of range 0-1
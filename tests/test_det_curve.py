@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+import tracemalloc
+from bt4vt.evaluate import compute_det_curve
+
+
+def _assert_curves_equal(curve, reference_curve):
+    for values, reference_values in zip(curve, reference_curve):
+        assert values.dtype == reference_values.dtype
+        assert np.array_equal(values, reference_values)
+
+
+class TestDetCurve:
+    def test_sklearn_parity_fixtures(self):
+        # Test Case 1: identical output to sklearn on the test fixtures
+        pytest.importorskip("sklearn", minversion="1.7")
+        import sklearn.metrics as sklearn_metrics
+        for scores_file in ["./tests/analysis_tests/scores_1.csv", "./tests/configfile_tests/scores_4.csv",
+                            "./tests/complex_tests/scores_1a.csv", "./tests/scoresfile_tests/scores_3a.csv"]:
+            scores = pd.read_csv(scores_file, sep=None, engine="python")
+            _assert_curves_equal(compute_det_curve(scores["sc"], scores["lab"]),
+                                 sklearn_metrics.det_curve(scores["lab"], scores["sc"], pos_label=1))
+
+    def test_sklearn_parity_ties_float32(self):
+        # Test Case 2: identical output to sklearn for tied float32 scores and both label formats
+        pytest.importorskip("sklearn", minversion="1.7")
+        import sklearn.metrics as sklearn_metrics
+        rng = np.random.default_rng(0)
+        for target_share in [0.02, 0.5, 0.98]:
+            scores = np.round(rng.normal(size=5000), 1).astype(np.float32)
+            labels = np.where(rng.random(5000) < target_share, 1, -1)
+            _assert_curves_equal(compute_det_curve(scores, labels),
+                                 sklearn_metrics.det_curve(labels, scores, pos_label=1))
+            _assert_curves_equal(compute_det_curve(scores, (labels + 1) // 2),
+                                 sklearn_metrics.det_curve(labels, scores, pos_label=1))
+
+    def test_presorted(self):
+        # Test Case 3: a precomputed order and presorted input give the same curve
+        rng = np.random.default_rng(1)
+        scores = rng.normal(size=1000)
+        labels = rng.integers(0, 2, 1000)
+        order = np.argsort(scores, kind="mergesort")[::-1]
+
+        reference_curve = compute_det_curve(scores, labels)
+        _assert_curves_equal(compute_det_curve(scores, labels, order=order), reference_curve)
+        _assert_curves_equal(compute_det_curve(scores[order], labels[order], presorted=True), reference_curve)
+
+    def test_one_class(self):
+        # Test Case 4: curve is not defined if only one class is present
+        pytest.raises(ValueError, compute_det_curve, np.array([0.1, 0.2]), np.array([1, 1]))
+
+    def test_peak_memory(self):
+        # Test Case 5: peak memory is at most half of sklearn's
+        pytest.importorskip("sklearn", minversion="1.7")
+        import sklearn.metrics as sklearn_metrics
+        rng = np.random.default_rng(2)
+        scores = rng.normal(size=500000).astype(np.float32)
+        labels = rng.integers(0, 2, 500000)
+
+        peak_memory = []
+        for det_curve in [lambda: compute_det_curve(scores, labels),
+                          lambda: sklearn_metrics.det_curve(labels, scores, pos_label=1)]:
+            tracemalloc.start()
+            curve = det_curve()
+            peak_memory.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+            del curve
+
+        assert peak_memory[0] <= 0.5 * peak_memory[1]
@@ -0,0 +1,97 @@
+import bt4vt
+import numpy as np
+import pandas as pd
+import filecmp
+import pytest
+import yaml
+from concurrent.futures import ProcessPoolExecutor
+
+
+class TestDistributed:
+    def test_sharded_results_match(self):
+        # Test Case 1: sharded bias test on a local process pool gives the same results as the complete scores file
+        config_1 = "./tests/analysis_tests/config_1.yaml"
+        scores_1 = "./tests/analysis_tests/scores_1.csv"
+        score_shards = ["./tests/analysis_tests/shards/scores_1_shard_1.csv",
+                        "./tests/analysis_tests/shards/scores_1_shard_2.csv",
+                        "./tests/analysis_tests/shards/scores_1_shard_3.csv"]
+
+        test_1 = bt4vt.core.SpeakerBiasTest(scores_1, config_1)
+        test_1.run_tests()
+
+        sharded_test_1 = bt4vt.core.ShardedSpeakerBiasTest(score_shards, config_1)
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            sharded_test_1.run_tests(executor=executor)
+
+        assert sharded_test_1._biastest_results_file == "biastest_results_config_1_scores_1_shard_1.csv"
+        assert filecmp.cmp("./tests/analysis_tests/results/biastest_results_config_1_scores_1.csv",
+                           "./tests/analysis_tests/results/biastest_results_config_1_scores_1_shard_1.csv",
+                           shallow=False) == True
+
+    def test_single_shard_without_executor(self):
+        # Test Case 2: a single shard reduced in the current process gives the reference results
+        config_4 = "./tests/configfile_tests/config_4.yaml"
+        scores_4 = "./tests/configfile_tests/scores_4.csv"
+
+        test_4 = bt4vt.core.ShardedSpeakerBiasTest([scores_4], config_4)
+        test_4.run_tests()
+
+        assert filecmp.cmp("./tests/configfile_tests/results/biastest_results_config_4_scores_4.csv",
+                           "./tests/configfile_tests/reference_results/reference_biastest_results_config_4_scores_4.csv",
+                           shallow=False) == True
+
+    def test_score_counts(self):
+        # Test Case 3: shards are reduced to score counts, and calibration metrics of the merged counts match the complete scores file
+        config_6 = "./tests/analysis_tests/config_6.yaml"
+        score_shards = ["./tests/analysis_tests/shards/scores_1_shard_1.csv",
+                        "./tests/analysis_tests/shards/scores_1_shard_2.csv",
+                        "./tests/analysis_tests/shards/scores_1_shard_3.csv"]
+
+        shard_statistics = bt4vt.distributed.reduce_scores_shard(score_shards[0], config_6)
+        assert shard_statistics["average"].dtype.names == ("label", "score", "weight", "trials")
+        assert shard_statistics["average"]["trials"].sum() == 1000
+        assert np.all(np.diff(shard_statistics["average"]["score"]) <= 0)
+
+        test_6 = bt4vt.core.SpeakerBiasTest("./tests/analysis_tests/scores_1.csv", config_6)
+        test_6.run_tests()
+        sharded_test_6 = bt4vt.core.ShardedSpeakerBiasTest(score_shards, config_6)
+        sharded_test_6.run_tests()
+
+        pd.testing.assert_frame_equal(sharded_test_6.subgroup_diagnostics, test_6.subgroup_diagnostics)
+        assert np.allclose(sharded_test_6.calibration_metrics.iloc[1:].astype(float), test_6.calibration_metrics.iloc[1:].astype(float), equal_nan=True)
+
+    def test_unsupported_analyses(self, tmp_path):
+        # Test Case 4: analyses that need the individual trials raise an error instead of running on the first rows of the first shard
+        score_shards = ["./tests/analysis_tests/shards/scores_1_shard_1.csv",
+                        "./tests/analysis_tests/shards/scores_1_shard_2.csv"]
+        sharded_test_1 = bt4vt.core.ShardedSpeakerBiasTest(score_shards, "./tests/analysis_tests/config_1.yaml")
+        for analysis in [sharded_test_1.run_speaker_tests, sharded_test_1.run_subgroup_discovery, sharded_test_1.run_influence_analysis,
+                         sharded_test_1.run_operating_point_analysis]:
+            pytest.raises(ValueError, analysis)
+
+        # config options of these analyses are rejected before the shards are reduced
+        with open("./tests/analysis_tests/config_1.yaml") as config_file:
+            config = yaml.safe_load(config_file)
+        config.update({"speaker_metrics": True, "memory_limit": "1GB", "subgroup_discovery": False})
+        with open(tmp_path / "config_1.yaml", "w") as config_file:
+            yaml.safe_dump(config, config_file)
+
+        with pytest.raises(bt4vt.validation.InputValidationError) as error:
+            bt4vt.core.ShardedSpeakerBiasTest(score_shards, str(tmp_path / "config_1.yaml"))
+        assert [problem["message"] for problem in error.value.problems] == ["memory_limit in config file is not supported for score shards",
+                                                                           "speaker_metrics in config file is not supported for score shards"]
+
+    def test_merge_score_counts(self):
+        # Test Case 5: score counts of shards without trials are empty, merging sorted score counts gives the score counts of the concatenated trials
+        rng = np.random.default_rng(0)
+        shards = [np.rec.fromarrays([rng.integers(0, 2, num_trials), rng.integers(0, 20, num_trials) / 10, rng.random(num_trials)], names=["label", "score", "weight"])
+                  for num_trials in [1000, 0, 500, 1]]
+
+        empty_score_counts = bt4vt.distributed.count_scores(shards[1])
+        assert len(empty_score_counts) == 0 and empty_score_counts.dtype.names == ("label", "score", "weight", "trials")
+
+        merged_score_counts = bt4vt.distributed.merge_score_counts(bt4vt.distributed.count_scores(shard) for shard in shards)
+        score_counts = bt4vt.distributed.count_scores(np.concatenate(shards).view(np.recarray))
+        for field in ["label", "score", "trials"]:
+            assert np.array_equal(merged_score_counts[field], score_counts[field])
+        assert np.allclose(merged_score_counts["weight"], score_counts["weight"])
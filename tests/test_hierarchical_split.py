@@ -0,0 +1,36 @@
+import bt4vt
+import numpy as np
+
+
+class TestHierarchicalSplit:
+    def test_coarse_groups_from_finest_group(self):
+        # Test Case 1: speaker groups derived from the finest speaker group contain the same trials as speaker groups split on their own, sorted by score
+        config_1 = "./tests/analysis_tests/config_1.yaml"
+        scores_1 = "./tests/analysis_tests/scores_1.csv"
+        test_1 = bt4vt.core.SpeakerBiasTest(scores_1, config_1)
+        speaker_groups = [["Gender"], ["Nationality"], ["Gender", "Nationality"], ["Nationality", "Gender"]]
+        metadata_index = bt4vt.groups.build_metadata_index(test_1.speaker_metadata, ["Gender", "Nationality"], speaker_groups)
+
+        hierarchical_split = bt4vt.groups.split_scores_by_speaker_groups(test_1.scores, test_1.speaker_metadata, speaker_groups, "/",
+                                                                         metadata_index=metadata_index)
+        for group in speaker_groups:
+            group_name = "_".join(group)
+            single_split = bt4vt.groups.split_scores_by_speaker_groups(test_1.scores, test_1.speaker_metadata, [group], "/",
+                                                                       metadata_index=metadata_index)[group_name]
+            assert list(hierarchical_split[group_name].keys()) == list(single_split.keys())
+            for subgroup, records in hierarchical_split[group_name].items():
+                if not isinstance(records, np.ndarray):
+                    assert not isinstance(single_split[subgroup], np.ndarray)
+                    continue
+                assert np.all(records["score"][:-1] >= records["score"][1:])
+                assert np.array_equal(np.sort(records, order=["score", "label"]), np.sort(single_split[subgroup], order=["score", "label"]))
+
+        assert len(hierarchical_split["Nationality_Gender"]["India_m"]) == len(hierarchical_split["Gender_Nationality"]["m_India"])
+
+    def test_coarse_code_map(self):
+        # Test Case 2: fine subgroup codes map to the coarse subgroup that contains their attribute values
+        metadata_index = {"attributes": {"Gender": {"values": np.array(["m", "f"])}, "Nationality": {"values": np.array(["India", "USA", "UK"])}}}
+        coarse_code_map = bt4vt.groups.get_coarse_code_map(metadata_index, ["Gender", "Nationality"], ["Nationality"])
+        assert list(coarse_code_map) == [0, 1, 2, 0, 1, 2]
+        coarse_code_map = bt4vt.groups.get_coarse_code_map(metadata_index, ["Gender", "Nationality"], ["Gender"])
+        assert list(coarse_code_map) == [0, 0, 0, 1, 1, 1]
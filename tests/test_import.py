@@ -0,0 +1,31 @@
+import subprocess
+import sys
+
+# budget for `import bt4vt` in microseconds, as reported by python -X importtime
+IMPORT_TIME_BUDGET = 50000
+
+
+class TestImport:
+    def test_no_heavy_imports(self):
+        # Test Case 1: importing the package does not load heavy dependencies
+        heavy_modules = ["numpy", "pandas", "scipy", "sklearn", "yaml", "importlib_resources"]
+        output = subprocess.run([sys.executable, "-c", "import sys, bt4vt; print(' '.join(sorted(sys.modules)))"],
+                                capture_output=True, text=True, check=True).stdout.split()
+
+        assert [module for module in heavy_modules if module in output] == []
+
+    def test_import_time_budget(self):
+        # Test Case 2: cumulative import time of the package stays within budget
+        stderr = subprocess.run([sys.executable, "-X", "importtime", "-c", "import bt4vt"],
+                                capture_output=True, text=True, check=True).stderr
+        bt4vt_line = [line for line in stderr.splitlines() if line.split("|")[-1].strip() == "bt4vt"][0]
+        cumulative_time = int(bt4vt_line.split("|")[1])
+
+        assert cumulative_time < IMPORT_TIME_BUDGET
+
+    def test_lazy_submodules(self):
+        # Test Case 3: submodules are available as attributes after importing the package
+        output = subprocess.run([sys.executable, "-c", "import bt4vt; print(bt4vt.core.SpeakerBiasTest.__name__)"],
+                                capture_output=True, text=True, check=True).stdout.strip()
+
+        assert output == "SpeakerBiasTest"
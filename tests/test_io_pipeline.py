@@ -0,0 +1,42 @@
+import bt4vt
+import filecmp
+import numpy as np
+import pytest
+
+
+class TestIOPipeline:
+    def test_chunked_scores_background_writes(self):
+        # Test Case 1: chunked score parsing and background writes give the same results as a single read
+        config_1 = "./tests/analysis_tests/config_1.yaml"
+        config_3 = "./tests/analysis_tests/config_3.yaml"
+        scores_1 = "./tests/analysis_tests/scores_1.csv"
+
+        test_1 = bt4vt.core.SpeakerBiasTest(scores_1, config_1)
+        test_1.run_tests()
+
+        test_3 = bt4vt.core.SpeakerBiasTest(scores_1, config_3)
+        assert np.array_equal(test_3.scores["ref_id"].values,
+                              bt4vt.groups.get_speaker_ids(test_1.scores["ref"], "/").values)
+        test_3.run_tests()
+        test_3.wait_for_results()
+
+        assert filecmp.cmp("./tests/analysis_tests/results/biastest_results_config_1_scores_1.csv",
+                           "./tests/analysis_tests/results/biastest_results_config_3_scores_1.csv",
+                           shallow=False) == True
+
+    def test_background_write_errors(self):
+        # Test Case 2: errors of background writes are raised by run_tests, or by wait_for_results if run_tests does not wait
+        config_3 = "./tests/analysis_tests/config_3.yaml"
+        scores_1 = "./tests/analysis_tests/scores_1.csv"
+
+        test_3 = bt4vt.core.SpeakerBiasTest(scores_1, config_3)
+        test_3._subgroup_diagnostics_file = "missing_dir/subgroup_diagnostics.csv"
+        with pytest.raises(OSError):
+            test_3.run_tests()
+        assert test_3._pending_writes == []
+
+        test_3 = bt4vt.core.SpeakerBiasTest(scores_1, config_3)
+        test_3._subgroup_diagnostics_file = "missing_dir/subgroup_diagnostics.csv"
+        test_3.run_tests(wait=False)
+        with pytest.raises(OSError):
+            test_3.wait_for_results()
@@ -0,0 +1,74 @@
+import bt4vt
+import numpy as np
+import pytest
+
+
+def _numpy_evaluation(scores, labels, dcf_costs):
+    fprs, fnrs, thresholds = bt4vt.evaluate.compute_det_curve(scores, labels)
+    eer, eer_threshold = bt4vt.metrics.compute_eer(fprs, fnrs, thresholds)
+    min_cdets = [bt4vt.metrics.compute_min_cdet(fprs, fnrs, thresholds, *cost) for cost in dcf_costs]
+    return fprs, fnrs, thresholds, eer, eer_threshold, min_cdets
+
+
+def _assert_parity(scores, labels, dcf_costs, jit):
+    order = np.argsort(scores, kind="mergesort")[::-1]
+    evaluation = bt4vt.kernels.evaluate_sorted_scores(scores[order], labels[order] == 1, dcf_costs, jit=jit)
+    fprs, fnrs, thresholds, eer, eer_threshold, min_cdets = _numpy_evaluation(scores, labels, dcf_costs)
+    assert np.array_equal(evaluation[0], fprs)
+    assert np.array_equal(evaluation[1], fnrs)
+    assert np.array_equal(evaluation[2], thresholds)
+    # the output arrays are allocated with the number of DET points, not trimmed from larger buffers
+    assert all(output.base is None for output in evaluation[:3])
+    assert (evaluation[3], evaluation[4]) == (eer, eer_threshold)
+    assert list(zip(evaluation[5], evaluation[6])) == min_cdets
+
+
+class TestKernels:
+    dcf_costs = [[0.05, 1, 1], [0.01, 1, 10]]
+
+    def _random_inputs(self):
+        rng = np.random.default_rng(0)
+        for num_trials in [2, 3, 10, 1000]:
+            for dtype in [np.float64, np.float32]:
+                labels = rng.integers(0, 2, num_trials)
+                labels[0], labels[-1] = 1, 0
+                # rounded scores contain ties
+                scores = np.round(rng.normal(size=num_trials) + 2 * labels, 1).astype(dtype)
+                yield scores, labels
+
+    def test_python_kernel_parity(self):
+        # Test Case 1: the fused kernel gives the same DET curve, EER and minimum detection cost functions as the NumPy path
+        for scores, labels in self._random_inputs():
+            _assert_parity(scores, labels, self.dcf_costs, jit=False)
+
+    def test_jit_kernel_parity(self):
+        # Test Case 2: the Numba compiled kernel gives the same results as the NumPy path
+        pytest.importorskip("numba")
+        for scores, labels in self._random_inputs():
+            _assert_parity(scores, labels, self.dcf_costs, jit=True)
+
+    def test_one_class(self):
+        # Test Case 3: the DET curve is not defined if only one class is present
+        with pytest.raises(ValueError):
+            bt4vt.kernels.evaluate_sorted_scores(np.array([2.0, 1.0]), np.array([True, True]), self.dcf_costs, jit=False)
+
+    def test_evaluate_scores_parity(self, monkeypatch):
+        # Test Case 4: evaluate_scores gives the same results with and without JIT compiled kernels
+        rng = np.random.default_rng(1)
+        labels = rng.integers(0, 2, 5000)
+        scores = rng.normal(size=5000) + labels
+        threshold_values = ["thresholds", 0.5, 0.7, 1.2]
+
+        monkeypatch.setenv("BT4VT_DISABLE_JIT", "1")
+        assert not bt4vt.kernels.jit_enabled()
+        numpy_average = bt4vt.evaluate.evaluate_scores(scores, labels, self.dcf_costs)
+        numpy_group = bt4vt.evaluate.evaluate_scores(scores, labels, self.dcf_costs, threshold_values=threshold_values)
+
+        monkeypatch.delenv("BT4VT_DISABLE_JIT")
+        pytest.importorskip("numba")
+        jit_average = bt4vt.evaluate.evaluate_scores(scores, labels, self.dcf_costs)
+        jit_group = bt4vt.evaluate.evaluate_scores(scores, labels, self.dcf_costs, threshold_values=threshold_values)
+
+        for numpy_evaluation, jit_evaluation in [(numpy_average, jit_average), (numpy_group, jit_group)]:
+            for numpy_result, jit_result in zip(numpy_evaluation, jit_evaluation):
+                assert np.array_equal(numpy_result, jit_result)
@@ -0,0 +1,47 @@
+import bt4vt
+import filecmp
+import glob
+import os
+import numpy as np
+
+
+class TestMetadataIndex:
+    def test_metadata_index_reuse(self):
+        # Test Case 1: bias tests with a saved metadata index give the same results as without index, and the index is reused while the metadata file is unchanged
+        config_1 = "./tests/analysis_tests/config_1.yaml"
+        config_5 = "./tests/analysis_tests/config_5.yaml"
+        scores_1 = "./tests/analysis_tests/scores_1.csv"
+        index_dir = "./tests/analysis_tests/results/metadata_index/"
+        for index_file in glob.glob(os.path.join(index_dir, "*.npz")):
+            os.remove(index_file)
+
+        test_1 = bt4vt.core.SpeakerBiasTest(scores_1, config_1)
+        test_1.run_tests()
+
+        test_5 = bt4vt.core.SpeakerBiasTest(scores_1, config_5)
+        index_files = glob.glob(os.path.join(index_dir, "*.npz"))
+        assert len(index_files) == 1
+        index_mtime = os.path.getmtime(index_files[0])
+
+        # second run loads the index instead of parsing the metadata file
+        test_5 = bt4vt.core.SpeakerBiasTest(scores_1, config_5)
+        assert os.path.getmtime(index_files[0]) == index_mtime
+        assert test_5.speaker_metadata.reset_index(drop=True).equals(test_1.speaker_metadata.reset_index(drop=True))
+        test_5.run_tests()
+
+        assert filecmp.cmp("./tests/analysis_tests/results/biastest_results_config_1_scores_1.csv",
+                           "./tests/analysis_tests/results/biastest_results_config_5_scores_1.csv",
+                           shallow=False) == True
+
+    def test_stale_metadata_index(self):
+        # Test Case 2: an index built from different metadata file content is not loaded
+        metadata_file = "./tests/analysis_tests/metadata.csv"
+        index_file = "./tests/analysis_tests/results/metadata_index/stale_index.npz"
+        speaker_metadata = bt4vt.dataio.load_data(metadata_file).rename(columns={"VoxCeleb1 ID": "id"})
+        metadata_index = bt4vt.groups.build_metadata_index(speaker_metadata, ["Gender", "Nationality"], [["Gender", "Nationality"]])
+        bt4vt.dataio.save_metadata_index(metadata_index, index_file, "0" * 64)
+
+        assert bt4vt.dataio.load_metadata_index(index_file, bt4vt.dataio.hash_file(metadata_file)) is None
+        loaded_index = bt4vt.dataio.load_metadata_index(index_file, "0" * 64)
+        assert loaded_index["speaker_groups"]["Gender_Nationality"]["subgroups"] == metadata_index["speaker_groups"]["Gender_Nationality"]["subgroups"]
+        assert np.array_equal(loaded_index["speaker_groups"]["Gender_Nationality"]["codes"], metadata_index["speaker_groups"]["Gender_Nationality"]["codes"])
@@ -0,0 +1,41 @@
+import bt4vt
+import numpy as np
+import pandas as pd
+from bt4vt.metrics import get_fpfn_at_threshold
+
+
+class TestOperatingPoints:
+    def test_threshold_grid(self):
+        # Test Case 1: operating points match a per threshold lookup on the DET curves
+        config_1 = "./tests/analysis_tests/config_1.yaml"
+        scores_1 = "./tests/analysis_tests/scores_1.csv"
+
+        test_1 = bt4vt.core.SpeakerBiasTest(scores_1, config_1)
+        test_1.run_tests()
+        test_1.run_operating_point_analysis(thresholds=[-0.5, 0.0, 0.5])
+
+        operating_points = pd.read_csv("./tests/analysis_tests/results/operating_points_config_1_scores_1.csv")
+        assert len(operating_points) == 3 * 15
+
+        error_rates = test_1.error_rates_by_speaker_group["Gender"]
+        error_rates = error_rates.loc[error_rates["Subgroup"] == "f"]
+        subgroup_points = test_1.operating_points.loc[test_1.operating_points["group_name"] == "f"]
+        for threshold, fpr, fnr in zip(subgroup_points["threshold"], subgroup_points["FPR"], subgroup_points["FNR"]):
+            assert (fpr, fnr) == get_fpfn_at_threshold(error_rates["FPRS"].values, error_rates["FNRS"].values,
+                                                       error_rates["Thresholds"].values, threshold)
+
+        average_points = operating_points.loc[operating_points["group_name"] == "average"]
+        assert np.all(average_points["FPR ratio"] == 1.0)
+        assert operating_points.loc[operating_points["group_name"] == "f_India", "FPR"].isnull().all()
+
+    def test_target_fprs(self):
+        # Test Case 2: target FPRs are translated into thresholds on the average DET curve
+        config_1 = "./tests/analysis_tests/config_1.yaml"
+        scores_1 = "./tests/analysis_tests/scores_1.csv"
+
+        test_1 = bt4vt.core.SpeakerBiasTest(scores_1, config_1)
+        test_1.run_tests()
+        test_1.run_operating_point_analysis(target_fprs=[0.1, 0.01])
+
+        average_points = test_1.operating_points.loc[test_1.operating_points["group_name"] == "average"]
+        assert np.all(average_points["FPR"].values <= [0.1, 0.01])
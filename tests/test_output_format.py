@@ -0,0 +1,57 @@
+import bt4vt
+import numpy as np
+import pandas as pd
+import pytest
+from bt4vt.dataio import load_det_curve
+
+
+class TestOutputFormat:
+    def test_parquet_results(self):
+        # Test Case 1: parquet results contain the same metrics as csv results, stored as float64
+        pq = pytest.importorskip("pyarrow.parquet")
+        config_1 = "./tests/analysis_tests/config_1.yaml"
+        config_4 = "./tests/analysis_tests/config_4.yaml"
+        scores_1 = "./tests/analysis_tests/scores_1.csv"
+
+        bt4vt.core.SpeakerBiasTest(scores_1, config_1).run_tests()
+        test_4 = bt4vt.core.SpeakerBiasTest(scores_1, config_4)
+        test_4.run_tests()
+
+        csv_results = pd.read_csv("./tests/analysis_tests/results/biastest_results_config_1_scores_1.csv")
+        parquet_results = pq.read_table("./tests/analysis_tests/results/biastest_results_config_4_scores_1.parquet")
+        assert parquet_results.schema.field("EER").type == "double"
+        assert parquet_results.schema.field("group_name").type.value_type == "string"
+        parquet_results = parquet_results.to_pandas()
+        assert list(parquet_results["group_name"]) == list(csv_results["group_name"])
+        assert np.allclose(parquet_results["EER"], csv_results["EER"], equal_nan=True)
+        assert np.array_equal(parquet_results["EER"], test_4.metrics.iloc[1].astype(float), equal_nan=True)
+
+        # group names that look like numbers stay strings
+        table = bt4vt.dataio._to_arrow_table(pd.DataFrame({"group_name": ["25", "average"], "EER": pd.Series([5.0, 4.0], dtype=object).astype(float)}))
+        assert table.column("group_name").to_pylist() == ["25", "average"]
+
+        speaker_results = pq.read_table("./tests/analysis_tests/results/speaker_results_config_4_scores_1.parquet")
+        assert speaker_results.num_rows == len(test_4.speaker_results)
+
+    def test_parquet_det_curves(self):
+        # Test Case 2: DET curves are stored with one row group per subgroup and can be read per subgroup
+        pq = pytest.importorskip("pyarrow.parquet")
+        config_4 = "./tests/analysis_tests/config_4.yaml"
+        scores_1 = "./tests/analysis_tests/scores_1.csv"
+
+        test_4 = bt4vt.core.SpeakerBiasTest(scores_1, config_4)
+        test_4.run_tests()
+
+        det_curves_file = "./tests/analysis_tests/results/det_curves_config_4_scores_1.parquet"
+        # average and all subgroups except f_India, which has no scores
+        assert pq.ParquetFile(det_curves_file).num_row_groups == 14
+
+        det_curve = load_det_curve(det_curves_file, "Gender", "f")
+        error_rates = test_4.error_rates_by_speaker_group["Gender"]
+        error_rates = error_rates.loc[error_rates["Subgroup"] == "f"]
+        # error rates are stored as float32, thresholds keep their precision
+        assert np.array_equal(det_curve["FPRS"].values, error_rates["FPRS"].values.astype(np.float32))
+        assert np.array_equal(det_curve["Thresholds"].values, error_rates["Thresholds"].values)
+
+        average_curve = load_det_curve(det_curves_file, "average", "average")
+        assert len(average_curve) == len(test_4.error_rates_by_speaker_group["average"])
@@ -0,0 +1,126 @@
+import bt4vt
+import filecmp
+import numpy as np
+import os
+import pandas as pd
+import tracemalloc
+
+
+class TestPlanner:
+    def test_plan_execution(self):
+        # Test Case 1: the first strategy that fits into the memory limit is selected, the strategy with the lowest peak if none fits
+        assert bt4vt.planner.parse_memory_limit("1.5 GB") == 1500000000
+        assert bt4vt.planner.parse_memory_limit(2048) == 2048
+
+        num_trials, trials_bytes, num_groups, num_subgroups = 10 ** 7, 10 ** 9, 3, 20
+        peaks = {strategy: sum(bt4vt.planner.estimate_stage_bytes(strategy, num_trials, trials_bytes, num_groups, num_subgroups).values())
+                 for strategy in bt4vt.planner.STRATEGIES}
+        assert peaks["in_memory"] > peaks["streaming"] > peaks["memmap"] > peaks["histogram"]
+
+        for strategy in bt4vt.planner.STRATEGIES:
+            plan = bt4vt.planner.plan_execution(num_trials, trials_bytes, num_groups, num_subgroups, peaks[strategy], allow_histogram=True)
+            assert plan["strategy"] == strategy
+            assert plan["fits"]
+        plan = bt4vt.planner.plan_execution(num_trials, trials_bytes, num_groups, num_subgroups, "1MB", allow_histogram=True)
+        assert plan["strategy"] == "histogram"
+        assert not plan["fits"]
+
+        # the histogram strategy with approximate metrics is not selected without opt-in
+        plan = bt4vt.planner.plan_execution(num_trials, trials_bytes, num_groups, num_subgroups, peaks["histogram"])
+        assert plan["strategy"] == "memmap"
+        assert not plan["fits"]
+
+    def test_strategies(self, tmp_path):
+        # Test Case 2: streaming and memmap strategies give the same results as the in memory strategy, the plan is written to the run profile
+        config_1 = "./tests/analysis_tests/config_1.yaml"
+        scores_1 = "./tests/analysis_tests/scores_1.csv"
+        results_file = "biastest_results_config_1_scores_1.csv"
+
+        test_1 = bt4vt.core.SpeakerBiasTest(scores_1, config_1)
+        test_1.config["memory_limit"] = "1TB"
+        test_1.config["results_dir"] = str(tmp_path / "in_memory") + "/"
+        os.makedirs(test_1.config["results_dir"])
+        test_1.run_tests()
+        assert test_1.execution_plan["strategy"] == "in_memory"
+        run_profile = pd.read_csv(tmp_path / "in_memory" / "run_profile_config_1_scores_1.csv")
+        assert list(run_profile["stage"]) == ["trials", "split", "det_kernel", "det_curves", "peak"]
+        assert (run_profile["strategy"] == "in_memory").all()
+        reference = test_1.metrics
+
+        trials_bytes = test_1.execution_plan["stages"]["trials"]
+        for strategy in ["streaming", "memmap", "histogram"]:
+            test_1 = bt4vt.core.SpeakerBiasTest(scores_1, config_1)
+            stage_bytes = bt4vt.planner.estimate_stage_bytes(strategy, len(test_1.scores), trials_bytes, 3, 14)
+            test_1.config["memory_limit"] = sum(stage_bytes.values())
+            test_1.config["histogram_fallback"] = True
+            test_1.config["results_dir"] = str(tmp_path / strategy) + "/"
+            os.makedirs(test_1.config["results_dir"])
+            test_1.run_tests()
+            assert test_1.execution_plan["strategy"] == strategy
+            if strategy == "histogram":
+                # the DET curves of the average and of all subgroups are approximated on the threshold grid
+                assert all(len(error_rates) <= test_1.execution_plan["histogram_bins"] + 1 for error_rates in
+                           [test_1.error_rates_by_speaker_group["average"]] + [curve for _, curve in test_1.error_rates_by_speaker_group["Gender"].groupby("Subgroup")])
+                subgroup_metrics = test_1.metrics.iloc[1:, 2:].astype(float).values
+                reference_metrics = reference.iloc[1:, 2:].astype(float).values
+                assert list(test_1.metrics.columns) == list(reference.columns)
+                assert np.allclose(subgroup_metrics[0], reference_metrics[0], atol=0.5, equal_nan=True)
+                assert np.allclose(subgroup_metrics[1:], reference_metrics[1:], atol=0.02, equal_nan=True)
+            else:
+                assert filecmp.cmp(tmp_path / strategy / results_file, tmp_path / "in_memory" / results_file, shallow=False) == True
+
+    def test_histogram_opt_in(self, tmp_path):
+        # Test Case 3: without histogram_fallback the exact strategy with the lowest estimated peak is used
+        test_1 = bt4vt.core.SpeakerBiasTest("./tests/analysis_tests/scores_1.csv", "./tests/analysis_tests/config_1.yaml")
+        test_1.config["memory_limit"] = "1KB"
+        test_1.config["results_dir"] = str(tmp_path) + "/"
+        test_1.run_tests()
+        assert test_1.execution_plan["strategy"] == "memmap"
+        assert not test_1.execution_plan["fits"]
+
+    def test_streaming_single_pass(self, tmp_path, monkeypatch):
+        # Test Case 4: with the streaming strategy every speaker group is split once, also if calibration metrics are evaluated
+        split_groups = []
+        split_scores_by_speaker_groups = bt4vt.core.split_scores_by_speaker_groups
+
+        def counting_split(scores, speaker_metadata, speaker_groups, *args, **kwargs):
+            split_groups.extend("_".join(group) for group in speaker_groups)
+            return split_scores_by_speaker_groups(scores, speaker_metadata, speaker_groups, *args, **kwargs)
+
+        monkeypatch.setattr(bt4vt.core, "split_scores_by_speaker_groups", counting_split)
+        test_6 = bt4vt.core.SpeakerBiasTest("./tests/analysis_tests/scores_1.csv", "./tests/analysis_tests/config_6.yaml")
+        stage_bytes = bt4vt.planner.estimate_stage_bytes("streaming", len(test_6.scores), test_6.scores.memory_usage(deep=True).sum(), 3, 14)
+        test_6.config["memory_limit"] = sum(stage_bytes.values())
+        test_6.config["results_dir"] = str(tmp_path) + "/"
+        test_6.run_tests()
+
+        assert test_6.execution_plan["strategy"] == "streaming"
+        assert sorted(split_groups) == ["Gender", "Gender_Nationality", "Nationality"]
+        reference = bt4vt.core.SpeakerBiasTest("./tests/analysis_tests/scores_1.csv", "./tests/analysis_tests/config_6.yaml")
+        reference.config["results_dir"] = str(tmp_path) + "/"
+        reference.run_tests()
+        pd.testing.assert_frame_equal(test_6.calibration_metrics, reference.calibration_metrics)
+
+    def test_memmap_peak_memory(self, tmp_path):
+        # Test Case 5: the memmap strategy writes the records of a speaker group to the memory-mapped file in chunks, its peak memory is below the streaming strategy
+        scores_1 = pd.read_csv("./tests/analysis_tests/scores_1.csv")
+        scores = scores_1.loc[scores_1.index.repeat(50)].reset_index(drop=True)
+        scores["sc"] += np.random.default_rng(0).normal(0, 0.01, len(scores))
+
+        peak_memory = dict()
+        for strategy in ["in_memory", "streaming", "memmap"]:
+            test_1 = bt4vt.core.SpeakerBiasTest(scores.copy(), "./tests/analysis_tests/config_1.yaml")
+            stage_bytes = bt4vt.planner.estimate_stage_bytes(strategy, len(test_1.scores), test_1.scores.memory_usage(deep=True).sum(), 3, 14)
+            test_1.config["memory_limit"] = sum(stage_bytes.values())
+            test_1.config["results_dir"] = str(tmp_path / strategy) + "/"
+            os.makedirs(test_1.config["results_dir"])
+            # the in memory run compiles the DET kernels before the peaks are measured
+            tracemalloc.start()
+            test_1.run_tests()
+            peak_memory[strategy] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            assert test_1.execution_plan["strategy"] == strategy
+
+        # the trials are allocated before the peak is measured
+        assert peak_memory["memmap"] <= test_1.execution_plan["estimated_peak"] - test_1.execution_plan["stages"]["trials"]
+        assert peak_memory["memmap"] < 0.8 * peak_memory["streaming"]
@@ -0,0 +1,88 @@
+import bt4vt
+import filecmp
+import glob
+import os
+import shutil
+import numpy as np
+import pandas as pd
+
+
+class TestResultCache:
+    def test_cached_det_curves(self, monkeypatch):
+        # Test Case 1: bias tests with cached DET curves give the same results, reruns with new dcf_costs or speaker groups only compute missing DET curves
+        config_1 = "./tests/analysis_tests/config_1.yaml"
+        config_7 = "./tests/analysis_tests/config_7.yaml"
+        scores_1 = "./tests/analysis_tests/scores_1.csv"
+        cache_dir = "./tests/analysis_tests/results/cache/"
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+        test_1 = bt4vt.core.SpeakerBiasTest(scores_1, config_1)
+        test_1.run_tests()
+
+        # first run with groups Gender and Nationality only: average + 2 + 4 subgroups are cached
+        test_7 = bt4vt.core.SpeakerBiasTest(scores_1, config_7)
+        test_7.config["speaker_groups"] = [["Gender"], ["Nationality"]]
+        test_7.run_tests()
+        assert len(glob.glob(os.path.join(cache_dir, "*.npz"))) == 7
+
+        # second run adds Gender_Nationality: only its 7 evaluable subgroups are computed
+        computed_curves = []
+        evaluate_scores = bt4vt.core.evaluate_scores
+
+        def counting_evaluate_scores(scores, labels, dcf_costs, threshold_values=None, det_curve=None, weights=None):
+            if det_curve is None:
+                computed_curves.append(len(scores))
+            return evaluate_scores(scores, labels, dcf_costs, threshold_values=threshold_values, det_curve=det_curve, weights=weights)
+
+        monkeypatch.setattr(bt4vt.core, "evaluate_scores", counting_evaluate_scores)
+        test_7 = bt4vt.core.SpeakerBiasTest(scores_1, config_7)
+        test_7.run_tests()
+        assert len(computed_curves) == 7
+        assert len(glob.glob(os.path.join(cache_dir, "*.npz"))) == 14
+
+        # rerun with new dcf_costs reuses all DET curves
+        computed_curves.clear()
+        test_7 = bt4vt.core.SpeakerBiasTest(scores_1, config_7)
+        test_7.config["dcf_costs"] = [(0.01, 1, 10)]
+        test_7.run_tests()
+        assert len(computed_curves) == 0
+
+        test_7 = bt4vt.core.SpeakerBiasTest(scores_1, config_7)
+        test_7.run_tests()
+        assert filecmp.cmp("./tests/analysis_tests/results/biastest_results_config_1_scores_1.csv",
+                           "./tests/analysis_tests/results/biastest_results_config_7_scores_1.csv",
+                           shallow=False) == True
+
+    def test_lru_eviction(self):
+        # Test Case 2: least recently used entries are evicted first, cache hits mark entries as recently used
+        cache_dir = "./tests/analysis_tests/results/lru_cache/"
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        curve = np.linspace(0, 1, 1000)
+        for index, cache_key in enumerate(["a", "b", "c"]):
+            bt4vt.cache.save_cached_det_curve(cache_dir, cache_key, curve, curve, curve, 10, 20)
+            os.utime(os.path.join(cache_dir, cache_key + ".npz"), (index, index))
+
+        assert bt4vt.cache.load_cached_det_curve(cache_dir, "a") is not None
+        entry_bytes = os.path.getsize(os.path.join(cache_dir, "a.npz"))
+        assert bt4vt.cache.evict_cache(cache_dir, 2 * entry_bytes) == 1
+        assert bt4vt.cache.load_cached_det_curve(cache_dir, "b") is None
+        assert bt4vt.cache.load_cached_det_curve(cache_dir, "a") is not None
+        assert bt4vt.cache.load_cached_det_curve(cache_dir, "c") is not None
+
+    def test_speaker_ids(self):
+        # Test Case 3: other speaker ids for the same scores file are not served the cached DET curves of the previous speaker ids
+        config_1 = "./tests/analysis_tests/config_1.yaml"
+        config_7 = "./tests/analysis_tests/config_7.yaml"
+        scores_1 = "./tests/analysis_tests/scores_1.csv"
+        shutil.rmtree("./tests/analysis_tests/results/cache/", ignore_errors=True)
+        speaker_ids = pd.read_csv(scores_1)["ref_file"].str.split("/").str[0].values
+        permuted_ids = np.random.default_rng(0).permutation(speaker_ids)
+
+        test_7 = bt4vt.core.SpeakerBiasTest(scores_1, config_7, speaker_ids=speaker_ids)
+        test_7.run_tests()
+        test_7 = bt4vt.core.SpeakerBiasTest(scores_1, config_7, speaker_ids=permuted_ids)
+        test_7.run_tests()
+        test_1 = bt4vt.core.SpeakerBiasTest(scores_1, config_1, speaker_ids=permuted_ids)
+        test_1.run_tests()
+
+        assert test_7.metrics.equals(test_1.metrics)
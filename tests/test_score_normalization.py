@@ -0,0 +1,80 @@
+import bt4vt
+import numpy as np
+import pandas as pd
+import pytest
+
+
+class TestScoreNormalization:
+    def test_cohort_statistics(self):
+        # Test Case 1: blocked top-k statistics are identical to the statistics of the sorted cohort scores
+        cohort_scores = np.random.default_rng(0).normal(size=(50, 40))
+
+        means, stds = bt4vt.normalization.compute_cohort_statistics(cohort_scores, top_k=10, block_size=7)
+        top_scores = np.sort(cohort_scores, axis=1)[:, -10:]
+        assert np.allclose(means, top_scores.mean(axis=1)) and np.allclose(stds, top_scores.std(axis=1))
+
+        means, stds = bt4vt.normalization.compute_cohort_statistics(cohort_scores, rows=np.array([3, 1]))
+        assert np.allclose(means, cohort_scores[[3, 1]].mean(axis=1)) and np.allclose(stds, cohort_scores[[3, 1]].std(axis=1))
+
+    def test_normalize_scores(self):
+        # Test Case 2: s-norm averages the z-normalised and t-normalised scores
+        utterances = np.array(["a", "b", "c"])
+        cohort_scores = np.random.default_rng(1).normal(size=(3, 20))
+        ref, test, scores = np.array(["a", "b"]), np.array(["c", "a"]), np.array([0.5, -0.5])
+
+        z_norm = bt4vt.normalization.normalize_scores(ref, test, scores, utterances, cohort_scores, "z-norm")
+        t_norm = bt4vt.normalization.normalize_scores(ref, test, scores, utterances, cohort_scores, "t-norm")
+        s_norm = bt4vt.normalization.normalize_scores(ref, test, scores, utterances, cohort_scores, "s-norm")
+        assert np.allclose(z_norm, (scores - cohort_scores[[0, 1]].mean(axis=1)) / cohort_scores[[0, 1]].std(axis=1))
+        assert np.allclose(s_norm, (z_norm + t_norm) / 2)
+
+        with pytest.raises(ValueError):
+            bt4vt.normalization.normalize_scores(np.array(["d"]), np.array(["a"]), np.array([0.0]), utterances, cohort_scores, "s-norm")
+
+        # constant cohort scores of an utterance do not give infinite or NaN scores
+        cohort_scores[2] = 0.5
+        with pytest.raises(ValueError):
+            bt4vt.normalization.normalize_scores(ref, test, scores, utterances, cohort_scores, "t-norm")
+        assert np.isfinite(bt4vt.normalization.normalize_scores(ref, test, scores, utterances, cohort_scores, "z-norm")).all()
+
+    def test_normalized_results(self):
+        # Test Case 3: metrics of as-normalised scores are written next to the metrics of the raw scores
+        config_1 = "./tests/analysis_tests/config_1.yaml"
+        scores_1 = "./tests/analysis_tests/scores_1.csv"
+        scores = pd.read_csv(scores_1)
+        utterances = np.unique(np.concatenate([scores["ref_file"], scores["com_file"]]))
+        cohort_file = "./tests/analysis_tests/results/cohort_scores_1.npz"
+        np.savez(cohort_file, utterances=utterances.astype(str), scores=np.random.default_rng(2).normal(size=(len(utterances), 100)))
+
+        test_1 = bt4vt.core.SpeakerBiasTest(scores_1, config_1)
+        test_1.config.update({"score_normalization": "as-norm", "cohort_scores_file": cohort_file, "cohort_top_k": 20})
+        test_1.run_tests()
+
+        results = pd.read_csv("./tests/analysis_tests/results/biastest_results_config_1_scores_1.csv")
+        normalized_results = pd.read_csv("./tests/analysis_tests/results/normalized_results_config_1_scores_1.csv")
+        assert list(normalized_results.columns[2:4]) == ["EER", "EER as-norm"]
+        assert normalized_results[results.columns].equals(results)
+        assert not np.allclose(normalized_results["EER"].iloc[1:], normalized_results["EER as-norm"].iloc[1:], equal_nan=True)
+        assert list(test_1.normalized_metrics.columns) == list(test_1.metrics.columns)
+
+    def test_memory_mapped_cohort(self, tmp_path):
+        # Test Case 4: a npy cohort score matrix is memory-mapped and gives the same normalised scores as a npz file
+        scores = pd.read_csv("./tests/analysis_tests/scores_1.csv")
+        utterances = np.unique(np.concatenate([scores["ref_file"], scores["com_file"]])).astype(str)
+        cohort_scores = np.random.default_rng(3).normal(size=(len(utterances), 50))
+        np.savez(tmp_path / "cohort.npz", utterances=utterances, scores=cohort_scores)
+        np.save(tmp_path / "cohort.npy", cohort_scores)
+        (tmp_path / "cohort_utterances.txt").write_text("\n".join(utterances) + "\n")
+
+        mmap_utterances, mmap_cohort_scores = bt4vt.dataio.load_cohort_scores(str(tmp_path / "cohort.npy"), str(tmp_path / "cohort_utterances.txt"))
+        assert isinstance(mmap_cohort_scores, np.memmap)
+        assert np.array_equal(mmap_utterances, utterances)
+
+        npz_utterances, npz_cohort_scores = bt4vt.dataio.load_cohort_scores(str(tmp_path / "cohort.npz"))
+        normalized_scores = [bt4vt.normalization.normalize_scores(scores["ref_file"].values, scores["com_file"].values, scores["sc"].values, cohort_utterances,
+                                                                  cohort, "as-norm", top_k=10, block_size=64)
+                             for cohort_utterances, cohort in [(mmap_utterances, mmap_cohort_scores), (npz_utterances, npz_cohort_scores)]]
+        assert np.array_equal(normalized_scores[0], normalized_scores[1])
+
+        with pytest.raises(ValueError):
+            bt4vt.dataio.load_cohort_scores(str(tmp_path / "cohort.npy"))
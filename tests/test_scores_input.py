@@ -9,25 +9,25 @@ class TestScoresInput:
         config_1a = "./tests/scoresfile_tests/config_1a.yaml"
         scores_1a = "./tests/scoresfile_tests/scores_1a.csv"
 
-        pytest.raises(SystemExit, bt4vt.core.SpeakerBiasTest, scores_1a, config_1a)
+        pytest.raises(bt4vt.validation.InputValidationError, bt4vt.core.SpeakerBiasTest, scores_1a, config_1a)
 
     def test_different_com_column(self):
         config_1b = "./tests/scoresfile_tests/config_1b.yaml"
         scores_1b = "./tests/scoresfile_tests/scores_1b.csv"
 
-        pytest.raises(SystemExit, bt4vt.core.SpeakerBiasTest, scores_1b, config_1b)
+        pytest.raises(bt4vt.validation.InputValidationError, bt4vt.core.SpeakerBiasTest, scores_1b, config_1b)
 
     def test_different_sc_column(self):
         config_1c = "./tests/scoresfile_tests/config_1c.yaml"
         scores_1c = "./tests/scoresfile_tests/scores_1c.csv"
 
-        pytest.raises(SystemExit, bt4vt.core.SpeakerBiasTest, scores_1c, config_1c)
+        pytest.raises(bt4vt.validation.InputValidationError, bt4vt.core.SpeakerBiasTest, scores_1c, config_1c)
 
     def test_different_lab_column(self):
         config_1d = "./tests/scoresfile_tests/config_1d.yaml"
         scores_1d = "./tests/scoresfile_tests/scores_1d.csv"
 
-        pytest.raises(SystemExit, bt4vt.core.SpeakerBiasTest, scores_1d, config_1d)
+        pytest.raises(bt4vt.validation.InputValidationError, bt4vt.core.SpeakerBiasTest, scores_1d, config_1d)
 
     def test_additional_column(self):
         # Test Case 2: additional columns we are not using
@@ -0,0 +1,56 @@
+import bt4vt
+import json
+import threading
+import urllib.error
+import urllib.request
+import numpy as np
+import pandas as pd
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+
+
+@pytest.fixture(scope="module")
+def service_url():
+    server = bt4vt.service.make_server("./tests/analysis_tests/scores_1.csv", "./tests/analysis_tests/config_1.yaml", port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield "http://127.0.0.1:" + str(server.server_address[1])
+    server.shutdown()
+    server.server_close()
+
+
+def _run_tests(service_url, query):
+    request = urllib.request.Request(service_url + "/run_tests", data=json.dumps(query).encode(), method="POST")
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read())
+
+
+class TestService:
+    def test_query(self, service_url):
+        # Test Case 1: a query with other dcf_costs and speaker_groups returns the results of a bias test with the same config
+        config_1 = "./tests/analysis_tests/config_1.yaml"
+        scores_1 = "./tests/analysis_tests/scores_1.csv"
+        test_1 = bt4vt.core.SpeakerBiasTest(scores_1, config_1)
+        test_1.config.update({"dcf_costs": [(0.01, 1, 1)], "speaker_groups": [["Gender"], ["Gender", "Nationality"]]})
+        test_1.run_tests()
+        expected = pd.read_csv("./tests/analysis_tests/results/biastest_results_config_1_scores_1.csv")
+
+        results = pd.DataFrame(_run_tests(service_url, {"dcf_costs": [[0.01, 1, 1]], "speaker_groups": [["Gender"], ["Gender", "Nationality"]]})["results"])
+        assert list(results.columns) == list(expected.columns)
+        assert list(results["group_name"]) == list(expected["group_name"])
+        assert np.allclose(results.iloc[:, 2:].astype(float), expected.iloc[:, 2:].astype(float), equal_nan=True)
+
+    def test_concurrent_queries(self, service_url):
+        # Test Case 2: concurrent queries with different dcf_costs return the same results as sequential queries
+        queries = [{"dcf_costs": [[p_target, 1, 1]], "min_trials": 100} for p_target in [0.01, 0.05, 0.1, 0.2]] * 4
+        sequential = [_run_tests(service_url, query) for query in queries[:4]]
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            concurrent = list(executor.map(lambda query: _run_tests(service_url, query), queries))
+
+        assert concurrent == sequential * 4
+
+    def test_invalid_query(self, service_url):
+        # Test Case 3: invalid queries are answered with status 400 and the problems of the query
+        with pytest.raises(urllib.error.HTTPError) as error:
+            _run_tests(service_url, {"speaker_groups": [["Age"]], "min_trials": -1})
+        assert error.value.code == 400
+        assert [problem["check"] for problem in json.loads(error.value.read())["problems"]] == ["speaker_groups", "min_trials"]
@@ -0,0 +1,28 @@
+import bt4vt
+import numpy as np
+import pandas as pd
+
+
+class TestSpeakerIds:
+    def test_default_extraction(self):
+        # Test Case 1: default extraction gives the same speaker ids as splitting every filepath by dot and id_delimiter
+        scores = bt4vt.dataio.load_data("./tests/analysis_tests/scores_1.csv")
+        filepaths = scores["ref_file"].astype(str)
+        speaker_ids = bt4vt.groups.get_speaker_ids(filepaths, "/")
+        expected_ids = filepaths.apply(lambda x: x.split(".")[0]).apply(lambda x: x.split("/")[0])
+        assert speaker_ids.equals(expected_ids)
+
+    def test_dotted_filepaths(self):
+        # Test Case 2: dots in directory names are not treated as file extensions
+        filepaths = pd.Series(["data.v2/id10001/a/00001.wav", "data.v2/id10002/b/00002.wav", "data.v2/id10001/a/00001.wav"])
+        speaker_ids = bt4vt.groups.get_speaker_ids(filepaths, "/", id_field=1)
+        assert list(speaker_ids) == ["id10001", "id10002", "id10001"]
+        speaker_ids = bt4vt.groups.get_speaker_ids(filepaths, "/", id_field=-1)
+        assert list(speaker_ids) == ["00001", "00002", "00001"]
+
+    def test_id_pattern(self):
+        # Test Case 3: speaker ids are extracted with a named group, the first group or the complete match, unmatched filepaths obtain NaN
+        filepaths = pd.Series(["data.v2/id10001/a/00001.wav", "data.v2/spk_7/b/00002.wav"])
+        assert list(bt4vt.groups.get_speaker_ids(filepaths, id_pattern=r"/(?P<id>id\d+)/")) == ["id10001", np.nan]
+        assert list(bt4vt.groups.get_speaker_ids(filepaths, id_pattern=r"/(id\d+|spk_\d+)/")) == ["id10001", "spk_7"]
+        assert list(bt4vt.groups.get_speaker_ids(filepaths, id_pattern=r"(?<=/)(?:id|spk_)\d+")) == ["id10001", "spk_7"]
@@ -0,0 +1,46 @@
+import os
+
+import bt4vt
+import numpy as np
+import pandas as pd
+import pytest
+
+
+class TestSpeakerInfluence:
+    def test_leave_one_speaker_out(self):
+        # Test Case 1: the metrics without a speaker equal the metrics of the scores evaluated again without the trials of the speaker
+        scores_1 = pd.read_csv("./tests/analysis_tests/scores_1.csv")
+        speaker_ids = scores_1["ref_file"].str.split("/").str[0].values
+        scores = scores_1["sc"].values
+        labels = scores_1["lab"].values
+        dcf_costs = [(0.05, 1, 1), (0.01, 1, 1)]
+
+        speakers, trials, metrics, metrics_without = bt4vt.influence.compute_speaker_influence(scores, labels, speaker_ids, dcf_costs, block_size=10000)
+        assert np.allclose(metrics, bt4vt.evaluate.evaluate_scores(scores, labels, dcf_costs)[3])
+        assert trials.sum() == len(scores)
+        for speaker, speaker_metrics in zip(speakers, metrics_without):
+            kept = speaker_ids != speaker
+            assert np.allclose(speaker_metrics, bt4vt.evaluate.evaluate_scores(scores[kept], labels[kept], dcf_costs)[3])
+
+        # a speaker with all non-target trials of a subgroup leaves a single class
+        _, _, _, metrics_without = bt4vt.influence.compute_speaker_influence([0.9, 0.8, 0.1, 0.2], [1, 1, 0, 0], [0, 0, 1, 1], dcf_costs)
+        assert np.isnan(metrics_without).all()
+
+    def test_run_influence_analysis(self):
+        # Test Case 2: the influence table ranks the speakers of every evaluated subgroup by their influence on the subgroup EER
+        config_1 = "./tests/analysis_tests/config_1.yaml"
+        test_1 = bt4vt.core.SpeakerBiasTest("./tests/analysis_tests/scores_1.csv", config_1)
+        test_1.run_tests()
+        test_1.run_influence_analysis(top_k=3)
+
+        speaker_influence = test_1.speaker_influence
+        assert os.path.isfile(os.path.join(test_1.config["results_dir"], test_1._speaker_influence_file))
+        assert (speaker_influence.groupby(["speaker_groups", "group_name"])["rank"].max() <= 3).all()
+        for (group, subgroup), subgroup_influence in speaker_influence.groupby(["speaker_groups", "group_name"]):
+            assert test_1.metrics[subgroup].iloc[0] == group
+            assert np.isclose(subgroup_influence["EER"].iloc[0], test_1.metrics[subgroup].iloc[1])
+            assert (np.diff(subgroup_influence["EER influence"].values) <= 0).all()
+            assert np.allclose(subgroup_influence["EER influence"], subgroup_influence["EER"] - subgroup_influence["EER without speaker"])
+            assert set(subgroup_influence["id"]) <= set(test_1.speaker_metadata["id"])
+
+        pytest.raises(ValueError, bt4vt.influence.rank_speaker_influence, [0], [1], np.zeros(2), np.zeros((1, 2)), [(0.05, 1, 1)], rank_by="DCF")
@@ -0,0 +1,40 @@
+import bt4vt
+import numpy as np
+
+
+class TestSpeakerMetrics:
+    def test_speaker_error_rates(self):
+        # Test Case 1: speaker error rates at the average thresholds match a direct count over the speaker's trials
+        config_1 = "./tests/analysis_tests/config_1.yaml"
+        scores_1 = "./tests/analysis_tests/scores_1.csv"
+
+        test_1 = bt4vt.core.SpeakerBiasTest(scores_1, config_1)
+        test_1.run_tests()
+        test_1.run_speaker_tests(top_k=3)
+
+        eer_threshold = test_1.metrics["thresholds"][1]
+        speaker = test_1.speaker_results.loc[test_1.speaker_results["id"] == "id10002"].iloc[0]
+        trials = test_1.scores.loc[test_1.scores["ref_id"] == "id10002"]
+        nontargets = trials.loc[trials["label"] != 1]
+        targets = trials.loc[trials["label"] == 1]
+        assert speaker["nontargets"] == len(nontargets)
+        assert speaker["FPR at EER threshold"] == np.mean(nontargets["score"] >= eer_threshold)
+        assert speaker["FNR at EER threshold"] == np.mean(targets["score"] < eer_threshold)
+
+    def test_worst_speakers(self):
+        # Test Case 2: worst speakers are the top_k speakers of each subgroup sorted by detection cost
+        config_1 = "./tests/analysis_tests/config_1.yaml"
+        scores_1 = "./tests/analysis_tests/scores_1.csv"
+
+        test_1 = bt4vt.core.SpeakerBiasTest(scores_1, config_1)
+        test_1.run_tests()
+        test_1.run_speaker_tests(top_k=3)
+
+        dcf_column = "DCF (0.05, 1, 1)"
+        worst_female = test_1.worst_speakers.loc[test_1.worst_speakers["group_name"] == "f"]
+        female_speakers = test_1.speaker_results.loc[test_1.speaker_results["Gender"] == "f"]
+        expected = female_speakers.sort_values(dcf_column, ascending=False, kind="stable")[dcf_column].values[:3]
+        assert list(worst_female["rank"]) == [1, 2, 3]
+        assert np.array_equal(worst_female[dcf_column].values, expected)
+        # f_Canada has only two speakers
+        assert len(test_1.worst_speakers.loc[test_1.worst_speakers["group_name"] == "f_Canada"]) == 2
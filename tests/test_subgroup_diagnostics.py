@@ -0,0 +1,47 @@
+import bt4vt
+import numpy as np
+import pandas as pd
+
+
+class TestSubgroupDiagnostics:
+    def test_min_trials(self):
+        # Test Case 1: subgroups without trials or with fewer than min_trials trials are not evaluated and obtain NaN metrics
+        config_1 = "./tests/analysis_tests/config_1.yaml"
+        scores_1 = "./tests/analysis_tests/scores_1.csv"
+
+        test_1 = bt4vt.core.SpeakerBiasTest(scores_1, config_1)
+        test_1.config["min_trials"] = 200
+        test_1.run_tests()
+
+        status = test_1.subgroup_diagnostics.set_index("group_name")["status"]
+        assert status["f_India"] == "no_trials"
+        assert status["m_Canada"] == "min_trials"
+        assert status["f_Canada"] == "min_trials"
+        assert (status.drop(["f_India", "m_Canada", "f_Canada"]) == "ok").all()
+        assert test_1.metrics[["f_India", "m_Canada", "f_Canada"]].iloc[1:].isnull().all().all()
+        assert test_1.metrics[["m_USA", "f_UK"]].iloc[1:].notnull().all().all()
+
+        diagnostics_file = "./tests/analysis_tests/results/subgroup_diagnostics_config_1_scores_1.csv"
+        assert pd.read_csv(diagnostics_file).equals(test_1.subgroup_diagnostics)
+
+    def test_one_class_subgroups(self):
+        # Test Case 2: subgroups with only one class of trials are classified without computing a DET curve
+        records = lambda labels: pd.DataFrame({"label": labels, "score": np.linspace(0, 1, len(labels))}).to_records(index=False)
+        scores_by_speaker_groups = {"Gender": {"m": records([1, 1, 1]), "f": records([0, 0]), "x": [(np.nan, np.nan)], "y": records([0, 1])}}
+        subgroup_diagnostics = bt4vt.groups.get_subgroup_diagnostics(bt4vt.groups.count_subgroup_trials(scores_by_speaker_groups))
+
+        assert list(subgroup_diagnostics["status"]) == ["no_nontargets", "no_targets", "no_trials", "ok"]
+        assert list(subgroup_diagnostics["targets"]) == [3, 0, 0, 1]
+        assert list(subgroup_diagnostics["nontargets"]) == [0, 2, 0, 1]
+
+    def test_counts_from_partition(self):
+        # Test Case 3: trial counts of the partition and of the count without split equal the counts of the records of every subgroup, trials with zero weight are not counted
+        config_1 = "./tests/analysis_tests/config_1.yaml"
+        test_1 = bt4vt.core.SpeakerBiasTest("./tests/analysis_tests/scores_1.csv", config_1)
+        test_1.scores["weight"] = np.random.default_rng(0).integers(0, 3, len(test_1.scores)).astype(float)
+        split_arguments = (test_1.scores, test_1.speaker_metadata, test_1.config["speaker_groups"], "/")
+
+        scores_by_speaker_groups, trial_counts = bt4vt.groups.split_scores_by_speaker_groups(*split_arguments, return_counts=True)
+        assert trial_counts == bt4vt.groups.count_subgroup_trials(scores_by_speaker_groups)
+        assert trial_counts == bt4vt.groups.count_trials_by_speaker_groups(*split_arguments)
+        assert trial_counts["Gender"]["m"][0] == np.count_nonzero(scores_by_speaker_groups["Gender"]["m"]["weight"] > 0)
@@ -0,0 +1,67 @@
+import bt4vt
+import itertools
+import numpy as np
+import pandas as pd
+
+
+def _load_test():
+    config_1 = "./tests/analysis_tests/config_1.yaml"
+    scores_1 = "./tests/analysis_tests/scores_1.csv"
+    test_1 = bt4vt.core.SpeakerBiasTest(scores_1, config_1)
+    speaker_codes = bt4vt.groups.get_speaker_codes(test_1.scores["ref_id"], test_1.metadata_index)
+
+    return test_1, speaker_codes
+
+
+class TestSubgroupDiscovery:
+    def test_exhaustive_search(self):
+        # Test Case 1: with a beam that covers all subgroups the search returns the subgroups of all attribute combinations with at least min_trials trials
+        test_1, speaker_codes = _load_test()
+        scores, labels = test_1.scores["score"].values, test_1.scores["label"].values
+        worst_subgroups = bt4vt.discovery.discover_worst_subgroups(scores, labels, speaker_codes, test_1.metadata_index, test_1.config["dcf_costs"],
+                                                                   min_trials=50, beam_width=1000, top_k=1000)
+
+        attributes = list(test_1.metadata_index["attributes"].keys())
+        groups = [list(combination) for depth in range(1, len(attributes) + 1) for combination in itertools.combinations(attributes, depth)]
+        metadata_index = bt4vt.groups.build_metadata_index(test_1.speaker_metadata, attributes, groups)
+        average_eer = bt4vt.discovery.compute_cell_metrics(bt4vt.discovery.compute_threshold_counts(scores, labels, np.zeros(len(scores), dtype=int), 1), [])[0, 0]
+        expected = dict()
+        for group_name, group_index in metadata_index["speaker_groups"].items():
+            in_metadata = speaker_codes >= 0
+            cells = np.full(len(scores), len(group_index["subgroups"]))
+            cells[in_metadata] = group_index["codes"][speaker_codes[in_metadata]]
+            counts = bt4vt.discovery.compute_threshold_counts(scores, labels, cells, len(group_index["subgroups"]) + 1)[:-1]
+            eers = bt4vt.discovery.compute_cell_metrics(counts, [])[:, 0]
+            for subgroup, trials, eer in zip(group_index["subgroups"], counts.sum(axis=(1, 2)), eers):
+                if trials >= 50:
+                    expected[(group_name, subgroup)] = eer / average_eer
+
+        found = dict(zip(zip(worst_subgroups["speaker_groups"], worst_subgroups["group_name"]), worst_subgroups["EER ratio"]))
+        assert found.keys() == expected.keys()
+        assert np.allclose([found[key] for key in expected], list(expected.values()), equal_nan=True)
+        assert worst_subgroups["EER ratio"].dropna().is_monotonic_decreasing
+
+    def test_beam(self):
+        # Test Case 2: with a beam width of 1 only the subgroups of the worst subgroup of depth 1 are evaluated at depth 2
+        test_1, speaker_codes = _load_test()
+        worst_subgroups = bt4vt.discovery.discover_worst_subgroups(test_1.scores["score"].values, test_1.scores["label"].values, speaker_codes,
+                                                                   test_1.metadata_index, test_1.config["dcf_costs"], min_trials=50, beam_width=1, top_k=1000,
+                                                                   rank_by="minDCF")
+
+        depth_1 = worst_subgroups[worst_subgroups["depth"] == 1]
+        worst = depth_1.iloc[0]["group_name"]
+        depth_2 = worst_subgroups[worst_subgroups["depth"] == 2]
+        assert len(depth_2) > 0
+        assert all(worst in group_name.split("_") for group_name in depth_2["group_name"])
+        assert worst_subgroups["DCF ratio (0.05, 1, 1)"].dropna().is_monotonic_decreasing
+
+    def test_run_tests(self):
+        # Test Case 3: subgroup discovery is run by run_tests and written to the worst subgroups file
+        test_1, _ = _load_test()
+        test_1.config.update({"subgroup_discovery": True, "discovery_top_k": 5, "min_trials": 50})
+        test_1.run_tests()
+
+        worst_subgroups = pd.read_csv("./tests/analysis_tests/results/worst_subgroups_config_1_scores_1.csv")
+        assert len(worst_subgroups) == 5
+        assert list(worst_subgroups.columns[:4]) == ["speaker_groups", "group_name", "depth", "trials"]
+        assert (worst_subgroups["trials"] >= 50).all()
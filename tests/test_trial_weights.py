@@ -0,0 +1,76 @@
+import bt4vt
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def _metric_values(metrics):
+    return metrics.iloc[1:, 1:].astype(float).values
+
+
+class TestTrialWeights:
+    def test_weights_column(self):
+        # Test Case 1: integer trial weights give the metrics of a scores file in which every trial is repeated as often as its weight
+        scores_1 = pd.read_csv("./tests/analysis_tests/scores_1.csv")
+        weights = np.random.default_rng(0).integers(1, 4, len(scores_1))
+
+        test_weighted = bt4vt.core.SpeakerBiasTest(scores_1.assign(w=weights), "./tests/analysis_tests/config_9.yaml")
+        test_weighted.run_tests()
+        test_repeated = bt4vt.core.SpeakerBiasTest(scores_1.loc[scores_1.index.repeat(weights)].reset_index(drop=True), "./tests/analysis_tests/config_1.yaml")
+        test_repeated.run_tests()
+
+        assert list(test_weighted.metrics.columns) == list(test_repeated.metrics.columns)
+        assert np.allclose(_metric_values(test_weighted.metrics), _metric_values(test_repeated.metrics), equal_nan=True)
+        assert np.array_equal(test_weighted.metrics["thresholds"].values[1:], test_repeated.metrics["thresholds"].values[1:])
+
+        # the JIT kernel and the NumPy path agree on weighted scores
+        evaluation = bt4vt.evaluate.evaluate_scores(scores_1["sc"], scores_1["lab"], [(0.05, 1, 1)], weights=weights)
+        fprs, fnrs, _ = bt4vt.evaluate.compute_det_curve(scores_1["sc"], scores_1["lab"], weights=weights)
+        assert np.allclose(evaluation[0], fprs) and np.allclose(evaluation[1], fnrs)
+        assert np.isclose(evaluation[3][0], bt4vt.metrics.compute_eer(fprs, fnrs, evaluation[2])[0])
+
+    def test_unit_weights(self):
+        # Test Case 2: weights of 1 give the metrics of the unweighted bias test
+        scores_1 = pd.read_csv("./tests/analysis_tests/scores_1.csv")
+        test_weighted = bt4vt.core.SpeakerBiasTest(scores_1.assign(w=1.0), "./tests/analysis_tests/config_9.yaml")
+        test_weighted.run_tests()
+        test_1 = bt4vt.core.SpeakerBiasTest(scores_1, "./tests/analysis_tests/config_1.yaml")
+        test_1.run_tests()
+
+        assert np.allclose(_metric_values(test_weighted.metrics), _metric_values(test_1.metrics), equal_nan=True)
+
+    def test_inverse_subgroup_frequency(self):
+        # Test Case 3: every subgroup of the weights speaker group obtains an equal share of the target and of the non-target trials
+        test_10 = bt4vt.core.SpeakerBiasTest("./tests/analysis_tests/scores_1.csv", "./tests/analysis_tests/config_10.yaml")
+        test_10.run_tests()
+
+        nationality = test_10.scores["ref_id"].map(test_10.speaker_metadata.set_index("id")["Nationality"])
+        known = nationality.notna()
+        shares = test_10.scores[known].groupby([nationality[known], test_10.scores["label"][known]])["weight"].sum().unstack()
+        assert np.allclose(shares.values, shares.values[0])
+        assert np.allclose(test_10.scores["weight"][~known], 1.0)
+
+        # the weights of a subgroup are constant within each class, so that the DET curves of the Nationality subgroups are not changed
+        test_1 = bt4vt.core.SpeakerBiasTest("./tests/analysis_tests/scores_1.csv", "./tests/analysis_tests/config_1.yaml")
+        test_1.run_tests()
+        nationality_columns = [column for column in test_1.metrics.columns if test_1.metrics[column].iloc[0] == "Nationality"]
+        assert np.allclose(test_10.metrics[nationality_columns].iloc[1:2].astype(float), test_1.metrics[nationality_columns].iloc[1:2].astype(float), equal_nan=True)
+        assert not np.allclose(test_10.metrics["average"].iloc[1:].astype(float), test_1.metrics["average"].iloc[1:].astype(float))
+
+    def test_invalid_weights(self):
+        # Test Case 4: negative trial weights raise an InputValidationError
+        scores_1 = pd.read_csv("./tests/analysis_tests/scores_1.csv")
+        with pytest.raises(bt4vt.validation.InputValidationError) as error:
+            bt4vt.core.SpeakerBiasTest(scores_1.assign(w=-1.0), "./tests/analysis_tests/config_9.yaml")
+        assert [problem["check"] for problem in error.value.problems] == ["weights"]
+
+    def test_batch_weights(self):
+        # Test Case 5: bias tests of a batch with and without trial weights do not share the split of the scores
+        results_files = bt4vt.batch.run_scores_jobs("./tests/analysis_tests/scores_1.csv", ["./tests/analysis_tests/config_1.yaml",
+                                                                                          "./tests/analysis_tests/config_10.yaml"])
+        batch_results = pd.read_csv(results_files[1])
+        test_10 = bt4vt.core.SpeakerBiasTest("./tests/analysis_tests/scores_1.csv", "./tests/analysis_tests/config_10.yaml")
+        test_10.run_tests()
+
+        single_results = pd.read_csv("./tests/analysis_tests/results/" + test_10._biastest_results_file)
+        pd.testing.assert_frame_equal(batch_results, single_results)
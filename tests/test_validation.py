@@ -0,0 +1,49 @@
+import bt4vt
+import numpy as np
+import pandas as pd
+import pytest
+
+
+class TestValidation:
+    def test_all_problems_reported(self):
+        # Test Case 1: invalid labels and non-finite scores are reported together with their counts
+        config_1 = "./tests/analysis_tests/config_1.yaml"
+        scores_1 = pd.read_csv("./tests/analysis_tests/scores_1.csv")
+        scores_1.loc[[0, 1, 2], "lab"] = 2
+        scores_1.loc[[3, 4], "sc"] = [np.nan, np.inf]
+
+        with pytest.raises(bt4vt.validation.InputValidationError) as error:
+            bt4vt.core.SpeakerBiasTest(scores_1, config_1)
+        problems = {problem["check"]: problem["count"] for problem in error.value.problems}
+        assert problems == {"labels": 3, "scores": 2}
+
+    def test_missing_columns(self):
+        # Test Case 2: all missing columns of the scores and metadata files are reported at once
+        config = bt4vt.dataio.load_config("./tests/analysis_tests/config_1.yaml")
+        scores = pd.DataFrame(columns=["ref_file", "com_file"])
+        speaker_metadata = pd.DataFrame(columns=["VoxCeleb1 ID", "Gender"])
+
+        problems = bt4vt.validation.validate_columns(scores, speaker_metadata, config)
+        assert [problem["source"] for problem in problems] == ["scores", "scores", "metadata"]
+        assert all(problem["check"] == "missing_column" for problem in problems)
+
+    def test_labels(self):
+        # Test Case 3: mixed non-target labels are a problem, a single class and unknown speakers are warnings
+        scores = np.linspace(0, 1, 4)
+        problems, warnings = bt4vt.validation.validate_scores(np.array([1, 0, -1, 1]), scores)
+        assert [problem["check"] for problem in problems] == ["labels"] and warnings == []
+
+        problems, warnings = bt4vt.validation.validate_scores(np.array([1, 1, 1, 1]), scores, np.array(["a", "b", "c", "c"]), np.array(["a", "b"]))
+        assert problems == []
+        assert [(warning["check"], warning["count"]) for warning in warnings] == [("labels", 1), ("speaker_ids", 2)]
+
+    def test_sample(self):
+        # Test Case 4: sampled validation checks only the sampled trials
+        labels = np.ones(1000, dtype=int)
+        labels[::2] = 0
+        scores = np.zeros(1000)
+        scores[:500] = np.nan
+
+        problems, _ = bt4vt.validation.validate_scores(labels, scores, sample_size=100)
+        assert len(problems) == 1 and 0 < problems[0]["count"] < 100
+        assert problems[0]["message"].endswith("in a sample of 100 trials are NaN or infinite")